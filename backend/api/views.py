@@ -1,19 +1,30 @@
+import csv
+import io
 import json
-import sqlite3
-from pathlib import Path
-from django.http import JsonResponse, HttpResponse
+from datetime import datetime
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
 from django.views.decorators.http import require_GET, require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from django.conf import settings
-from bots.deposit import ensure_admin_txns_table
+from bots.db import connection, request_connection, run_read
+from bots.profile import invalidate_profile, publish_profile_changes
+from bots.game.cards import CARDS_DIR, card_manifest
+from bots.game.client import INTERNAL_HEADER
+from bots.game.engine import engine as game_engine
+from bots.game.host import join_game
+from bots.game.lobby import CardTaken, InsufficientBalance
+from bots.leaderboard import leaderboard, leaderboard_page, user_rank
+from bots.periods import PERIODS, period_boards
+from bots.txn_import import import_admin_txns
+from bots.webapp_auth import verify_init_data, verify_internal_token
 import os
 import requests
 
-DB_FILE = str(Path(settings.BASE_DIR).parent / "usage.db")
-
 
 def _get_conn():
-    return sqlite3.connect(DB_FILE)
+    """Borrow this request thread's DB connection: `with _get_conn() as conn:`."""
+    return request_connection()
 
 
 @require_GET
@@ -25,62 +36,65 @@ def leaderboard_view(request):
       "items": [
         {"rank": 1, "player": "Alice", "points": 1200, "prize": "500 ETB"},
         ...
-      ]
+      ],
+      "next": "1200.0:42"
     }
+    Served from the in-memory leaderboard (bots.leaderboard), which is up to
+    LEADERBOARD_REFRESH seconds behind coins written by other processes; send
+    the ETag back in If-None-Match to get a 304 while it is unchanged. Pass `next` back
+    as ?after= for the following page, read from the database by keyset.
     """
     # Limit to avoid huge payloads
     limit = int(request.GET.get("limit", 50))
-    limit = max(1, min(limit, 200))
+    after = request.GET.get("after")
+    if after:
+        try:
+            page = leaderboard_page(after, max(1, min(limit, 200)))
+        except ValueError:
+            return _cors(JsonResponse({"error": "invalid cursor"}, status=400))
+        return _cors(JsonResponse(page))
+    etag, body = leaderboard.response(limit)
+    return _conditional(request, etag, body, "application/json")
 
-    conn = _get_conn()
+
+@require_GET
+def leaderboard_rank(request):
+    """A user's rank with neighbours: ?user_id=&neighbors=5.
+
+    {"rank": 5012, "total": 1000000, "items": [...], "next": "..."}; items use
+    the /api/leaderboard format and the user's own item has "me": true.
+    """
     try:
-        cur = conn.cursor()
-        # Ensure coin and username columns exist (defensive)
-        cur.execute("PRAGMA table_info(users)")
-        cols = {row[1] for row in cur.fetchall()}
-        if "coin" not in cols:
-            # No leaderboard data yet
-            return _cors(JsonResponse({"items": []}))
-        # Query top users by coin desc
-        # Prefer a display name: username if set, else user_id
-        select_username = "COALESCE(NULLIF(username, ''), CAST(user_id AS TEXT))"
-        cur.execute(
-            f"""
-            SELECT user_id, {select_username} AS display_name, COALESCE(coin, 0) AS coin
-            FROM users
-            ORDER BY coin DESC, user_id ASC
-            LIMIT ?
-            """,
-            (limit,),
-        )
-        rows = cur.fetchall()
-    finally:
-        conn.close()
-
-    items = []
-    for idx, (user_id, display_name, coin) in enumerate(rows, start=1):
-        prize = _prize_for_rank(idx)
-        items.append({
-            "rank": idx,
-            "player": display_name,
-            "points": float(coin),
-            "prize": prize,
-        })
-
-    return _cors(JsonResponse({"items": items}))
-
-
-def _prize_for_rank(rank: int) -> str:
-    # Simple demo prize tiers; adjust to your business rules
-    if rank == 1:
-        return "500 ETB"
-    if rank == 2:
-        return "300 ETB"
-    if rank == 3:
-        return "150 ETB"
-    if rank <= 10:
-        return "50 ETB"
-    return "—"
+        user_id = int(request.GET["user_id"])
+        neighbors = max(0, min(int(request.GET.get("neighbors", 5)), 50))
+    except (KeyError, ValueError):
+        return _cors(JsonResponse({"error": "user_id required"}, status=400))
+    result = user_rank(user_id, neighbors)
+    if result is None:
+        return _cors(JsonResponse({"error": "not ranked"}, status=404))
+    return _cors(JsonResponse(result))
+
+
+@require_GET
+def leaderboard_period(request, kind: str):
+    """Live board of the running day, week or month (bots.periods).
+
+    {"period": "week-2026-10-12", "starts_at": ..., "ends_at": ..., "previous": "week-2026-10-05", "items": [...]}
+    """
+    if kind not in PERIODS:
+        return _cors(JsonResponse({"error": "unknown period"}, status=404))
+    etag, body = period_boards.current(kind, int(request.GET.get("limit", 50)))
+    return _conditional(request, etag, body, "application/json")
+
+
+@require_GET
+def leaderboard_snapshot(request, period: str):
+    """Final standings of an ended period; never changes once frozen."""
+    snapshot = period_boards.snapshot(period)
+    if snapshot is None:
+        return _cors(JsonResponse({"error": "not frozen"}, status=404))
+    etag, body = snapshot
+    return _conditional(request, etag, body, "application/json", cache_control="public, max-age=31536000, immutable")
 
 
 def _cors(resp: HttpResponse) -> HttpResponse:
@@ -90,6 +104,18 @@ def _cors(resp: HttpResponse) -> HttpResponse:
     return resp
 
 
+def _conditional(request, etag: str, body: bytes, content_type: str, cache_control: str = "no-cache") -> HttpResponse:
+    """`body` with its ETag, or an empty 304 when the client already has it."""
+    if request.headers.get("If-None-Match") == etag:
+        resp = HttpResponse(status=304)
+    else:
+        resp = HttpResponse(body, content_type=content_type)
+    resp = _cors(resp)
+    resp["Cache-Control"] = cache_control
+    resp["ETag"] = etag
+    return resp
+
+
 # --------------------------
 # Admin: Deposits moderation
 # --------------------------
@@ -100,46 +126,171 @@ def _is_admin(request) -> bool:
     return bool(expected) and token == expected
 
 
+# Admin POSTs are csrf_exempt: they are authenticated by the admin token sent
+# with each request, not by a session cookie a forged request could ride on,
+# and their clients (scripts, the admin tools) hold no CSRF cookie.
+
+# Admin lists page by keyset: pass the last row's id back as ?after_id=. With
+# ?export=csv or ?export=json the whole filtered list is streamed instead,
+# EXPORT_CHUNK rows per query.
+ADMIN_PAGE_SIZE = 100
+ADMIN_PAGE_MAX = 1000
+EXPORT_CHUNK = 1000
+DEPOSIT_COLUMNS = ("id", "user_id", "amount", "method", "reference", "status", "created_at")
+TXN_COLUMNS = ("id", "method", "reference", "amount", "used_by", "used_at", "notes")
+
+
+def _timestamp(value: str | None) -> str | None:
+    # SQLite CURRENT_TIMESTAMP text, so bounds compare as strings
+    if not value:
+        return None
+    return datetime.fromisoformat(value).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _admin_filters(request) -> dict:
+    """method, user_id, since/until (ISO date or datetime; until is exclusive); ValueError if malformed."""
+    user_id = request.GET.get("user_id")
+    return {
+        "method": (request.GET.get("method") or "").strip().lower() or None,
+        "user_id": int(user_id) if user_id else None,
+        "since": _timestamp(request.GET.get("since")),
+        "until": _timestamp(request.GET.get("until")),
+    }
+
+
+def _page_size(request) -> int:
+    return max(1, min(int(request.GET.get("limit", ADMIN_PAGE_SIZE)), ADMIN_PAGE_MAX))
+
+
+def _admin_page(rows: list[tuple], columns: tuple[str, ...], limit: int) -> HttpResponse:
+    items = [dict(zip(columns, row)) for row in rows]
+    next_after_id = rows[-1][0] if len(rows) == limit else None
+    return _cors(JsonResponse({"items": items, "next_after_id": next_after_id}))
+
+
+def _export(request, fetch, cursor_of, after, columns: tuple[str, ...], fmt: str, name: str) -> HttpResponse:
+    """Stream every row `fetch(conn, after, limit)` pages through, as CSV or one JSON document."""
+
+    def page(cursor):
+        # A pooled connection per chunk, so a slow download holds no connection or read snapshot
+        with connection() as conn:
+            return fetch(conn, cursor, EXPORT_CHUNK)
+
+    if fmt == "csv":
+        out = io.StringIO()
+        csv.writer(out).writerow(columns)
+        opening, closing = out.getvalue(), ""
+
+        def encode(rows, first):
+            out = io.StringIO()
+            csv.writer(out).writerows(rows)
+            return out.getvalue()
+    else:
+        opening, closing = '{"items": [', "]}"
+
+        def encode(rows, first):
+            # One encode per chunk, without the list brackets
+            return ("" if first else ", ") + json.dumps([dict(zip(columns, row)) for row in rows])[1:-1]
+
+    def stream():
+        yield opening
+        cursor, first = after, True
+        while True:
+            rows = page(cursor)
+            if rows:
+                yield encode(rows, first)
+                first = False
+            if len(rows) < EXPORT_CHUNK:
+                break
+            cursor = cursor_of(rows[-1])
+        yield closing
+
+    async def astream():
+        # Under ASGI Django buffers a sync iterator whole before sending; an async one goes out chunk by chunk
+        yield opening
+        cursor, first = after, True
+        while True:
+            rows = await run_read(page, cursor)
+            if rows:
+                yield encode(rows, first)
+                first = False
+            if len(rows) < EXPORT_CHUNK:
+                break
+            cursor = cursor_of(rows[-1])
+        yield closing
+
+    content = astream() if isinstance(request, ASGIRequest) else stream()
+    resp = StreamingHttpResponse(content, content_type="text/csv" if fmt == "csv" else "application/json")
+    resp["Content-Disposition"] = f'attachment; filename="{name}.{fmt}"'
+    return _cors(resp)
+
+
+def _pending_deposits(conn, filters: dict, after: tuple[str, int] | None, limit: int) -> list[tuple]:
+    """Pending deposits oldest first, after a (created_at, id) cursor."""
+    where, params = ["status = 'pending'"], []
+    if filters["method"]:
+        where.append("method = ?")
+        params.append(filters["method"])
+    if filters["user_id"] is not None:
+        where.append("user_id = ?")
+        params.append(filters["user_id"])
+    if filters["since"]:
+        where.append("created_at >= ?")
+        params.append(filters["since"])
+    if filters["until"]:
+        where.append("created_at < ?")
+        params.append(filters["until"])
+    if after:
+        where.append("(created_at, id) > (?, ?)")
+        params.extend(after)
+    return conn.execute(
+        f"""
+        SELECT id, user_id, amount, method, reference, status, created_at
+        FROM deposits
+        WHERE {" AND ".join(where)}
+        ORDER BY created_at ASC, id ASC
+        LIMIT ?
+        """,
+        (*params, limit),
+    ).fetchall()
+
+
 @require_GET
 def list_pending_deposits(request):
+    """Pending deposits, oldest first: ?after_id=&limit=&method=&user_id=&since=&until=&export=csv|json."""
     if not _is_admin(request):
         return _cors(JsonResponse({"error": "unauthorized"}, status=401))
-    conn = _get_conn()
     try:
-        cur = conn.cursor()
-        cur.execute(
-            """
-            SELECT id, user_id, amount, method, reference, status, created_at
-            FROM deposits
-            WHERE status = 'pending'
-            ORDER BY created_at ASC
-            """
-        )
-        rows = cur.fetchall()
-    finally:
-        conn.close()
-    items = [
-        {
-            "id": r[0],
-            "user_id": r[1],
-            "amount": r[2],
-            "method": r[3],
-            "reference": r[4],
-            "status": r[5],
-            "created_at": r[6],
-        }
-        for r in rows
-    ]
-    return _cors(JsonResponse({"items": items}))
+        filters = _admin_filters(request)
+        limit = _page_size(request)
+        after_id = int(request.GET["after_id"]) if request.GET.get("after_id") else None
+    except ValueError:
+        return _cors(JsonResponse({"error": "invalid_params"}, status=400))
+
+    with _get_conn() as conn:
+        after = None
+        if after_id is not None:
+            row = conn.execute("SELECT created_at, id FROM deposits WHERE id = ?", (after_id,)).fetchone()
+            if not row:
+                return _cors(JsonResponse({"error": "invalid_after_id"}, status=400))
+            after = tuple(row)
+        export = request.GET.get("export")
+        if export not in ("csv", "json"):
+            return _admin_page(_pending_deposits(conn, filters, after, limit), DEPOSIT_COLUMNS, limit)
+
+    def fetch(conn, cursor, size):
+        return _pending_deposits(conn, filters, cursor, size)
 
+    return _export(request, fetch, lambda row: (row[6], row[0]), after, DEPOSIT_COLUMNS, export, "pending_deposits")
 
+
+@csrf_exempt
 @require_http_methods(["POST"])
 def approve_deposit(request, deposit_id: int):
     if not _is_admin(request):
         return _cors(JsonResponse({"error": "unauthorized"}, status=401))
 
-    conn = _get_conn()
-    try:
+    with _get_conn() as conn:
         cur = conn.cursor()
         # Fetch deposit
         cur.execute("SELECT user_id, amount, status FROM deposits WHERE id = ?", (deposit_id,))
@@ -155,19 +306,15 @@ def approve_deposit(request, deposit_id: int):
             "UPDATE deposits SET status='approved', approved_at=CURRENT_TIMESTAMP WHERE id = ?",
             (deposit_id,),
         )
-        # Ensure users table has balance columns
-        cur.execute("PRAGMA table_info(users)")
-        cols = {c[1] for c in cur.fetchall()}
-        if "balance" not in cols:
-            cur.execute("ALTER TABLE users ADD COLUMN balance REAL DEFAULT 0")
-        # Credit balance
+        # Credit the balance the bot shows (users.balance_etb)
         cur.execute(
-            "UPDATE users SET balance = COALESCE(balance, 0) + ? WHERE user_id = ?",
+            "UPDATE users SET balance_etb = COALESCE(balance_etb, 0) + ? WHERE user_id = ?",
             (float(amount), int(user_id)),
         )
+        # The bot caches profiles in its own process
+        publish_profile_changes(cur, [user_id])
         conn.commit()
-    finally:
-        conn.close()
+    invalidate_profile(user_id)
 
     return _cors(JsonResponse({"ok": True}))
 
@@ -176,54 +323,86 @@ def approve_deposit(request, deposit_id: int):
 # Admin: Manage admin-provided TXNs
 # ---------------------------------
 
+def _admin_txns(conn, filters: dict, used: tuple[int, ...], after: tuple[int, int] | None, limit: int) -> list[tuple]:
+    """Admin txns, unused before used and newest first within each, after a (used, id) cursor."""
+    rows = []
+    for state in used:
+        if after and state < after[0]:
+            continue
+        where, params = ["(used_by IS NOT NULL) = ?"], [state]
+        if filters["method"]:
+            where.append("method = ?")
+            params.append(filters["method"])
+        if filters["user_id"] is not None:
+            where.append("used_by = ?")
+            params.append(filters["user_id"])
+        if filters["since"]:
+            where.append("used_at >= ?")
+            params.append(filters["since"])
+        if filters["until"]:
+            where.append("used_at < ?")
+            params.append(filters["until"])
+        if after and state == after[0]:
+            where.append("id < ?")
+            params.append(after[1])
+        rows += conn.execute(
+            f"""
+            SELECT id, method, reference, amount, used_by, used_at, notes
+            FROM admin_txns
+            WHERE {" AND ".join(where)}
+            ORDER BY id DESC
+            LIMIT ?
+            """,
+            (*params, limit - len(rows)),
+        ).fetchall()
+        if len(rows) >= limit:
+            break
+    return rows
+
+
 @require_GET
 def list_admin_txns(request):
+    """Unused then used references, newest first: ?unused=1|used=1&after_id=&limit=&method=&user_id=&since=&until=&export=csv|json.
+
+    user_id, since and until filter on used_by/used_at, so they only match used references.
+    """
     if not _is_admin(request):
         return _cors(JsonResponse({"error": "unauthorized"}, status=401))
-    ensure_admin_txns_table()
-
-    only_unused = request.GET.get("unused") in {"1", "true", "True"}
-    method = (request.GET.get("method") or "").strip().lower() or None
-
-    conn = _get_conn()
     try:
-        cur = conn.cursor()
-        q = "SELECT id, method, reference, amount, used_by, used_at, notes FROM admin_txns"
-        params = []
-        where = []
-        if only_unused:
-            where.append("used_by IS NULL")
-        if method:
-            where.append("method = ?")
-            params.append(method)
-        if where:
-            q += " WHERE " + " AND ".join(where)
-        q += " ORDER BY used_by IS NOT NULL, id DESC"
-        cur.execute(q, params)
-        rows = cur.fetchall()
-    finally:
-        conn.close()
-
-    items = [
-        {
-            "id": r[0],
-            "method": r[1],
-            "reference": r[2],
-            "amount": r[3],
-            "used_by": r[4],
-            "used_at": r[5],
-            "notes": r[6],
-        }
-        for r in rows
-    ]
-    return _cors(JsonResponse({"items": items}))
+        filters = _admin_filters(request)
+        limit = _page_size(request)
+        after_id = int(request.GET["after_id"]) if request.GET.get("after_id") else None
+    except ValueError:
+        return _cors(JsonResponse({"error": "invalid_params"}, status=400))
+    if request.GET.get("unused") in {"1", "true", "True"}:
+        used = (0,)
+    elif request.GET.get("used") in {"1", "true", "True"} or filters["user_id"] is not None or filters["since"] or filters["until"]:
+        used = (1,)
+    else:
+        used = (0, 1)
+
+    with _get_conn() as conn:
+        after = None
+        if after_id is not None:
+            row = conn.execute("SELECT used_by IS NOT NULL, id FROM admin_txns WHERE id = ?", (after_id,)).fetchone()
+            if not row:
+                return _cors(JsonResponse({"error": "invalid_after_id"}, status=400))
+            after = tuple(row)
+        export = request.GET.get("export")
+        if export not in ("csv", "json"):
+            return _admin_page(_admin_txns(conn, filters, used, after, limit), TXN_COLUMNS, limit)
+
+    def fetch(conn, cursor, size):
+        return _admin_txns(conn, filters, used, cursor, size)
+
+    return _export(request, fetch, lambda row: (int(row[4] is not None), row[0]), after, TXN_COLUMNS, export, "admin_txns")
 
 
+@csrf_exempt
 @require_http_methods(["POST"])
 def add_admin_txn(request):
     if not _is_admin(request):
         return _cors(JsonResponse({"error": "unauthorized"}, status=401))
-    ensure_admin_txns_table()
 
     try:
         payload = json.loads(request.body.decode("utf-8") or "{}")
@@ -237,8 +416,7 @@ def add_admin_txn(request):
     if not method or not reference:
         return _cors(JsonResponse({"error": "missing_fields"}, status=400))
 
-    conn = _get_conn()
-    try:
+    with _get_conn() as conn:
         cur = conn.cursor()
         cur.execute(
             """
@@ -248,81 +426,25 @@ def add_admin_txn(request):
             (method, reference, float(amount) if amount is not None else None, notes),
         )
         conn.commit()
-    finally:
-        conn.close()
     return _cors(JsonResponse({"ok": True}))
 
 
+@csrf_exempt
 @require_http_methods(["POST"])
 def bulk_add_admin_txns(request):
+    """Import references from a JSON array, NDJSON or CSV upload (bots.txn_import).
+
+    The body is read as a stream, never as a whole. Returns counts and the rows
+    that were rejected: {"ok", "rows", "added", "skipped", "duplicates",
+    "invalid", "errors": [{"row": 12, "error": "missing reference"}, ...]}.
+    """
     if not _is_admin(request):
         return _cors(JsonResponse({"error": "unauthorized"}, status=401))
-    ensure_admin_txns_table()
 
-    raw = request.body.decode("utf-8", errors="ignore")
-    added = 0
-    skipped = 0
-    conn = _get_conn()
-    try:
-        cur = conn.cursor()
-        # Accept either JSON list or CSV (method,reference,amount,notes)
-        try:
-            data = json.loads(raw)
-            if isinstance(data, list):
-                for item in data:
-                    method = (item.get("method") or "").strip().lower()
-                    reference = (item.get("reference") or item.get("ref") or "").strip()
-                    amount = item.get("amount")
-                    notes = item.get("notes")
-                    if not method or not reference:
-                        skipped += 1
-                        continue
-                    try:
-                        cur.execute(
-                            "INSERT OR IGNORE INTO admin_txns (method, reference, amount, notes) VALUES (?, ?, ?, ?)",
-                            (method, reference, float(amount) if amount is not None else None, notes),
-                        )
-                        added += cur.rowcount and 1 or 0
-                    except Exception:
-                        skipped += 1
-                conn.commit()
-                return _cors(JsonResponse({"ok": True, "added": added, "skipped": skipped}))
-
-
-        except Exception:
-            pass
-
-        # CSV fallback
-        for line in raw.splitlines():
-            line = line.strip()
-            if not line or line.startswith("#"):
-                continue
-            parts = [p.strip() for p in line.split(",")]
-            if len(parts) < 2:
-                skipped += 1
-                continue
-            method, reference = parts[0].lower(), parts[1]
-            amount = None
-            notes = None
-            if len(parts) >= 3 and parts[2] != "":
-                try:
-                    amount = float(parts[2])
-                except Exception:
-                    amount = None
-            if len(parts) >= 4:
-                notes = parts[3]
-            try:
-                cur.execute(
-                    "INSERT OR IGNORE INTO admin_txns (method, reference, amount, notes) VALUES (?, ?, ?, ?)",
-                    (method, reference, amount, notes),
-                )
-                added += cur.rowcount and 1 or 0
-            except Exception:
-                skipped += 1
-        conn.commit()
-    finally:
-        conn.close()
-    return _cors(JsonResponse({"ok": True, "added": added, "skipped": skipped}))
+    with _get_conn() as conn:
+        result = import_admin_txns(conn, request, request.content_type)
+    return _cors(JsonResponse(result, status=200 if result["ok"] else 400))
+
 
 # --------------------------
 # Public: Support upload API
@@ -362,18 +484,13 @@ def upload_receipt(request):
     # Lookup phone from DB
     phone = None
     try:
-        conn = _get_conn()
-        cur = conn.cursor()
-        cur.execute("SELECT phone FROM users WHERE user_id = ?", (int(user_id),))
-        row = cur.fetchone()
+        with _get_conn() as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT phone FROM users WHERE user_id = ?", (int(user_id),))
+            row = cur.fetchone()
         phone = row[0] if row else None
     except Exception:
         phone = None
-    finally:
-        try:
-            conn.close()
-        except Exception:
-            pass
 
     caption = (
         "Deposit receipt\n"
@@ -396,3 +513,103 @@ def upload_receipt(request):
         return _cors(JsonResponse({"error": "telegram_send_exception", "details": str(e)}, status=502))
 
     return _cors(JsonResponse({"ok": True}))
+
+
+# --------------------------
+# Game: BINGO claims
+# --------------------------
+
+def _game_user(request, payload: dict) -> int | None:
+    """The acting user: from Mini App initData, or as named by a bot process holding the internal token."""
+    token = os.environ.get("TELEGRAM_BOT_TOKEN", "")
+    if verify_internal_token(request.headers.get(INTERNAL_HEADER, ""), token):
+        try:
+            return int(payload.get("user_id"))
+        except (TypeError, ValueError):
+            return None
+    init_data = request.headers.get("X-Telegram-Init-Data") or payload.get("init_data") or ""
+    user = verify_init_data(init_data, token)
+    return int(user["id"]) if user else None
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+async def game_claim(request):
+    """Claim BINGO for the caller's card in the running round of `stake`.
+
+    JSON body: {"stake": 10, "init_data": Telegram.WebApp.initData}
+    (init_data may also be sent in the X-Telegram-Init-Data header), or
+    {"stake", "user_id"} from a bot process (bots.game.client). Served by the
+    process hosting the game engine, core.asgi (bots.game.host).
+    """
+    try:
+        payload = json.loads(request.body or b"{}")
+        stake = int(payload.get("stake"))
+    except (TypeError, ValueError):
+        return _cors(JsonResponse({"error": "invalid_payload"}, status=400))
+    user_id = _game_user(request, payload)
+    if user_id is None:
+        return _cors(JsonResponse({"error": "unauthorized"}, status=403))
+    if not game_engine.running:
+        return _cors(JsonResponse({"error": "game_engine_unavailable"}, status=503))
+    result = await game_engine.claim(user_id, stake)
+    return _cors(JsonResponse(result._asdict()))
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+async def game_join(request):
+    """Seat a player forwarded by a bot process: {"stake", "user_id", "card"} -> bots.game.host.join_game."""
+    if not verify_internal_token(request.headers.get(INTERNAL_HEADER, ""), os.environ.get("TELEGRAM_BOT_TOKEN", "")):
+        return JsonResponse({"error": "unauthorized"}, status=403)
+    try:
+        payload = json.loads(request.body or b"{}")
+        stake = int(payload.get("stake"))
+        user_id = int(payload.get("user_id"))
+        card = int(payload["card"]) if payload.get("card") is not None else None
+    except (TypeError, ValueError):
+        return JsonResponse({"error": "invalid_payload"}, status=400)
+    if not game_engine.running:
+        return JsonResponse({"error": "game_engine_unavailable"}, status=503)
+    try:
+        return JsonResponse(await join_game(stake, user_id, card))
+    except CardTaken:
+        return JsonResponse({"error": "card_taken"}, status=409)
+    except InsufficientBalance:
+        return JsonResponse({"error": "insufficient_balance"}, status=402)
+    except ValueError as e:
+        return JsonResponse({"error": "invalid_card", "details": str(e)}, status=400)
+
+
+@require_GET
+async def game_lobby(request):
+    """Per stake: lobby round, queue depth and time-to-start metrics from the game engine."""
+    if not game_engine.running:
+        return _cors(JsonResponse({"error": "game_engine_unavailable"}, status=503))
+    return _cors(JsonResponse({"stakes": {str(k): v for k, v in game_engine.lobby_stats().items()}}))
+
+
+@require_GET
+def game_cards(request):
+    """Manifest of the current card set; the artifact URL changes whenever the cards do."""
+    manifest = card_manifest()
+    body = json.dumps({
+        "version": manifest["version"],
+        "count": manifest["count"],
+        "hash": manifest["hash"],
+        "url": f"/api/game/cards/{manifest['hash']}.bin",
+    }).encode()
+    # Revalidated on every load; usually a 304
+    return _conditional(request, f'"{manifest["hash"]}"', body, "application/json")
+
+
+@require_GET
+def game_card_file(request, digest: str):
+    """The card set artifact itself; its name is its content hash, so it never changes."""
+    path = CARDS_DIR / f"cards-{digest}.bin"
+    if not path.is_file():
+        return _cors(JsonResponse({"error": "not_found"}, status=404))
+    return _conditional(
+        request, f'"{digest}"', path.read_bytes(), "application/octet-stream",
+        cache_control="public, max-age=31536000, immutable",
+    )
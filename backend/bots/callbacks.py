@@ -0,0 +1,84 @@
+"""Declarative routing for inline-button callback_data.
+
+Each route is registered as its own CallbackQueryHandler with an anchored
+pattern, so PTB picks the route and the wrapper only does what the route asks
+for (usage logging, registration gating) before calling the handler:
+
+    callbacks = CallbackRegistry(log_usage=log_user_usage)
+    callbacks.exact("check_balance", show_balance)
+    callbacks.prefix("bet_", choose_stake, log_usage=False)
+    for handler in callbacks.handlers():
+        app.add_handler(handler)
+
+Every route's latency is recorded in bots.metrics.callback_latency under its name.
+"""
+import re
+import time
+from typing import Awaitable, Callable, NamedTuple
+from telegram import Update
+from telegram.ext import CallbackQueryHandler, ContextTypes
+from bots.metrics import LatencyStats, callback_latency
+from bots.profile import fetch_user_profile
+
+Handler = Callable[[Update, ContextTypes.DEFAULT_TYPE], Awaitable[None]]
+
+REGISTRATION_REQUIRED_TEXT = "Before you continue, please finish registration. Use /register. Thanks!"
+
+
+class CallbackRoute(NamedTuple):
+    name: str
+    pattern: str
+    handler: Handler
+    requires_registration: bool
+    log_usage: bool
+
+
+class CallbackRegistry:
+    def __init__(
+        self,
+        log_usage: Callable[[int, str], Awaitable[None]] | None = None,
+        latency: LatencyStats = callback_latency,
+    ):
+        self._log_usage = log_usage
+        self.latency = latency
+        self.routes: list[CallbackRoute] = []
+
+    def exact(self, data: str, handler: Handler, requires_registration: bool = True, log_usage: bool = True) -> None:
+        self._add(CallbackRoute(data, f"^{re.escape(data)}$", handler, requires_registration, log_usage))
+
+    def prefix(self, prefix: str, handler: Handler, requires_registration: bool = True, log_usage: bool = True) -> None:
+        self._add(CallbackRoute(f"{prefix}*", f"^{re.escape(prefix)}", handler, requires_registration, log_usage))
+
+    def _add(self, route: CallbackRoute) -> None:
+        if any(r.name == route.name for r in self.routes):
+            raise ValueError(f"Duplicate callback route: {route.name}")
+        self.routes.append(route)
+
+    def _wrap(self, route: CallbackRoute) -> Handler:
+        async def dispatch(update: Update, context: ContextTypes.DEFAULT_TYPE):
+            started = time.perf_counter()
+            try:
+                query = update.callback_query
+                await query.answer()
+                user = query.from_user
+                if route.log_usage and self._log_usage is not None:
+                    await self._log_usage(user.id, user.username or "")
+                if route.requires_registration and not (await fetch_user_profile(user.id)).registered:
+                    await query.message.reply_text(REGISTRATION_REQUIRED_TEXT)
+                    return
+                await route.handler(update, context)
+            finally:
+                self.latency.record(route.name, time.perf_counter() - started)
+
+        dispatch.__name__ = f"callback_{route.name}"
+        return dispatch
+
+    async def _unrouted(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        # Stale or unknown buttons: stop the client spinner, nothing else
+        await update.callback_query.answer()
+
+    def handlers(self) -> list[CallbackQueryHandler]:
+        """One handler per route in registration order, then an answer-only fallback."""
+        handlers = [CallbackQueryHandler(self._wrap(route), pattern=route.pattern) for route in self.routes]
+        handlers.append(CallbackQueryHandler(self._unrouted))
+        return handlers
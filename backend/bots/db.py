@@ -0,0 +1,185 @@
+import asyncio
+import functools
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from django.conf import settings
+
+# Single DB file shared by the bot and the API (repository root)
+DB_FILE = str(Path(settings.BASE_DIR).parent / "usage.db")
+
+# Connection settings applied once per physical connection
+BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", 5000))
+STATEMENT_CACHE_SIZE = 256
+BOT_POOL_SIZE = int(os.environ.get("SQLITE_BOT_POOL_SIZE", 4))
+
+
+def open_connection(db_file: str | None = None) -> sqlite3.Connection:
+    """Open a connection configured for concurrent bot/API access.
+
+    WAL lets readers proceed while a writer holds the lock, synchronous=NORMAL
+    drops the per-commit fsync of the WAL, and the busy timeout makes writers
+    wait for the lock instead of failing with "database is locked".
+    """
+    conn = sqlite3.connect(
+        db_file or DB_FILE,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        check_same_thread=False,
+        cached_statements=STATEMENT_CACHE_SIZE,
+    )
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    return conn
+
+
+def _reset(conn: sqlite3.Connection) -> None:
+    """Drop any transaction a caller left open before the connection is reused."""
+    if conn.in_transaction:
+        conn.rollback()
+
+
+class ConnectionPool:
+    """A bounded pool of long-lived connections.
+
+    At most `size` connections exist at once; callers block until one is
+    returned. Idle connections are reused LIFO so the warmest statement cache
+    is picked first.
+    """
+
+    def __init__(self, size: int, db_file: str | None = None):
+        self.size = size
+        self.db_file = db_file
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._all: list[sqlite3.Connection] = []
+
+    def acquire(self) -> sqlite3.Connection:
+        self._slots.acquire()
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            conn = open_connection(self.db_file)
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._all.append(conn)
+        return conn
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        try:
+            _reset(conn)
+            self._idle.put_nowait(conn)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close_all(self) -> None:
+        with self._lock:
+            conns, self._all = self._all, []
+        for conn in conns:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        self._idle = queue.LifoQueue()
+
+
+class ThreadLocalConnections:
+    """One long-lived connection per thread, for Django's request threads."""
+
+    def __init__(self, db_file: str | None = None):
+        self.db_file = db_file
+        self._local = threading.local()
+
+    @contextmanager
+    def connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = open_connection(self.db_file)
+            self._local.conn = conn
+        try:
+            yield conn
+        finally:
+            _reset(conn)
+
+
+# Bot side: bounded pool shared by the handlers. API side: per-thread connection.
+bot_pool = ConnectionPool(BOT_POOL_SIZE)
+thread_connections = ThreadLocalConnections()
+
+
+def connection():
+    """Borrow a pooled connection: `with connection() as conn: ...`.
+
+    The caller commits explicitly; anything left uncommitted is rolled back
+    when the connection goes back to the pool.
+    """
+    return bot_pool.connection()
+
+
+def request_connection():
+    """Borrow the calling thread's connection (used by the API views)."""
+    return thread_connections.connection()
+
+
+# -----------------------
+# Async access for the bot
+# -----------------------
+# Handlers must never run sqlite3 on the event loop: a write waiting on the lock
+# would stall every other user's update. Reads go to a small thread pool; writes
+# are serialized on one dedicated thread so they never queue in front of reads
+# (WAL readers are not blocked by a writer holding the lock).
+_readers: ThreadPoolExecutor | None = None
+_writer: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _executors() -> tuple[ThreadPoolExecutor, ThreadPoolExecutor]:
+    global _readers, _writer
+    if _readers is None or _writer is None:
+        with _executor_lock:
+            if _readers is None:
+                # Leave one pool slot for the writer thread
+                _readers = ThreadPoolExecutor(max_workers=max(1, BOT_POOL_SIZE - 1), thread_name_prefix="db-read")
+            if _writer is None:
+                _writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-write")
+    return _readers, _writer
+
+
+async def run_read(fn, *args, **kwargs):
+    """Await a blocking read helper on the reader threads, e.g. `await run_read(is_registered, uid)`."""
+    readers, _ = _executors()
+    return await asyncio.get_running_loop().run_in_executor(readers, functools.partial(fn, *args, **kwargs))
+
+
+async def run_write(fn, *args, **kwargs):
+    """Await a blocking helper that writes, on the single writer thread."""
+    _, writer = _executors()
+    return await asyncio.get_running_loop().run_in_executor(writer, functools.partial(fn, *args, **kwargs))
+
+
+def shutdown_executors(wait: bool = True) -> None:
+    """Stop the DB threads, letting queued writes finish when wait=True."""
+    global _readers, _writer
+    with _executor_lock:
+        readers, writer = _readers, _writer
+        _readers = _writer = None
+    for ex in (writer, readers):
+        if ex is not None:
+            ex.shutdown(wait=wait)
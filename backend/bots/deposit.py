@@ -1,9 +1,9 @@
 import os
 import sqlite3
-from pathlib import Path
-from django.conf import settings
 from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton, WebAppInfo
 from telegram.ext import ContextTypes
+from bots.db import connection, run_write
+from bots.profile import invalidate_profile, publish_profile_changes
 
 MIN_DEPOSIT_ETB = 50
 
@@ -17,81 +17,22 @@ def _code_block(text: str) -> str:
     # Use <pre> to avoid markdown parsing issues and make it copy friendly
     return f"<pre>{text}</pre>"
 
-DB_FILE = str(Path(settings.BASE_DIR).parent / "usage.db")
-
-def ensure_deposits_table() -> None:
-    """Create deposits table if it doesn't exist."""
-    conn = sqlite3.connect(DB_FILE)
-    try:
-        cur = conn.cursor()
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS deposits (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                amount REAL NOT NULL,
-                method TEXT NOT NULL,
-                reference TEXT,
-                status TEXT NOT NULL DEFAULT 'pending',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                approved_at TIMESTAMP
-            )
-            """
-        )
-        conn.commit()
-    finally:
-        conn.close()
-
-def ensure_admin_txns_table() -> None:
-    """Create admin_txns table if it doesn't exist.
-
-    This table stores transaction references provided by admins that can be
-    auto-validated when users submit their references from the WebApp.
+def _insert_pending_row(cur: sqlite3.Cursor, user_id: int, amount: float, method: str, reference: str | None) -> int:
+    cur.execute(
+        """
+        INSERT INTO deposits (user_id, amount, method, reference, status)
+        VALUES (?, ?, ?, ?, 'pending')
+        """,
+        (user_id, amount, method, reference or ""),
+    )
+    return int(cur.lastrowid)
 
-    Columns:
-      - id INTEGER PK
-      - method TEXT (e.g., 'cbe', 'boa', 'telebirr', 'cbe-birr')
-      - reference TEXT UNIQUE (bank ref / code)
-      - amount REAL (optional; can be 0 or NULL)
-      - used_by INTEGER (user_id who consumed it)
-      - used_at TIMESTAMP
-      - notes TEXT (optional admin notes)
-    """
-    conn = sqlite3.connect(DB_FILE)
-    try:
-        cur = conn.cursor()
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS admin_txns (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                method TEXT NOT NULL,
-                reference TEXT NOT NULL UNIQUE,
-                amount REAL,
-                used_by INTEGER,
-                used_at TIMESTAMP,
-                notes TEXT
-            )
-            """
-        )
-        conn.commit()
-    finally:
-        conn.close()
 
 def _insert_pending_deposit(user_id: int, amount: float, method: str, reference: str | None) -> int:
-    conn = sqlite3.connect(DB_FILE)
-    try:
-        cur = conn.cursor()
-        cur.execute(
-            """
-            INSERT INTO deposits (user_id, amount, method, reference, status)
-            VALUES (?, ?, ?, ?, 'pending')
-            """,
-            (user_id, amount, method, reference or ""),
-        )
+    with connection() as conn:
+        deposit_id = _insert_pending_row(conn.cursor(), user_id, amount, method, reference)
         conn.commit()
-        return int(cur.lastrowid)
-    finally:
-        conn.close()
+        return deposit_id
 
 
 async def start_deposit(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -126,7 +67,7 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
             context.user_data.pop("awaiting_deposit_reference", None)
             await update.message.reply_text("Let's restart deposit. Tap Make a Deposit again.")
             return
-        _insert_pending_deposit(update.effective_user.id, float(amount), "manual", reference)
+        await run_write(_insert_pending_deposit, update.effective_user.id, float(amount), "manual", reference)
         context.user_data["awaiting_deposit_reference"] = False
         await update.message.reply_text(
             "✅ Thanks! We received your reference. An admin will review and approve shortly."
@@ -203,13 +144,9 @@ async def handle_deposit_method(update: Update, context: ContextTypes.DEFAULT_TY
 
 
 def _credit_user_balance(cur: sqlite3.Cursor, user_id: int, amount: float) -> None:
-    """Ensure users table has balance and credit it."""
-    cur.execute("PRAGMA table_info(users)")
-    cols = {c[1] for c in cur.fetchall()}
-    if "balance" not in cols:
-        cur.execute("ALTER TABLE users ADD COLUMN balance REAL DEFAULT 0")
+    """Credit an approved deposit to the balance the bot shows (users.balance_etb)."""
     cur.execute(
-        "UPDATE users SET balance = COALESCE(balance, 0) + ? WHERE user_id = ?",
+        "UPDATE users SET balance_etb = COALESCE(balance_etb, 0) + ? WHERE user_id = ?",
         (float(amount), int(user_id)),
     )
 
@@ -228,9 +165,6 @@ def verify_deposit_reference(user_id: int, method: str, amount: float | None, re
     Returns (ok, message). If ok=True, the deposit is approved and balance credited.
     If ok=False, the reference is recorded as pending for manual review.
     """
-    ensure_deposits_table()
-    ensure_admin_txns_table()
-
     ref = (reference or "").strip()
     norm_method = _normalize_method(method)
     if not norm_method:
@@ -238,8 +172,7 @@ def verify_deposit_reference(user_id: int, method: str, amount: float | None, re
     if not ref or len(ref) < 8:
         return False, "Invalid transaction reference."
 
-    conn = sqlite3.connect(DB_FILE)
-    try:
+    with connection() as conn:
         cur = conn.cursor()
         # Try to find a matching admin-provided txn that is not used yet
         cur.execute(
@@ -265,12 +198,12 @@ def verify_deposit_reference(user_id: int, method: str, amount: float | None, re
                 "UPDATE admin_txns SET used_by = ?, used_at = CURRENT_TIMESTAMP WHERE id = ?",
                 (int(user_id), int(admin_id)),
             )
+            publish_profile_changes(cur, [user_id])
             conn.commit()
+            invalidate_profile(user_id)
             return True, "✅ Transaction verified and balance credited."
 
         # Not found or already used: record as pending for moderation
-        _insert_pending_deposit(int(user_id), float(amount or 0), norm_method, ref)
+        _insert_pending_row(cur, int(user_id), float(amount or 0), norm_method, ref)
         conn.commit()
         return False, "✅ Reference submitted. An admin will review shortly."
-    finally:
-        conn.close()
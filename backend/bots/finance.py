@@ -1,40 +1,14 @@
-import sqlite3
 import html
-from pathlib import Path
-from django.conf import settings
-
-# Use the same DB as other modules
-DB_FILE = str(Path(settings.BASE_DIR).parent / "usage.db")
-
-
-def ensure_user_finance_columns():
-    """Ensure balance/coin columns exist on the users table."""
-    conn = sqlite3.connect(DB_FILE)
-    try:
-        cur = conn.cursor()
-        cur.execute("PRAGMA table_info(users)")
-        cols = {row[1] for row in cur.fetchall()}
-        if "balance_etb" not in cols:
-            cur.execute("ALTER TABLE users ADD COLUMN balance_etb REAL DEFAULT 0.0")
-        if "coin" not in cols:
-            cur.execute("ALTER TABLE users ADD COLUMN coin REAL DEFAULT 0.10")
-        conn.commit()
-    finally:
-        conn.close()
+from bots.db import connection
+from bots.leaderboard import DISPLAY_NAME, leaderboard
+from bots.periods import record_period_coins
+from bots.profile import get_user_profile, invalidate_profile, publish_profile_changes
 
 
 def get_user_finance(user_id: int) -> tuple[float, float]:
     """Return (balance_etb, coin) for a user, defaulting to (0.0, 0.10)."""
-    conn = sqlite3.connect(DB_FILE)
-    try:
-        cur = conn.cursor()
-        cur.execute("SELECT balance_etb, coin FROM users WHERE user_id = ?", (user_id,))
-        row = cur.fetchone()
-        if row and row[0] is not None and row[1] is not None:
-            return float(row[0]), float(row[1])
-        return 0.0, 0.10
-    finally:
-        conn.close()
+    profile = get_user_profile(user_id)
+    return profile.balance_etb, profile.coin
 
 
 def format_balance_block(username: str, bal: float, coin: float) -> str:
@@ -50,8 +24,7 @@ def format_balance_block(username: str, bal: float, coin: float) -> str:
 
 def add_coins(user_id: int, delta: float) -> None:
     """Increment a user's coin balance by delta. Creates the row if missing."""
-    conn = sqlite3.connect(DB_FILE)
-    try:
+    with connection() as conn:
         cur = conn.cursor()
         # Ensure user row exists
         cur.execute("SELECT coin FROM users WHERE user_id = ?", (user_id,))
@@ -62,22 +35,21 @@ def add_coins(user_id: int, delta: float) -> None:
                 (user_id,),
             )
         # Apply increment
-        cur.execute("UPDATE users SET coin = COALESCE(coin, 0) + ? WHERE user_id = ?", (float(delta), user_id))
+        cur.execute(
+            f"UPDATE users SET coin = COALESCE(coin, 0) + ? WHERE user_id = ? RETURNING coin, {DISPLAY_NAME}",
+            (float(delta), user_id),
+        )
+        coin, name = cur.fetchone()
+        record_period_coins(cur, [(user_id, delta)])
+        publish_profile_changes(cur, [user_id])
         conn.commit()
-    finally:
-        conn.close()
+    invalidate_profile(user_id)
+    leaderboard.update(user_id, coin, name)
 
 
 def add_etb(user_id: int, delta: float) -> None:
-    """Increment a user's ETB balance by delta. Creates the row if missing.
-
-    Uses the `balance_etb` column managed by ensure_user_finance_columns().
-    """
-    # Make sure required columns exist (safe to call repeatedly)
-    ensure_user_finance_columns()
-
-    conn = sqlite3.connect(DB_FILE)
-    try:
+    """Increment a user's ETB balance by delta. Creates the row if missing."""
+    with connection() as conn:
         cur = conn.cursor()
         # Ensure user row exists
         cur.execute("SELECT balance_etb FROM users WHERE user_id = ?", (user_id,))
@@ -92,6 +64,6 @@ def add_etb(user_id: int, delta: float) -> None:
             "UPDATE users SET balance_etb = COALESCE(balance_etb, 0) + ? WHERE user_id = ?",
             (float(delta), user_id),
         )
+        publish_profile_changes(cur, [user_id])
         conn.commit()
-    finally:
-        conn.close()
+    invalidate_profile(user_id)
@@ -0,0 +1 @@
+"""Server-side bingo: rooms, rounds and number calling (see engine.py)."""
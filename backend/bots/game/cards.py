@@ -0,0 +1,239 @@
+"""Bingo cards as 25-bit masks, ported from frontend/src/bingoCards.js.
+
+Cell i (0-24) is row i // 5, column i % 5 and maps to bit 1 << i; the free
+center is cell 12. A card wins when its marked mask covers any WIN_MASKS
+entry: a row, a column, a diagonal or the four corners.
+
+`Board` tracks the cards in play for one round. It keeps an inverted index
+number -> [(card, cell bit, win masks through that cell)] so marking a called
+number is one dict lookup plus an OR and two to four ANDs per card holding it.
+
+The shared card set is generated once into a binary artifact under CARDS_DIR
+that the engine memory-maps and the Mini App downloads (GET /api/game/cards):
+
+    b"BNGO" | u16 format version | u32 card count | count x 25 u8 cells
+
+cells in cell order, 0 for the free center. The file is named after the
+first 16 hex digits of its SHA-256 (cards-<hash>.bin) so it can be cached
+forever; cards.json names the current one.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+from functools import lru_cache
+from pathlib import Path
+from bots.db import DB_FILE
+
+RANGES = ((1, 15), (16, 30), (31, 45), (46, 60), (61, 75))
+CARD_COUNT = 200
+FREE = "★"
+FREE_CELL = 12
+FREE_BIT = 1 << FREE_CELL
+
+CARDS_DIR = Path(os.environ.get("CARDS_DIR") or Path(DB_FILE).parent / "cardsets")
+CARD_FILE_MAGIC = b"BNGO"
+CARD_FILE_VERSION = 1
+CARD_MANIFEST = "cards.json"
+_CARD_FILE_HEADER = struct.Struct("<4sHI")
+
+
+def _line(cells) -> int:
+    mask = 0
+    for cell in cells:
+        mask |= 1 << cell
+    return mask
+
+
+ROW_MASKS = tuple(_line(range(r * 5, r * 5 + 5)) for r in range(5))
+COL_MASKS = tuple(_line(range(c, 25, 5)) for c in range(5))
+DIAG_MASKS = (_line((0, 6, 12, 18, 24)), _line((4, 8, 12, 16, 20)))
+CORNERS_MASK = _line((0, 4, 20, 24))
+WIN_MASKS = ROW_MASKS + COL_MASKS + DIAG_MASKS + (CORNERS_MASK,)
+# Per cell, only the patterns that cell can complete
+CELL_WINS = tuple(tuple(m for m in WIN_MASKS if m >> cell & 1) for cell in range(25))
+
+
+def build_card_from_seed(seed: int) -> list[list]:
+    """5x5 rows exactly as buildCardFromSeed in bingoCards.js (center is FREE)."""
+    columns = []
+    for idx, (start, end) in enumerate(RANGES):
+        size = end - start + 1
+        values = list(range(start, end + 1))
+        offset = (seed + idx * 7) % size
+        columns.append((values[offset:] + values[:offset])[:5])
+    return [[FREE if r == 2 and c == 2 else columns[c][r] for c in range(5)] for r in range(5)]
+
+
+def card_numbers(rows: list[list]) -> tuple[int, ...]:
+    """The 25 cells in cell order, 0 for the free center."""
+    return tuple(0 if v == FREE else v for row in rows for v in row)
+
+
+def has_win(marked: int) -> bool:
+    return any(marked & m == m for m in WIN_MASKS)
+
+
+class _MappedCells:
+    """cells[n - 1] of a card file, read straight from the mapping."""
+
+    __slots__ = ("_buf", "_count")
+
+    def __init__(self, buf: mmap.mmap, count: int):
+        self._buf = buf
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, i: int) -> bytes:
+        if not 0 <= i < self._count:
+            raise IndexError(i)
+        start = _CARD_FILE_HEADER.size + i * 25
+        return self._buf[start:start + 25]
+
+    def __iter__(self):
+        return (self[i] for i in range(self._count))
+
+
+class CardSet:
+    """Cards 1..N (card n is built from seed n) with a number -> (card, cell) index."""
+
+    __slots__ = ("cells", "digest", "_index")
+
+    def __init__(self, count: int = CARD_COUNT, cells=None, digest: str | None = None):
+        # cells[n - 1] = the 25 numbers of card n
+        if cells is None:
+            cells = [card_numbers(build_card_from_seed(seed)) for seed in range(1, count + 1)]
+        self.cells = cells
+        self.digest = digest
+        self._index: dict[int, list[tuple[int, int]]] | None = None
+
+    @classmethod
+    def from_file(cls, path: Path) -> "CardSet":
+        """Memory-map a card file written by write_card_file()."""
+        with open(path, "rb") as f:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = _CARD_FILE_HEADER.unpack_from(buf)
+        if magic != CARD_FILE_MAGIC or version != CARD_FILE_VERSION:
+            raise ValueError(f"{path} is not a version {CARD_FILE_VERSION} card file")
+        if len(buf) != _CARD_FILE_HEADER.size + count * 25:
+            raise ValueError(f"{path} is truncated")
+        return cls(count, _MappedCells(buf, count), hashlib.sha256(buf).hexdigest()[:16])
+
+    @property
+    def index(self) -> dict[int, list[tuple[int, int]]]:
+        # Built on first use; rounds only index their own cards (Board)
+        if self._index is None:
+            index: dict[int, list[tuple[int, int]]] = {n: [] for n in range(1, 76)}
+            for card, cells in enumerate(self.cells, start=1):
+                for cell, number in enumerate(cells):
+                    if number:
+                        index[number].append((card, cell))
+            self._index = index
+        return self._index
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+    def rows(self, card: int) -> list[list]:
+        cells = self.cells[card - 1]
+        return [[FREE if r * 5 + c == FREE_CELL else cells[r * 5 + c] for c in range(5)] for r in range(5)]
+
+    def mask_of(self, card: int, numbers) -> int:
+        """Marked mask of `card` for a set of called numbers (free cell included)."""
+        called = set(numbers)
+        mask = FREE_BIT
+        for cell, number in enumerate(self.cells[card - 1]):
+            if number in called:
+                mask |= 1 << cell
+        return mask
+
+
+def encode_card_set(count: int = CARD_COUNT) -> bytes:
+    cells = b"".join(bytes(card_numbers(build_card_from_seed(seed))) for seed in range(1, count + 1))
+    return _CARD_FILE_HEADER.pack(CARD_FILE_MAGIC, CARD_FILE_VERSION, count) + cells
+
+
+def write_card_file(count: int = CARD_COUNT, directory: Path = CARDS_DIR) -> dict:
+    """Write the card set artifact and make it current; returns the manifest."""
+    data = encode_card_set(count)
+    digest = hashlib.sha256(data).hexdigest()[:16]
+    manifest = {"version": CARD_FILE_VERSION, "count": count, "hash": digest, "file": f"cards-{digest}.bin"}
+    directory.mkdir(parents=True, exist_ok=True)
+    # Write-then-rename so concurrent readers never see a partial file
+    for name, content in ((manifest["file"], data), (CARD_MANIFEST, json.dumps(manifest).encode())):
+        tmp = directory / f".{name}.{os.getpid()}"
+        tmp.write_bytes(content)
+        os.replace(tmp, directory / name)
+    return manifest
+
+
+def card_manifest(directory: Path = CARDS_DIR) -> dict:
+    """The current artifact's manifest, generating the default set the first time."""
+    try:
+        return json.loads((directory / CARD_MANIFEST).read_bytes())
+    except FileNotFoundError:
+        return write_card_file(directory=directory)
+
+
+@lru_cache(maxsize=4)
+def card_set(count: int | None = None) -> CardSet:
+    """The shared set mapped from the current artifact, or a generated set of `count` cards."""
+    if count is None:
+        return CardSet.from_file(CARDS_DIR / card_manifest()["file"])
+    return CardSet(count)
+
+
+@lru_cache(maxsize=4)
+def win_lines(count: int | None = None) -> tuple[tuple[tuple[int, ...], ...], ...]:
+    """Per card, the numbers on each winning pattern (the free cell left out)."""
+    return tuple(
+        tuple(tuple(cells[i] for i in range(25) if mask >> i & 1 and cells[i]) for mask in WIN_MASKS)
+        for cells in card_set(count).cells
+    )
+
+
+class Board:
+    """Marked masks for the cards in one round."""
+
+    __slots__ = ("marks", "index", "completed")
+
+    def __init__(self, cards, card_set_: CardSet | None = None):
+        card_set_ = card_set_ or card_set()
+        in_play = set(cards)
+        for card in in_play:
+            if not 1 <= card <= len(card_set_):
+                raise ValueError(f"No such card: {card}")
+        self.marks: dict[int, int] = dict.fromkeys(in_play, FREE_BIT)
+        # number -> [(card, cell bit, win masks through the cell)] for cards in play only
+        self.index: dict[int, list[tuple[int, int, tuple[int, ...]]]] = {}
+        for card in sorted(in_play):
+            for cell, number in enumerate(card_set_.cells[card - 1]):
+                if number:
+                    self.index.setdefault(number, []).append((card, 1 << cell, CELL_WINS[cell]))
+        # card -> number of calls after which it first had a winning pattern
+        self.completed: dict[int, int] = {}
+
+    def mark(self, number: int, call_no: int = 0) -> list[int]:
+        """Mark a called number on every card holding it; return cards that just completed a pattern."""
+        entries = self.index.get(number)
+        if not entries:
+            return []
+        marks = self.marks
+        completed = self.completed
+        newly = []
+        for card, bit, wins in entries:
+            marked = marks[card] | bit
+            marks[card] = marked
+            if card not in completed:
+                for win in wins:
+                    if marked & win == win:
+                        completed[card] = call_no
+                        newly.append(card)
+                        break
+        return newly
+
+    def is_winner(self, card: int) -> bool:
+        return card in self.completed
@@ -0,0 +1,91 @@
+"""The bot's handle on the game engine, wherever it runs.
+
+In the process hosting the engine (core.asgi, see bots.game.host) calls go
+straight to it. Everywhere else (polling bot, sharded workers) they are
+forwarded over HTTP to GAME_ENGINE_URL, authenticated with a secret derived
+from the bot token (bots.webapp_auth.internal_token).
+"""
+import os
+import httpx
+from bots.game.engine import ClaimResult, engine as game_engine
+from bots.game.host import join_game
+from bots.game.lobby import CardTaken, InsufficientBalance
+from bots.webapp_auth import internal_token
+
+GAME_ENGINE_URL = (os.environ.get("GAME_ENGINE_URL") or "http://127.0.0.1:8000").rstrip("/")
+GAME_CLIENT_TIMEOUT = float(os.environ.get("GAME_CLIENT_TIMEOUT", 10))
+INTERNAL_HEADER = "X-Game-Token"
+
+
+class GameUnavailable(Exception):
+    """No game engine is reachable."""
+
+
+class GameClient:
+    def __init__(self, base_url: str = GAME_ENGINE_URL, timeout: float = GAME_CLIENT_TIMEOUT):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.forwarded = 0
+        self.failed = 0
+        self._http: httpx.AsyncClient | None = None
+
+    async def _call(self, method: str, path: str, **kwargs) -> tuple[int, dict]:
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                headers={INTERNAL_HEADER: internal_token(os.environ.get("TELEGRAM_BOT_TOKEN", ""))},
+            )
+        self.forwarded += 1
+        try:
+            resp = await self._http.request(method, path, **kwargs)
+            body = resp.json()
+        except (httpx.HTTPError, ValueError) as e:
+            self.failed += 1
+            raise GameUnavailable(f"{self.base_url}{path}: {e}") from e
+        if resp.status_code in (403, 503):
+            # Not the engine's process, or not sharing its bot token
+            self.failed += 1
+            raise GameUnavailable(f"{self.base_url}{path}: {body.get('error')}")
+        return resp.status_code, body
+
+    async def lobby(self, stake: int) -> dict | None:
+        """The stake's lobby stats ({"round", "queue_depth", "starts_in", ...}), or None if it has no room."""
+        if game_engine.running:
+            stats = game_engine.lobby_stats().get(stake)
+        else:
+            _, body = await self._call("GET", "/api/game/lobby")
+            stats = body.get("stakes", {}).get(str(stake))
+        return stats if stats and stats.get("round") is not None else None
+
+    async def join(self, stake: int, user_id: int, card: int | None) -> dict:
+        """bots.game.host.join_game in the engine's process; raises its errors, or GameUnavailable."""
+        if game_engine.running:
+            return await join_game(stake, user_id, card)
+        status, body = await self._call("POST", "/api/game/join", json={"stake": stake, "user_id": user_id, "card": card})
+        if status == 409:
+            raise CardTaken(card)
+        if status == 402:
+            raise InsufficientBalance(body.get("error"))
+        if status != 200:
+            raise ValueError(body.get("error"))
+        return body
+
+    async def claim(self, stake: int, user_id: int) -> ClaimResult:
+        if game_engine.running:
+            return await game_engine.claim(user_id, stake)
+        status, body = await self._call("POST", "/api/game/claim", json={"stake": stake, "user_id": user_id})
+        if status != 200:
+            raise ValueError(body.get("error"))
+        return ClaimResult(**{field: body.get(field) for field in ClaimResult._fields})
+
+    async def close(self) -> None:
+        http, self._http = self._http, None
+        if http is not None:
+            await http.aclose()
+
+    def stats(self) -> dict:
+        return {"forwarded": self.forwarded, "failed": self.failed}
+
+
+game_client = GameClient()
@@ -0,0 +1,434 @@
+"""Authoritative bingo rounds, one asyncio loop for every room.
+
+A room hosts one round at a time for a single stake. A round counts down
+while players pick cards, then calls numbers from a 1-75 deck shuffled by
+the round's seed (bots.game.rng) every GAME_CALL_INTERVAL seconds until it
+is won or the deck runs out. Each stake has one lobby room accepting
+players; when its countdown ends and the round starts, the stake's pre-built
+standby room becomes the lobby and the next standby is built right after, so
+joining never waits on allocation. A countdown that ends with fewer than
+GAME_MIN_PLAYERS players starts over. Cards are unique within a round
+(bots.game.lobby.CardPool). Every call is marked on the round's Board
+(bots.game.cards), which records the cards that complete a winning pattern.
+
+All rooms share one scheduler task driven by a heap of deadlines, so ten
+thousand rooms cost one timer, not ten thousand tasks. The lateness of every
+tick is recorded in `engine.jitter` ("tick").
+
+Exactly one process runs the engine (bots.game.host): the ASGI app. Bot
+processes, including every sharded polling worker, forward joins and claims
+to it (bots.game.client), so all players of a stake meet in the same rooms.
+"""
+import asyncio
+import heapq
+import itertools
+import os
+import secrets
+from typing import Callable, NamedTuple
+from bots.game.cards import Board
+from bots.game.lobby import CardPool, LobbyMetrics
+from bots.game.rng import call_order
+from bots.metrics import LatencyStats
+
+# Same stakes as build_stake_selection()
+STAKES = (10, 20, 50)
+GAME_COUNTDOWN_SECONDS = float(os.environ.get("GAME_COUNTDOWN_SECONDS", 20))
+GAME_CALL_INTERVAL = float(os.environ.get("GAME_CALL_INTERVAL", 4.0))
+# Claims arriving within this window of the first one are decided together
+GAME_CLAIM_WINDOW = float(os.environ.get("GAME_CLAIM_WINDOW", 0.2))
+# Share of the stakes kept by the house; the rest is the derash (prize pool)
+GAME_HOUSE_CUT = float(os.environ.get("GAME_HOUSE_CUT", 0.2))
+# "If fewer than 2 players are in when the countdown ends, the game does not start"
+GAME_MIN_PLAYERS = int(os.environ.get("GAME_MIN_PLAYERS", 2))
+DECK_SIZE = 75
+
+COUNTDOWN = "countdown"
+CALLING = "calling"
+FINISHED = "finished"
+
+# Claim outcomes
+WON = "won"
+LATE = "late"            # valid, but another claim won first
+REJECTED = "rejected"    # false claim; the player is out of this round
+NOT_PLAYING = "not_playing"
+
+
+class ClaimResult(NamedTuple):
+    status: str
+    round_id: int | None = None
+    card: int | None = None
+
+
+class Round:
+    __slots__ = (
+        "round_id", "stake", "phase", "players", "deck", "calls", "called_bits",
+        "seed", "starts_at", "started_at", "finished_at", "winners", "board",
+        "claims", "decision", "ejected", "cards", "joined_at",
+    )
+
+    def __init__(self, round_id: int, stake: int, starts_at: float, seed: int | None = None):
+        self.round_id = round_id
+        self.stake = stake
+        self.phase = COUNTDOWN
+        # user_id -> card number, and the free list those cards come from
+        self.players: dict[int, int] = {}
+        self.cards = CardPool()
+        self.joined_at: dict[int, float] = {}
+        self.seed = secrets.randbits(64) if seed is None else seed
+        # The whole call order follows from the seed (bots.game.rng)
+        self.deck = call_order(self.seed, DECK_SIZE)
+        self.calls: list[int] = []
+        # Bit n set once number n has been called
+        self.called_bits = 0
+        self.starts_at = starts_at
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self.winners: list[int] = []
+        # Marked card masks; built from the players' cards when calling starts
+        self.board: Board | None = None
+        # Valid claims awaiting the batch decision: (user_id, card, future)
+        self.claims: list[tuple[int, int, asyncio.Future]] = []
+        self.decision: asyncio.TimerHandle | None = None
+        self.ejected: set[int] = set()
+
+    def draw(self) -> int | None:
+        """Call the next number, or None when all 75 are out."""
+        if len(self.calls) >= DECK_SIZE:
+            return None
+        number = self.deck[len(self.calls)]
+        self.calls.append(number)
+        self.called_bits |= 1 << number
+        return number
+
+    def is_called(self, number: int) -> bool:
+        return bool(self.called_bits >> number & 1)
+
+    def prize_pool(self) -> float:
+        return round(self.stake * len(self.players) * (1 - GAME_HOUSE_CUT), 2)
+
+
+class Room:
+    __slots__ = ("room_id", "stake", "round", "deadline")
+
+    def __init__(self, room_id: int, stake: int, round_: Round):
+        self.room_id = room_id
+        self.stake = stake
+        self.round = round_
+        # When the scheduler next needs to act on this room
+        self.deadline = round_.starts_at
+
+
+# listener(event, room); events: "round_open", "players", "round_start", "call", "round_end"
+Listener = Callable[[str, Room], None]
+
+
+class GameEngine:
+    def __init__(
+        self,
+        countdown: float = GAME_COUNTDOWN_SECONDS,
+        call_interval: float = GAME_CALL_INTERVAL,
+        stakes: tuple[int, ...] = STAKES,
+    ):
+        self.countdown = countdown
+        self.call_interval = call_interval
+        self.stakes = stakes
+        self.rooms: dict[int, Room] = {}
+        self.lobby: dict[int, Room] = {}
+        # Next lobby room per stake, built ahead of time and not yet scheduled
+        self.standby: dict[int, Room] = {}
+        self.min_players = GAME_MIN_PLAYERS
+        self.lobby_metrics = LobbyMetrics()
+        # (user_id, stake) -> room_id of the round the user is playing
+        self.seats: dict[tuple[int, int], int] = {}
+        self.claim_window = min(GAME_CLAIM_WINDOW, call_interval / 2)
+        self.listeners: list[Listener] = []
+        self.jitter = LatencyStats()
+        self.rounds_started = 0
+        self.rounds_finished = 0
+        self.calls = 0
+        self.claims_won = 0
+        self.claims_late = 0
+        self.claims_rejected = 0
+        self._room_ids = itertools.count(1)
+        self._round_ids = itertools.count(1)
+        self._heap: list[tuple[float, int, int]] = []
+        self._seq = itertools.count()
+        self._wakeup: asyncio.Event | None = None
+        self._next_wake = float("inf")
+        self._task: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    # ---- lifecycle ----
+
+    async def start(self, first_round_id: int | None = None) -> None:
+        """Open the stake lobbies and start calling; pass a reserved id block to keep round ids unique."""
+        if self._task is not None:
+            return
+        if first_round_id is not None:
+            self._round_ids = itertools.count(first_round_id)
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        for stake in self.stakes:
+            if stake not in self.lobby:
+                self._open_lobby(stake)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    # ---- rooms and players ----
+
+    def now(self) -> float:
+        return self._loop.time()
+
+    def _build_room(self, stake: int) -> Room:
+        # Deck shuffle and card pool happen here, off the join path
+        round_ = Round(next(self._round_ids), stake, float("inf"))
+        return Room(next(self._room_ids), stake, round_)
+
+    def open_room(self, stake: int, room: Room | None = None) -> Room:
+        """Schedule a room (a new one by default) whose round starts counting down now."""
+        room = room or self._build_room(stake)
+        room.round.starts_at = self.now() + self.countdown
+        self.rooms[room.room_id] = room
+        self._schedule(room, room.round.starts_at)
+        self._emit("round_open", room)
+        return room
+
+    def _open_lobby(self, stake: int) -> Room:
+        room = self.open_room(stake, self.standby.pop(stake, None))
+        self.lobby[stake] = room
+        # Build the following room on the next loop iteration
+        self._loop.call_soon(self._prewarm, stake)
+        return room
+
+    def _prewarm(self, stake: int) -> None:
+        if stake not in self.standby:
+            self.standby[stake] = self._build_room(stake)
+
+    def join(self, stake: int, user_id: int, card: int | None = None) -> Room:
+        """Put the user in the stake's lobby round on `card`, or any free card if None.
+
+        Re-joining switches card. Raises CardTaken if another player holds it.
+        """
+        room = self.lobby.get(stake)
+        if room is None:
+            raise ValueError(f"No room for stake {stake}")
+        round_ = room.round
+        previous = round_.players.get(user_id)
+        if card is None:
+            card = previous if previous is not None else round_.cards.take_any(user_id)
+        elif card != previous:
+            round_.cards.take(card, user_id)
+            if previous is not None:
+                round_.cards.release(previous)
+        round_.players[user_id] = card
+        round_.joined_at.setdefault(user_id, self.now())
+        self._emit("players", room)
+        return room
+
+    def finish(self, room: Room, winners: list[int]) -> None:
+        """End the room's round now (a verified bingo or an empty deck)."""
+        round_ = room.round
+        if round_.phase == FINISHED:
+            return
+        round_.phase = FINISHED
+        round_.finished_at = self.now()
+        round_.winners = winners
+        if round_.decision is not None:
+            round_.decision.cancel()
+            round_.decision = None
+        for user_id, card, future in round_.claims:
+            self.claims_late += 1
+            if not future.done():
+                future.set_result(ClaimResult(LATE, round_.round_id, card))
+        round_.claims = []
+        for user_id in round_.players:
+            if self.seats.get((user_id, room.stake)) == room.room_id:
+                del self.seats[(user_id, room.stake)]
+        self.rounds_finished += 1
+        self._emit("round_end", room)
+        # A finished room is retired; its stake already has (or now gets) a newer lobby room
+        if self.lobby.get(room.stake) is room:
+            self._open_lobby(room.stake)
+        self.rooms.pop(room.room_id, None)
+        room.deadline = float("inf")
+
+    # ---- claims ----
+
+    async def claim(self, user_id: int, stake: int) -> ClaimResult:
+        """Verify a BINGO claim and wait for the batch decision.
+
+        A false claim is rejected at once and the player is out of the round.
+        Valid claims are collected for `claim_window` seconds (and never past
+        the next call); the one whose card completed on the earliest call wins,
+        ties going to the earliest claim, and the rest are LATE.
+        """
+        room = self.rooms.get(self.seats.get((user_id, stake)))
+        if room is None or room.round.phase != CALLING:
+            return ClaimResult(NOT_PLAYING)
+        round_ = room.round
+        card = round_.players.get(user_id)
+        if card is None:
+            return ClaimResult(NOT_PLAYING)
+        if user_id in round_.ejected:
+            return ClaimResult(REJECTED, round_.round_id, card)
+        if not round_.board.is_winner(card):
+            round_.ejected.add(user_id)
+            self.claims_rejected += 1
+            return ClaimResult(REJECTED, round_.round_id, card)
+        future = self._loop.create_future()
+        round_.claims.append((user_id, card, future))
+        if round_.decision is None:
+            round_.decision = self._loop.call_later(self.claim_window, self._decide, room)
+        return await future
+
+    def _decide(self, room: Room) -> None:
+        round_ = room.round
+        round_.decision = None
+        claims, round_.claims = round_.claims, []
+        if not claims or round_.phase != CALLING:
+            return
+        completed = round_.board.completed
+        # min() keeps the first of equal keys, i.e. the earliest claim
+        winner = min(claims, key=lambda c: completed[c[1]])
+        self.finish(room, [winner[0]])
+        for user_id, card, future in claims:
+            won = user_id == winner[0]
+            if won:
+                self.claims_won += 1
+            else:
+                self.claims_late += 1
+            if not future.done():
+                future.set_result(ClaimResult(WON if won else LATE, round_.round_id, card))
+
+    # ---- scheduler ----
+
+    def _schedule(self, room: Room, when: float) -> None:
+        room.deadline = when
+        heapq.heappush(self._heap, (when, next(self._seq), room.room_id))
+        if when < self._next_wake and self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        loop = self._loop
+        heap = self._heap
+        while True:
+            now = loop.time()
+            while heap and heap[0][0] <= now:
+                deadline, _, room_id = heapq.heappop(heap)
+                room = self.rooms.get(room_id)
+                # Skip entries superseded by a reschedule or a finished round
+                if room is None or room.deadline != deadline:
+                    continue
+                self.jitter.record("tick", now - deadline)
+                try:
+                    self._tick(room, now)
+                except Exception as e:
+                    print(f"❌ Game tick failed for room {room_id}: {e}")
+            self._wakeup.clear()
+            handle = None
+            if heap:
+                self._next_wake = heap[0][0]
+                handle = loop.call_at(self._next_wake, self._wakeup.set)
+            else:
+                self._next_wake = float("inf")
+            try:
+                await self._wakeup.wait()
+            finally:
+                if handle is not None:
+                    handle.cancel()
+
+    def _tick(self, room: Room, now: float) -> None:
+        round_ = room.round
+        if round_.phase == COUNTDOWN:
+            if len(round_.players) < self.min_players:
+                # Too few players: keep them and count down again
+                deferred = self.lobby_metrics.starts_deferred
+                deferred[room.stake] = deferred.get(room.stake, 0) + 1
+                round_.starts_at = now + self.countdown
+                self._schedule(room, round_.starts_at)
+                return
+            self._start_round(room, now)
+        if round_.phase == CALLING:
+            if round_.decision is not None:
+                # Claims made on the previous call are settled before the next one
+                round_.decision.cancel()
+                self._decide(room)
+                if round_.phase != CALLING:
+                    return
+            number = round_.draw()
+            if number is None:
+                self.finish(room, [])
+                return
+            self.calls += 1
+            round_.board.mark(number, len(round_.calls))
+            self._emit("call", room)
+            # Keep a fixed cadence from the previous deadline; skip, don't burst, after a stall
+            next_at = room.deadline + self.call_interval
+            self._schedule(room, next_at if next_at > now else now + self.call_interval)
+
+    def _start_round(self, room: Room, now: float) -> None:
+        round_ = room.round
+        round_.phase = CALLING
+        round_.started_at = now
+        round_.board = Board(round_.players.values())
+        for user_id in round_.players:
+            self.seats[(user_id, room.stake)] = room.room_id
+        self.rounds_started += 1
+        started = self.lobby_metrics.rounds_started
+        started[room.stake] = started.get(room.stake, 0) + 1
+        for joined in round_.joined_at.values():
+            self.lobby_metrics.time_to_start.record(f"stake:{room.stake}", now - joined)
+        if self.lobby.get(room.stake) is room:
+            self._open_lobby(room.stake)
+        self._emit("round_start", room)
+
+    def _emit(self, event: str, room: Room) -> None:
+        for listener in self.listeners:
+            try:
+                listener(event, room)
+            except Exception as e:
+                print(f"❌ Game listener failed on {event}: {e}")
+
+    def lobby_stats(self) -> dict:
+        """Per stake: players waiting in the lobby, rounds started/deferred, time-to-start percentiles."""
+        waits = self.lobby_metrics.time_to_start.snapshot()
+        result = {}
+        for stake in sorted(set(self.lobby) | set(self.lobby_metrics.rounds_started)):
+            room = self.lobby.get(stake)
+            result[stake] = {
+                "round": room.round.round_id if room else None,
+                "queue_depth": len(room.round.players) if room else 0,
+                "starts_in": max(0.0, round(room.round.starts_at - self.now(), 1)) if room else None,
+                "standby_ready": stake in self.standby,
+                "rounds_started": self.lobby_metrics.rounds_started.get(stake, 0),
+                "starts_deferred": self.lobby_metrics.starts_deferred.get(stake, 0),
+                "time_to_start": waits.get(f"stake:{stake}", {}),
+            }
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "rooms": len(self.rooms),
+            "rounds_started": self.rounds_started,
+            "rounds_finished": self.rounds_finished,
+            "calls": self.calls,
+            "claims_won": self.claims_won,
+            "claims_late": self.claims_late,
+            "claims_rejected": self.claims_rejected,
+        }
+
+
+engine = GameEngine()
@@ -0,0 +1,322 @@
+"""Append-only round history: a segmented binary log plus a small SQLite index.
+
+Every finished round is appended as one framed record to the current segment
+file under GAME_LOG_DIR (segment-000001.log, ...). A new segment is started
+once the current one reaches GAME_LOG_SEGMENT_BYTES. Record layout, little
+endian:
+
+    u32 payload length | payload | u32 crc32(payload)
+
+    payload: u64 round_id, u32 stake, u64 seed, f64 finished_at (unix),
+             u8 calls made, u16 players, u8 winners,
+             75 x u8 call order (the whole deck; redundant with the seed
+             and kept as a cross-check),
+             players x (u64 user_id, u16 card), winners x u64 user_id
+
+A 100-player round is about 1.1 KB. Appends take an exclusive lock on the
+segment (flock, or msvcrt on Windows), so shard workers can share the directory. Writes are not fsynced:
+a process crash loses nothing, a power cut may lose the last records.
+
+The index (game_rounds, game_players) points at each record and holds what
+/game shows, so a user's last rounds are an index range read. `replay()`
+re-derives a record's calls from its seed and re-checks every card against
+them for dispute resolution.
+"""
+import asyncio
+import os
+import re
+import struct
+import time
+import zlib
+from pathlib import Path
+from typing import Iterator, NamedTuple
+from bots.db import DB_FILE, connection, run_write
+from bots.game.cards import win_lines
+from bots.game.engine import DECK_SIZE, GameEngine, Room, engine as game_engine
+from bots.game.rng import call_order
+
+GAME_LOG_DIR = Path(os.environ.get("GAME_LOG_DIR") or Path(DB_FILE).parent / "game_log")
+GAME_LOG_SEGMENT_BYTES = int(os.environ.get("GAME_LOG_SEGMENT_BYTES", 64 * 1024 * 1024))
+
+_FRAME = struct.Struct("<I")
+_HEADER = struct.Struct("<QIQdBHB")
+_PLAYER = struct.Struct("<QH")
+_WINNER = struct.Struct("<Q")
+_SEGMENT_NAME = re.compile(r"segment-(\d{6})\.log$")
+
+
+class RoundRecord(NamedTuple):
+    round_id: int
+    stake: int
+    seed: int
+    finished_at: float
+    deck: bytes             # full call order; the first `calls_made` were called
+    calls_made: int
+    players: dict[int, int]  # user_id -> card
+    winners: list[int]
+
+    @property
+    def calls(self) -> list[int]:
+        return list(self.deck[:self.calls_made])
+
+    @classmethod
+    def from_room(cls, room: Room) -> "RoundRecord":
+        round_ = room.round
+        return cls(
+            round_.round_id, int(round_.stake), round_.seed, time.time(), bytes(round_.deck),
+            len(round_.calls), dict(round_.players), list(round_.winners),
+        )
+
+
+def encode(record: RoundRecord) -> bytes:
+    parts = [
+        _HEADER.pack(
+            record.round_id, record.stake, record.seed, record.finished_at,
+            record.calls_made, len(record.players), len(record.winners),
+        ),
+        record.deck,
+    ]
+    parts.extend(_PLAYER.pack(user_id, card) for user_id, card in record.players.items())
+    parts.extend(_WINNER.pack(user_id) for user_id in record.winners)
+    payload = b"".join(parts)
+    return _FRAME.pack(len(payload)) + payload + _FRAME.pack(zlib.crc32(payload))
+
+
+def decode(payload: bytes) -> RoundRecord:
+    round_id, stake, seed, finished_at, calls_made, players, winners = _HEADER.unpack_from(payload)
+    pos = _HEADER.size
+    deck = payload[pos:pos + DECK_SIZE]
+    pos += DECK_SIZE
+    seats = {}
+    for _ in range(players):
+        user_id, card = _PLAYER.unpack_from(payload, pos)
+        seats[user_id] = card
+        pos += _PLAYER.size
+    won = [_WINNER.unpack_from(payload, pos + i * _WINNER.size)[0] for i in range(winners)]
+    return RoundRecord(round_id, stake, seed, finished_at, deck, calls_made, seats, won)
+
+
+def _lock_exclusive(fd: int) -> None:
+    # Held until the descriptor is closed
+    if os.name == "nt":
+        import msvcrt
+        msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(fd, fcntl.LOCK_EX)
+
+
+class GameLog:
+    """Segmented append-only record files."""
+
+    def __init__(self, directory: Path = GAME_LOG_DIR, segment_bytes: int = GAME_LOG_SEGMENT_BYTES):
+        self.directory = Path(directory)
+        self.segment_bytes = segment_bytes
+        self._segment: int | None = None
+
+    def path(self, segment: int) -> Path:
+        return self.directory / f"segment-{segment:06d}.log"
+
+    def segments(self) -> list[int]:
+        if not self.directory.exists():
+            return []
+        return sorted(int(m.group(1)) for m in map(_SEGMENT_NAME.match, os.listdir(self.directory)) if m)
+
+    def append(self, data: bytes) -> tuple[int, int]:
+        """Append one encoded record; return (segment, offset)."""
+        if self._segment is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._segment = (self.segments() or [1])[-1]
+        while True:
+            fd = os.open(self.path(self._segment), os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o644)
+            try:
+                _lock_exclusive(fd)
+                offset = os.fstat(fd).st_size
+                # Another writer may have filled this segment since we last looked
+                if offset < self.segment_bytes:
+                    os.write(fd, data)
+                    return self._segment, offset
+            finally:
+                os.close(fd)
+            self._segment += 1
+
+    def read(self, segment: int, offset: int) -> RoundRecord:
+        with open(self.path(segment), "rb") as f:
+            f.seek(offset)
+            (length,) = _FRAME.unpack(f.read(_FRAME.size))
+            payload = f.read(length)
+            (crc,) = _FRAME.unpack(f.read(_FRAME.size))
+        if zlib.crc32(payload) != crc:
+            raise ValueError(f"Corrupt record at segment {segment} offset {offset}")
+        return decode(payload)
+
+    def scan(self, segment: int) -> Iterator[tuple[int, RoundRecord]]:
+        """(offset, record) for every intact record of a segment; stops at a torn tail."""
+        with open(self.path(segment), "rb") as f:
+            data = f.read()
+        pos = 0
+        while pos + _FRAME.size <= len(data):
+            (length,) = _FRAME.unpack_from(data, pos)
+            end = pos + _FRAME.size + length
+            if end + _FRAME.size > len(data):
+                return
+            payload = data[pos + _FRAME.size:end]
+            if zlib.crc32(payload) != _FRAME.unpack_from(data, end)[0]:
+                return
+            yield pos, decode(payload)
+            pos = end + _FRAME.size
+
+
+def index_record(cur, record: RoundRecord, segment: int, offset: int) -> None:
+    winners = set(record.winners)
+    cur.execute(
+        """
+        INSERT OR REPLACE INTO game_rounds (round_id, stake, players, calls, winners, segment, offset, finished_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (record.round_id, record.stake, len(record.players), record.calls_made, len(record.winners),
+         segment, offset, record.finished_at),
+    )
+    cur.executemany(
+        "INSERT OR REPLACE INTO game_players (user_id, round_id, card, won) VALUES (?, ?, ?, ?)",
+        [(user_id, record.round_id, card, int(user_id in winners)) for user_id, card in record.players.items()],
+    )
+
+
+def append_round(log: GameLog, record: RoundRecord) -> None:
+    segment, offset = log.append(encode(record))
+    with connection() as conn:
+        cur = conn.cursor()
+        index_record(cur, record, segment, offset)
+        conn.commit()
+
+
+def reindex(log: GameLog) -> int:
+    """Rebuild the index from the segment files; returns the number of records."""
+    count = 0
+    with connection() as conn:
+        cur = conn.cursor()
+        for segment in log.segments():
+            for offset, record in log.scan(segment):
+                index_record(cur, record, segment, offset)
+                count += 1
+            conn.commit()
+    return count
+
+
+def recent_rounds(user_id: int, limit: int = 10) -> list[tuple]:
+    """(round_id, stake, card, won, calls, players, finished_at) of the user's last rounds, newest first."""
+    with connection() as conn:
+        return conn.execute(
+            """
+            SELECT p.round_id, r.stake, p.card, p.won, r.calls, r.players, r.finished_at
+            FROM game_players p JOIN game_rounds r ON r.round_id = p.round_id
+            WHERE p.user_id = ?
+            ORDER BY p.round_id DESC
+            LIMIT ?
+            """,
+            (user_id, limit),
+        ).fetchall()
+
+
+def segments_for(round_from: int, round_to: int) -> list[int]:
+    """Segments holding any round in the id range, from the index."""
+    with connection() as conn:
+        rows = conn.execute(
+            "SELECT DISTINCT segment FROM game_rounds WHERE round_id BETWEEN ? AND ? ORDER BY segment",
+            (round_from, round_to),
+        ).fetchall()
+    return [row[0] for row in rows]
+
+
+def load_round(log: GameLog, round_id: int) -> RoundRecord | None:
+    with connection() as conn:
+        row = conn.execute("SELECT segment, offset FROM game_rounds WHERE round_id = ?", (round_id,)).fetchone()
+    if row is None:
+        return None
+    return log.read(row[0], row[1])
+
+
+class Replay(NamedTuple):
+    seed_matches: bool         # the seed reproduces the logged call order
+    completed: dict[int, int]  # card -> call number on which it first had a pattern
+    first_call: int | None     # earliest call on which any card could claim
+    valid_winners: list[int]   # recorded winners whose card had a pattern by the last call
+    invalid_winners: list[int]
+
+
+def _call_positions(deck: bytes, calls_made: int) -> list[int]:
+    """Call number of every number; uncalled numbers sort after the last call."""
+    position = [DECK_SIZE + 1] * (DECK_SIZE + 1)
+    for call_no, number in enumerate(deck[:calls_made], 1):
+        position[number] = call_no
+    return position
+
+
+def _completion_call(card: int, position: list[int]) -> int:
+    # A pattern completes on its last number's call; a card on its first pattern
+    return min(max(map(position.__getitem__, line)) for line in win_lines()[card - 1])
+
+
+def replay(record: RoundRecord) -> Replay:
+    """Re-derive the calls from the seed and find the call on which each card first had a pattern."""
+    deck = call_order(record.seed, DECK_SIZE)
+    position = _call_positions(deck, record.calls_made)
+    completed = {}
+    for card in set(record.players.values()):
+        first = _completion_call(card, position)
+        if first <= record.calls_made:
+            completed[card] = first
+    valid = [u for u in record.winners if record.players.get(u) in completed]
+    invalid = [u for u in record.winners if u not in valid]
+    return Replay(deck == record.deck, completed, min(completed.values(), default=None), valid, invalid)
+
+
+def verify(record: RoundRecord) -> list[str]:
+    """What is wrong with a logged round, checking only the winners' cards (bulk audits)."""
+    deck = call_order(record.seed, DECK_SIZE)
+    problems = [] if deck == record.deck else ["call order does not match the seed"]
+    position = _call_positions(deck, record.calls_made)
+    for user_id in record.winners:
+        card = record.players.get(user_id)
+        if card is None:
+            problems.append(f"winner {user_id} was not playing")
+        elif _completion_call(card, position) > record.calls_made:
+            problems.append(f"winner {user_id} has no winning pattern")
+    return problems
+
+
+class GameRecorder:
+    """Appends every round the engine finishes to the log and its index."""
+
+    def __init__(self, engine: GameEngine, log: GameLog | None = None):
+        self.log = log or GameLog()
+        self.recorded = 0
+        self.failed = 0
+        self._tasks: set[asyncio.Task] = set()
+        engine.listeners.append(self.on_event)
+
+    def on_event(self, event: str, room: Room) -> None:
+        if event != "round_end":
+            return
+        task = asyncio.get_running_loop().create_task(self.record(RoundRecord.from_room(room)))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def record(self, record: RoundRecord) -> None:
+        try:
+            await run_write(append_round, self.log, record)
+            self.recorded += 1
+        except Exception as e:
+            self.failed += 1
+            print(f"❌ Game log append failed for round {record.round_id}: {e}")
+
+    async def drain(self) -> None:
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {"recorded": self.recorded, "failed": self.failed}
+
+
+recorder = GameRecorder(game_engine)
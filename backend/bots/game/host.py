@@ -0,0 +1,131 @@
+"""Run the game engine in exactly one process: the ASGI app (core.asgi).
+
+Rooms only work if every player of a stake meets in the same engine, so the
+engine is started from the ASGI lifespan in every update mode, and only by the
+process holding the GAME_ENGINE_LOCK file lock. Bot processes (polling,
+sharded workers) hold no engine; they reach it over HTTP (bots.game.client).
+Serve core.asgi with a single worker: any other worker finds the lock taken,
+runs no engine and answers the game endpoints with 503.
+"""
+import os
+from pathlib import Path
+from bots.db import DB_FILE, run_write
+from bots.game.engine import engine as game_engine
+from bots.game.history import recorder as game_recorder
+from bots.game.lobby import InsufficientBalance
+from bots.game.settlement import (
+    hold_stake,
+    refund_open_holds,
+    release_stake,
+    reserve_round_ids,
+    settle_saved_rounds,
+    settler as round_settler,
+)
+
+GAME_ENGINE_LOCK = Path(os.environ.get("GAME_ENGINE_LOCK") or Path(DB_FILE).parent / "game_engine.lock")
+
+_lock_file = None
+
+
+def _acquire_lock() -> bool:
+    global _lock_file
+    if _lock_file is not None:
+        return True
+    file = open(GAME_ENGINE_LOCK, "a+b")
+    try:
+        if os.name == "nt":
+            import msvcrt
+            msvcrt.locking(file.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        file.close()
+        return False
+    _lock_file = file
+    return True
+
+
+def _release_lock() -> None:
+    global _lock_file
+    file, _lock_file = _lock_file, None
+    if file is not None:
+        # Closing the file drops the lock
+        file.close()
+
+
+async def start_game_engine() -> bool:
+    """Start the engine in this process unless another process already hosts it."""
+    if game_engine.running:
+        return True
+    if not _acquire_lock():
+        print(f"❌ Game engine not started: another process holds {GAME_ENGINE_LOCK}; /api/game/* answers 503 here")
+        return False
+    try:
+        # Finished rounds whose settlement failed are paid first, so the refund below keeps their holds
+        settled, failed = await run_write(settle_saved_rounds)
+        if settled or failed:
+            print(f"🧾 Settled {settled} saved rounds, {failed} still failing")
+        # Rounds of a previous run can no longer finish; their players get their stakes back
+        refunded = await run_write(refund_open_holds)
+        if refunded:
+            print(f"↩️ Refunded {refunded} stakes held by unfinished rounds")
+        first_round_id = await run_write(reserve_round_ids)
+    except Exception as e:
+        print(f"❌ Game engine not started: {e}")
+        _release_lock()
+        return False
+    await game_engine.start(first_round_id)
+    print("🎲 Game engine started")
+    return True
+
+
+async def stop_game_engine() -> None:
+    """Stop calling, let settlements and log writes of finished rounds complete, release the lock."""
+    if not game_engine.running:
+        return
+    await game_engine.stop()
+    await round_settler.drain()
+    await game_recorder.drain()
+    _release_lock()
+    print(f"🧾 Round settlement: {round_settler.stats()}")
+    print(f"📼 Game log: {game_recorder.stats()}")
+    for stake, stats in game_engine.lobby_stats().items():
+        print(f"🎲 Lobby {stake} ETB: {stats}")
+
+
+async def join_game(stake: int, user_id: int, card: int | None) -> dict:
+    """Seat the user on `card` in the stake's lobby round: {"round", "card", "starts_in", "players"}.
+
+    A newcomer's stake is debited first (hold_stake). Raises InsufficientBalance
+    if the balance does not cover it, CardTaken if another player holds the
+    card, ValueError if there is no such stake or card.
+    """
+    for _ in range(2):
+        room = game_engine.lobby.get(stake)
+        if room is None:
+            raise ValueError(f"No room for stake {stake}")
+        round_id = room.round.round_id
+        if user_id in room.round.players:
+            break
+        if not await run_write(hold_stake, user_id, stake, round_id):
+            raise InsufficientBalance(f"Balance below the {stake} ETB stake")
+        if game_engine.lobby.get(stake) is room:
+            break
+        # The round started while the stake was being held: hold it for the next lobby round instead
+        await run_write(release_stake, user_id, round_id)
+    else:
+        raise ValueError("The round has just started")
+    try:
+        room = game_engine.join(stake, user_id, card)
+    except ValueError:
+        if user_id not in room.round.players:
+            await run_write(release_stake, user_id, round_id)
+        raise
+    round_ = room.round
+    return {
+        "round": round_.round_id,
+        "card": round_.players[user_id],
+        "starts_in": max(0.0, round(round_.starts_at - game_engine.now(), 1)),
+        "players": len(round_.players),
+    }
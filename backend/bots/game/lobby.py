@@ -0,0 +1,76 @@
+"""Per-round card allocation and per-stake lobby metrics."""
+import random
+from bots.game.cards import card_set
+from bots.metrics import LatencyStats
+
+
+class CardTaken(ValueError):
+    pass
+
+
+class InsufficientBalance(ValueError):
+    """The player's balance does not cover the stake."""
+
+
+class CardPool:
+    """Unique card numbers 1..N for one round with O(1) take, take-any and release.
+
+    `_free` holds the unassigned cards and `_pos` each one's index in it, so a
+    specific card is removed by swapping it with the last entry and popping.
+    """
+
+    __slots__ = ("_free", "_pos", "owners")
+
+    def __init__(self, count: int | None = None, shuffle: bool = True):
+        free = list(range(1, (count or len(card_set())) + 1))
+        if shuffle:
+            # take_any() then hands out random cards
+            random.shuffle(free)
+        self._free = free
+        self._pos = {card: i for i, card in enumerate(free)}
+        # card -> user_id
+        self.owners: dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._free)
+
+    def _remove(self, card: int) -> None:
+        i = self._pos.pop(card)
+        last = self._free.pop()
+        if last != card:
+            self._free[i] = last
+            self._pos[last] = i
+
+    def take(self, card: int, user_id: int) -> None:
+        if card not in self._pos:
+            if self.owners.get(card) == user_id:
+                return
+            if card in self.owners:
+                raise CardTaken(f"Card {card} is taken")
+            raise ValueError(f"No such card: {card}")
+        self._remove(card)
+        self.owners[card] = user_id
+
+    def take_any(self, user_id: int) -> int:
+        if not self._free:
+            raise CardTaken("No cards left")
+        card = self._free.pop()
+        del self._pos[card]
+        self.owners[card] = user_id
+        return card
+
+    def release(self, card: int) -> None:
+        if self.owners.pop(card, None) is not None:
+            self._pos[card] = len(self._free)
+            self._free.append(card)
+
+
+class LobbyMetrics:
+    """Queue depth is read live from the lobby; this keeps the per-stake history."""
+
+    def __init__(self):
+        # "stake:<n>" -> seconds from joining to the round's start
+        self.time_to_start = LatencyStats()
+        self.rounds_started: dict[int, int] = {}
+        # Countdowns that ended with too few players
+        self.starts_deferred: dict[int, int] = {}
@@ -0,0 +1,24 @@
+"""Per-round call order derived from a single 64-bit seed.
+
+A round stores only its seed; `call_order(seed)` reproduces all 75 calls
+in order in under 0.1 ms, so audits and replays never need the call events.
+The generator is SplitMix64 driving a Fisher-Yates shuffle, with bounded
+draws taken by multiply-shift (the bias is below 2**-57). Do not change
+the algorithm: every recorded seed depends on it.
+"""
+_MASK = (1 << 64) - 1
+_GAMMA = 0x9E3779B97F4A7C15
+
+
+def call_order(seed: int, size: int = 75) -> bytes:
+    """The shuffled numbers 1..size for a seed, in call order."""
+    deck = bytearray(range(1, size + 1))
+    state = seed & _MASK
+    for i in range(size - 1, 0, -1):
+        # One SplitMix64 step, then a draw in [0, i]
+        state = (state + _GAMMA) & _MASK
+        z = ((state ^ (state >> 30)) * 0xBF58476D1CE4E5B9) & _MASK
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK
+        j = ((z ^ (z >> 31)) * (i + 1)) >> 64
+        deck[i], deck[j] = deck[j], deck[i]
+    return bytes(deck)
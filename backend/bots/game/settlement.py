@@ -0,0 +1,304 @@
+"""Stakes held at join, and settling a finished round in one transaction.
+
+A player's stake is debited when they join a round (hold_stake), with a
+conditional UPDATE that never takes the balance below zero, and recorded in
+`stake_holds`. So one balance cannot be committed to several rounds or stakes
+at once.
+
+For a round with a winner: the prize pool is split between the winners and
+every player earns GAME_PLAY_COINS (winners GAME_WIN_COINS on top). Each
+player's net result (-stake + share) goes into the `round_entries` ledger;
+the balance only receives the share, since the stake left it at join. All of
+that is written with executemany, together with the round's `settlements`
+row and the release of its holds, inside a single IMMEDIATE transaction. A
+player seated without a hold is charged at settlement, but never below zero.
+
+The `settlements` primary key is the round id: a retried settlement finds the
+row already there and changes nothing. A round that ended without a winner is
+void: it is recorded and its held stakes are refunded. An outcome that still
+fails after SETTLE_ATTEMPTS is kept in `unsettled_rounds` with its holds, and
+settled again before the engine next starts (settle_saved_rounds).
+"""
+import asyncio
+import json
+import os
+from typing import NamedTuple
+from bots.db import connection, run_write
+from bots.game.engine import GameEngine, Room, engine as game_engine
+from bots.leaderboard import DISPLAY_NAME, leaderboard
+from bots.periods import record_period_coins
+from bots.profile import invalidate_profile, publish_profile_changes
+
+GAME_PLAY_COINS = float(os.environ.get("GAME_PLAY_COINS", 0.1))
+GAME_WIN_COINS = float(os.environ.get("GAME_WIN_COINS", 1.0))
+ROUND_ID_BLOCK = 1_000_000
+SETTLE_ATTEMPTS = 3
+
+
+class RoundOutcome(NamedTuple):
+    round_id: int
+    stake: float
+    players: dict[int, int]   # user_id -> card
+    winners: list[int]
+    prize_pool: float
+
+    @classmethod
+    def from_room(cls, room: Room) -> "RoundOutcome":
+        round_ = room.round
+        return cls(round_.round_id, float(round_.stake), dict(round_.players), list(round_.winners), round_.prize_pool())
+
+
+def reserve_round_ids() -> int:
+    """First id of a fresh block of ROUND_ID_BLOCK round ids for this process."""
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute("INSERT INTO round_id_blocks DEFAULT VALUES")
+        conn.commit()
+        return cur.lastrowid * ROUND_ID_BLOCK + 1
+
+
+def hold_stake(user_id: int, stake: float, round_id: int) -> bool:
+    """Debit the stake for the round unless already held; False if the balance does not cover it."""
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute("BEGIN IMMEDIATE")
+        try:
+            cur.execute(
+                "INSERT OR IGNORE INTO stake_holds (round_id, user_id, stake) VALUES (?, ?, ?)",
+                (round_id, user_id, float(stake)),
+            )
+            if cur.rowcount == 0:
+                conn.commit()
+                return True
+            cur.execute(
+                "UPDATE users SET balance_etb = balance_etb - ? WHERE user_id = ? AND balance_etb >= ?",
+                (float(stake), user_id, float(stake)),
+            )
+            if cur.rowcount == 0:
+                conn.rollback()
+                return False
+            publish_profile_changes(cur, [user_id])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    invalidate_profile(user_id)
+    return True
+
+
+def release_stake(user_id: int, round_id: int) -> None:
+    """Refund a held stake (the join failed, or the round started while it was being held)."""
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute("BEGIN IMMEDIATE")
+        try:
+            row = cur.execute(
+                "DELETE FROM stake_holds WHERE round_id = ? AND user_id = ? RETURNING stake", (round_id, user_id)
+            ).fetchone()
+            if row is not None:
+                cur.execute("UPDATE users SET balance_etb = COALESCE(balance_etb, 0) + ? WHERE user_id = ?", (row[0], user_id))
+                publish_profile_changes(cur, [user_id])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    invalidate_profile(user_id)
+
+
+def refund_open_holds() -> int:
+    """Refund every unsettled hold; run before the engine starts, when no round of the previous run can finish.
+
+    Holds of a saved outcome (unsettled_rounds) are kept: that round did finish.
+    """
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute("BEGIN IMMEDIATE")
+        try:
+            holds = cur.execute(
+                "DELETE FROM stake_holds WHERE round_id NOT IN (SELECT round_id FROM unsettled_rounds) RETURNING user_id, stake"
+            ).fetchall()
+            cur.executemany(
+                "UPDATE users SET balance_etb = COALESCE(balance_etb, 0) + ? WHERE user_id = ?",
+                [(stake, user_id) for user_id, stake in holds],
+            )
+            publish_profile_changes(cur, [user_id for user_id, _ in holds])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    for user_id, _ in holds:
+        invalidate_profile(user_id)
+    return len(holds)
+
+
+def entries_for(outcome: RoundOutcome) -> list[tuple[int, int, float, float]]:
+    """(user_id, card, etb_delta, coins) per player; empty for a void round."""
+    if not outcome.winners:
+        return []
+    share = round(outcome.prize_pool / len(outcome.winners), 2)
+    winners = set(outcome.winners)
+    entries = []
+    for user_id, card in outcome.players.items():
+        won = user_id in winners
+        delta = -outcome.stake + (share if won else 0.0)
+        coins = GAME_PLAY_COINS + (GAME_WIN_COINS if won else 0.0)
+        entries.append((user_id, card, round(delta, 2), coins))
+    return entries
+
+
+def settle_round(outcome: RoundOutcome) -> bool:
+    """Apply the round's balance and coin changes once; False if it was already settled."""
+    entries = entries_for(outcome)
+    refunds = []
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute("BEGIN IMMEDIATE")
+        try:
+            cur.execute(
+                "INSERT OR IGNORE INTO settlements (round_id, stake, players, prize_pool, winners) VALUES (?, ?, ?, ?, ?)",
+                (outcome.round_id, outcome.stake, len(outcome.players), outcome.prize_pool, json.dumps(outcome.winners)),
+            )
+            if cur.rowcount == 0:
+                conn.rollback()
+                return False
+            held = dict(cur.execute(
+                "DELETE FROM stake_holds WHERE round_id = ? RETURNING user_id, stake", (outcome.round_id,)
+            ).fetchall())
+            # Holds of a void round, or of anyone no longer seated, go back
+            refunds = [(stake, user_id) for user_id, stake in held.items() if not entries or user_id not in outcome.players]
+            cur.executemany("UPDATE users SET balance_etb = COALESCE(balance_etb, 0) + ? WHERE user_id = ?", refunds)
+            publish_profile_changes(cur, [user_id for _, user_id in refunds])
+            if entries:
+                cur.executemany(
+                    "INSERT OR IGNORE INTO users (user_id, created_at, balance_etb, coin) VALUES (?, datetime('now'), 0.0, 0.0)",
+                    [(user_id,) for user_id, _, _, _ in entries],
+                )
+                unheld = [user_id for user_id, _, _, _ in entries if user_id not in held]
+                balances = dict(cur.execute(
+                    "SELECT user_id, COALESCE(balance_etb, 0) FROM users WHERE user_id IN (SELECT value FROM json_each(?))",
+                    (json.dumps(unheld),),
+                ).fetchall()) if unheld else {}
+                applied = []
+                for user_id, card, delta, coins in entries:
+                    if user_id in held:
+                        # The stake already left the balance at join
+                        credit = delta + held[user_id]
+                    else:
+                        # Seated without a hold: charge the stake, but never below zero
+                        delta = credit = max(delta, -balances.get(user_id, 0.0))
+                    applied.append((user_id, card, delta, coins, credit))
+                cur.executemany(
+                    """
+                    UPDATE users
+                    SET balance_etb = COALESCE(balance_etb, 0) + ?, coin = COALESCE(coin, 0) + ?
+                    WHERE user_id = ?
+                    """,
+                    [(credit, coins, user_id) for user_id, _, _, coins, credit in applied],
+                )
+                entries = [entry[:4] for entry in applied]
+                cur.executemany(
+                    "INSERT INTO round_entries (round_id, user_id, card, etb_delta, coins) VALUES (?, ?, ?, ?, ?)",
+                    [(outcome.round_id, user_id, card, delta, coins) for user_id, card, delta, coins in entries],
+                )
+                record_period_coins(cur, [(user_id, coins) for user_id, _, _, coins in entries])
+                publish_profile_changes(cur, [user_id for user_id, _, _, _ in entries])
+                # New coin totals for the leaderboard, read inside the same transaction
+                totals = cur.execute(
+                    f"SELECT user_id, coin, {DISPLAY_NAME} FROM users WHERE user_id IN (SELECT value FROM json_each(?))",
+                    (json.dumps([user_id for user_id, _, _, _ in entries]),),
+                ).fetchall()
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    for user_id, _, _, _ in entries:
+        invalidate_profile(user_id)
+    for _, user_id in refunds:
+        invalidate_profile(user_id)
+    if entries:
+        leaderboard.update_many(totals)
+    return True
+
+
+def save_outcome(outcome: RoundOutcome) -> None:
+    """Keep an outcome that could not be settled, for settle_saved_rounds()."""
+    with connection() as conn:
+        conn.execute(
+            "INSERT OR IGNORE INTO unsettled_rounds (round_id, stake, players, winners, prize_pool) VALUES (?, ?, ?, ?, ?)",
+            (outcome.round_id, outcome.stake, json.dumps(outcome.players), json.dumps(outcome.winners), outcome.prize_pool),
+        )
+        conn.commit()
+
+
+def settle_saved_rounds() -> tuple[int, int]:
+    """Settle the saved outcomes; (settled, still failing). Run before refund_open_holds()."""
+    with connection() as conn:
+        rows = conn.execute(
+            "SELECT round_id, stake, players, winners, prize_pool FROM unsettled_rounds ORDER BY round_id"
+        ).fetchall()
+    settled = failed = 0
+    for round_id, stake, players, winners, prize_pool in rows:
+        outcome = RoundOutcome(
+            round_id, stake, {int(user_id): card for user_id, card in json.loads(players).items()}, json.loads(winners), prize_pool
+        )
+        try:
+            settle_round(outcome)
+        except Exception as e:
+            print(f"❌ Saved settlement of round {round_id} failed: {e}")
+            failed += 1
+            continue
+        # Already settled (False above) counts too: the row has done its job
+        with connection() as conn:
+            conn.execute("DELETE FROM unsettled_rounds WHERE round_id = ?", (round_id,))
+            conn.commit()
+        settled += 1
+    return settled, failed
+
+
+class RoundSettler:
+    """Settles every round the engine finishes, retrying failed writes."""
+
+    def __init__(self, engine: GameEngine):
+        self.settled = 0
+        self.duplicates = 0
+        self.failed = 0
+        self._tasks: set[asyncio.Task] = set()
+        engine.listeners.append(self.on_event)
+
+    def on_event(self, event: str, room: Room) -> None:
+        if event != "round_end":
+            return
+        task = asyncio.get_running_loop().create_task(self.settle(RoundOutcome.from_room(room)))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def settle(self, outcome: RoundOutcome) -> None:
+        for attempt in range(1, SETTLE_ATTEMPTS + 1):
+            try:
+                if await run_write(settle_round, outcome):
+                    self.settled += 1
+                else:
+                    self.duplicates += 1
+                return
+            except Exception as e:
+                print(f"⚠️ Settlement of round {outcome.round_id} failed (attempt {attempt}/{SETTLE_ATTEMPTS}): {e}")
+                if attempt < SETTLE_ATTEMPTS:
+                    await asyncio.sleep(attempt)
+        self.failed += 1
+        try:
+            await run_write(save_outcome, outcome)
+        except Exception as e:
+            print(f"❌ Round {outcome.round_id} unsettled and not saved: {e}")
+            return
+        print(f"❌ Round {outcome.round_id} unsettled; saved to settle before the engine next starts")
+
+    async def drain(self) -> None:
+        """Wait for in-flight settlements (shutdown)."""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {"settled": self.settled, "duplicates": self.duplicates, "failed": self.failed}
+
+
+settler = RoundSettler(game_engine)
@@ -0,0 +1,186 @@
+"""Server-Sent Events push of room state: GET /api/game/events?stake=10 (or ?room=<id>).
+
+Every engine event is serialized once per room into an SSE frame (bytes) and
+the same object is queued to every subscriber of that room, so the per-client
+cost of a call is one put_nowait. Player-count changes are coalesced to at
+most one frame per PLAYERS_THROTTLE seconds per room.
+
+Frames (event: data JSON):
+  state        full snapshot, sent first on every connection
+  players      {"players", "prize_pool"}
+  round_start  {"players", "prize_pool"}
+  call         {"number", "count"}
+  round_end    {"winners", "prize_pool"}; the stream then closes and the
+               client's EventSource reconnects to the stake's next round
+
+Served by core.asgi, which hosts the engine in every update mode
+(bots.game.host); elsewhere the view answers 503 and the Play screen shows an
+error rather than a made-up round.
+"""
+import asyncio
+import json
+import os
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from bots.game.engine import CALLING, COUNTDOWN, GameEngine, Room, engine as game_engine
+
+SSE_QUEUE_SIZE = int(os.environ.get("SSE_QUEUE_SIZE", 64))
+SSE_HEARTBEAT = float(os.environ.get("SSE_HEARTBEAT", 15.0))
+PLAYERS_THROTTLE = 0.5
+
+# Queued after round_end to end the stream
+_CLOSE = None
+_PING = b": ping\n\n"
+
+
+def sse_frame(event: str, payload: dict) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(payload, separators=(',', ':'))}\n\n".encode()
+
+
+class Subscriber:
+    __slots__ = ("queue", "dropped")
+
+    def __init__(self, size: int = SSE_QUEUE_SIZE):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=size)
+        self.dropped = False
+
+
+class RoomBroadcaster:
+    """Fans engine events out to per-room subscriber queues."""
+
+    def __init__(self, engine: GameEngine):
+        self.engine = engine
+        self.subscribers: dict[int, set[Subscriber]] = {}
+        self._players_pending: set[int] = set()
+        self._heartbeat: asyncio.Task | None = None
+        self.frames = 0
+        self.deliveries = 0
+        self.dropped = 0
+        engine.listeners.append(self.on_event)
+
+    def snapshot(self, room: Room) -> bytes:
+        round_ = room.round
+        now = self.engine.now()
+        return sse_frame("state", {
+            "room": room.room_id,
+            "round": round_.round_id,
+            "stake": round_.stake,
+            "phase": round_.phase,
+            "starts_in": max(0.0, round(round_.starts_at - now, 1)) if round_.phase == COUNTDOWN else 0.0,
+            "players": len(round_.players),
+            "prize_pool": round_.prize_pool(),
+            "calls": round_.calls,
+            "winners": round_.winners,
+        })
+
+    def subscribe(self, room: Room) -> Subscriber:
+        sub = Subscriber()
+        self.subscribers.setdefault(room.room_id, set()).add(sub)
+        sub.queue.put_nowait(self.snapshot(room))
+        if self._heartbeat is None or self._heartbeat.done():
+            self._heartbeat = asyncio.create_task(self._ping_periodically())
+        return sub
+
+    async def _ping_periodically(self, interval: float = SSE_HEARTBEAT) -> None:
+        # One shared comment frame keeps idle proxies from closing the streams
+        while self.subscribers:
+            await asyncio.sleep(interval)
+            for room_id in list(self.subscribers):
+                self.publish(room_id, _PING)
+
+    def unsubscribe(self, room_id: int, sub: Subscriber) -> None:
+        subs = self.subscribers.get(room_id)
+        if subs is not None:
+            subs.discard(sub)
+            if not subs:
+                del self.subscribers[room_id]
+
+    def on_event(self, event: str, room: Room) -> None:
+        if room.room_id not in self.subscribers:
+            return
+        round_ = room.round
+        if event == "players":
+            if room.room_id not in self._players_pending:
+                self._players_pending.add(room.room_id)
+                asyncio.get_running_loop().call_later(PLAYERS_THROTTLE, self._flush_players, room)
+            return
+        if event == "call":
+            frame = sse_frame("call", {"number": round_.calls[-1], "count": len(round_.calls)})
+        elif event == "round_start":
+            frame = sse_frame("round_start", {"players": len(round_.players), "prize_pool": round_.prize_pool()})
+        elif event == "round_end":
+            frame = sse_frame("round_end", {"winners": round_.winners, "prize_pool": round_.prize_pool()})
+        else:
+            return
+        self.publish(room.room_id, frame)
+        if event == "round_end":
+            self.publish(room.room_id, _CLOSE)
+
+    def _flush_players(self, room: Room) -> None:
+        self._players_pending.discard(room.room_id)
+        round_ = room.round
+        self.publish(room.room_id, sse_frame("players", {"players": len(round_.players), "prize_pool": round_.prize_pool()}))
+
+    def publish(self, room_id: int, frame: bytes) -> None:
+        """Queue one already-serialized frame to every subscriber of the room."""
+        subs = self.subscribers.get(room_id)
+        if not subs:
+            return
+        self.frames += 1
+        lagging = []
+        for sub in subs:
+            try:
+                sub.queue.put_nowait(frame)
+                self.deliveries += 1
+            except asyncio.QueueFull:
+                lagging.append(sub)
+        for sub in lagging:
+            # Client is not reading; end its stream and let EventSource reconnect
+            sub.dropped = True
+            self.dropped += 1
+            self.unsubscribe(room_id, sub)
+
+    def stats(self) -> dict:
+        return {
+            "rooms": len(self.subscribers),
+            "subscribers": sum(len(s) for s in self.subscribers.values()),
+            "frames": self.frames,
+            "deliveries": self.deliveries,
+            "dropped": self.dropped,
+        }
+
+
+broadcaster = RoomBroadcaster(game_engine)
+
+
+async def _stream(room_id: int, sub: Subscriber):
+    try:
+        while not sub.dropped:
+            frame = await sub.queue.get()
+            if frame is _CLOSE:
+                break
+            yield frame
+    finally:
+        broadcaster.unsubscribe(room_id, sub)
+
+
+@require_GET
+async def game_events(request):
+    if not game_engine.running:
+        return JsonResponse({"error": "game_engine_unavailable"}, status=503)
+    try:
+        if request.GET.get("room"):
+            room = game_engine.rooms.get(int(request.GET["room"]))
+        else:
+            room = game_engine.lobby.get(int(request.GET.get("stake", "")))
+    except ValueError:
+        return JsonResponse({"error": "invalid_room"}, status=400)
+    if room is None or room.round.phase not in (COUNTDOWN, CALLING):
+        return JsonResponse({"error": "room_not_found"}, status=404)
+
+    sub = broadcaster.subscribe(room)
+    response = StreamingHttpResponse(_stream(room.room_id, sub), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    response["Access-Control-Allow-Origin"] = "*"
+    return response
@@ -0,0 +1,238 @@
+"""In-memory top users by coin, served as pre-serialized JSON.
+
+Coin writers (add_coins, round settlement) report each user's new total with
+update(); the ranking changes in place with a bisect over LEADERBOARD_SIZE
+entries and no query. The table is reloaded from `users` (an index-backed
+LIMIT query) when it is older than LEADERBOARD_REFRESH seconds, or when a
+ranked user dropped below entries it cannot see.
+
+update() only reaches the board of the process it runs in. Round settlement
+runs in core.asgi, next to the board /api/leaderboard serves, so game results
+show up at once. Coins written by any other process (add_coins from the bot)
+are eventually consistent: they appear on the next reload, at most
+LEADERBOARD_REFRESH seconds later.
+
+Each requested limit is serialized once per change together with a content
+ETag, so repeat requests cost a dict lookup or a 304.
+
+Beyond the top, user_rank() and leaderboard_page() read `users` through the
+(coin DESC, user_id) index with keyset cursors instead of OFFSET. Ranks are
+positions in that order, as in the top list: tied users are ranked by user_id.
+A rank is 1 + the users with more coins, summed from coin_counts (users per
+coin value, kept by triggers), + the users tied on the same coin with a lower
+user_id, an index range count. So it costs the distinct coin values above a
+user plus the users tied with them, not the users above them.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from bisect import bisect_left, insort
+from bots.db import connection
+
+LEADERBOARD_SIZE = 200
+LEADERBOARD_REFRESH = float(os.environ.get("LEADERBOARD_REFRESH", 30))
+
+# Prefer a display name: username if set, else user_id
+DISPLAY_NAME = "COALESCE(NULLIF(username, ''), CAST(user_id AS TEXT))"
+
+
+def prize_for_rank(rank: int) -> str:
+    # Simple demo prize tiers; adjust to your business rules
+    if rank == 1:
+        return "500 ETB"
+    if rank == 2:
+        return "300 ETB"
+    if rank == 3:
+        return "150 ETB"
+    if rank <= 10:
+        return "50 ETB"
+    return "—"
+
+
+class Leaderboard:
+    def __init__(self, size: int = LEADERBOARD_SIZE, refresh: float = LEADERBOARD_REFRESH):
+        self.size = size
+        self.refresh = refresh
+        self._lock = threading.Lock()
+        # (-coin, user_id) in rank order, and each ranked user's coin and display name
+        self._keys: list[tuple[float, int]] = []
+        self._coins: dict[int, float] = {}
+        self._names: dict[int, str] = {}
+        self._loaded_at = float("-inf")
+        self._stale = True
+        # limit -> (etag, body)
+        self._responses: dict[int, tuple[str, bytes]] = {}
+        # Counters
+        self.rebuilds = 0
+        self.updates = 0
+        self.serialized = 0
+
+    def _rebuild(self) -> None:
+        with connection() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT user_id, {DISPLAY_NAME}, COALESCE(coin, 0)
+                FROM users
+                ORDER BY coin DESC, user_id ASC
+                LIMIT ?
+                """,
+                (self.size,),
+            ).fetchall()
+        self._keys = [(-float(coin), user_id) for user_id, _, coin in rows]
+        self._coins = {user_id: float(coin) for user_id, _, coin in rows}
+        self._names = {user_id: name for user_id, name, _ in rows}
+        self._loaded_at = time.monotonic()
+        self._stale = False
+        self._responses.clear()
+        self.rebuilds += 1
+
+    def _update(self, user_id: int, coin: float, name: str | None) -> None:
+        keys = self._keys
+        old = self._coins.pop(user_id, None)
+        if old is not None:
+            del keys[bisect_left(keys, (-old, user_id))]
+            self._responses.clear()
+        key = (-float(coin), user_id)
+        if len(keys) >= self.size - (old is not None) and keys and key > keys[-1]:
+            # Below the last visible entry: unranked users may sit in between
+            if old is not None:
+                self._names.pop(user_id, None)
+                self._stale = True
+            return
+        insort(keys, key)
+        self._coins[user_id] = float(coin)
+        self._names[user_id] = name or self._names.get(user_id) or str(user_id)
+        if len(keys) > self.size:
+            _, dropped = keys.pop()
+            del self._coins[dropped]
+            del self._names[dropped]
+        self._responses.clear()
+
+    def update(self, user_id: int, coin: float, name: str | None = None) -> None:
+        """Record a user's new coin total."""
+        self.update_many([(user_id, coin, name)])
+
+    def update_many(self, rows) -> None:
+        """Record new totals for (user_id, coin, display name) rows."""
+        with self._lock:
+            for user_id, coin, name in rows:
+                self.updates += 1
+                self._update(int(user_id), coin, name)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._stale = True
+
+    def response(self, limit: int) -> tuple[str, bytes]:
+        """(etag, JSON body) of the top `limit` users in the /api/leaderboard format."""
+        limit = max(1, min(limit, self.size))
+        with self._lock:
+            if self._stale or time.monotonic() - self._loaded_at > self.refresh:
+                self._rebuild()
+            cached = self._responses.get(limit)
+            if cached is None:
+                items = [
+                    {"rank": rank, "player": self._names[user_id], "points": -neg_coin, "prize": prize_for_rank(rank)}
+                    for rank, (neg_coin, user_id) in enumerate(self._keys[:limit], start=1)
+                ]
+                last = self._keys[limit - 1] if len(self._keys) >= limit else None
+                next_cursor = encode_cursor(-last[0], last[1]) if last else None
+                body = json.dumps({"items": items, "next": next_cursor}).encode()
+                cached = (f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"', body)
+                self._responses[limit] = cached
+                self.serialized += 1
+            return cached
+
+    def stats(self) -> dict:
+        return {"ranked": len(self._keys), "rebuilds": self.rebuilds, "updates": self.updates, "serialized": self.serialized}
+
+
+leaderboard = Leaderboard()
+
+
+def encode_cursor(coin: float, user_id: int) -> str:
+    """Keyset cursor for the entry after (coin, user_id) in leaderboard order."""
+    return f"{float(coin)!r}:{user_id}"
+
+
+def parse_cursor(cursor: str) -> tuple[float, int]:
+    """(coin, user_id) from encode_cursor(); ValueError if malformed."""
+    coin, user_id = cursor.split(":")
+    return float(coin), int(user_id)
+
+
+def _ranked(conn, rows, me: int | None = None) -> list[dict]:
+    """Items for consecutive (user_id, name, coin) rows in leaderboard order."""
+    if not rows:
+        return []
+    first, _, coin = rows[0]
+    above = conn.execute("SELECT COALESCE(SUM(users), 0) FROM coin_counts WHERE coin > ?", (coin,)).fetchone()[0]
+    tied = conn.execute("SELECT COUNT(*) FROM users WHERE coin = ? AND user_id < ?", (coin, first)).fetchone()[0]
+    items = []
+    for rank, (user_id, name, coin) in enumerate(rows, start=above + tied + 1):
+        item = {"rank": rank, "player": name, "points": float(coin), "prize": prize_for_rank(rank)}
+        if user_id == me:
+            item["me"] = True
+        items.append(item)
+    return items
+
+
+def _after(conn, coin: float, user_id: int, limit: int) -> list[tuple]:
+    """Up to `limit` rows following (coin, user_id) in leaderboard order."""
+    rows = conn.execute(
+        f"SELECT user_id, {DISPLAY_NAME}, coin FROM users WHERE coin = ? AND user_id > ? ORDER BY user_id LIMIT ?",
+        (coin, user_id, limit),
+    ).fetchall()
+    if len(rows) < limit:
+        rows += conn.execute(
+            f"SELECT user_id, {DISPLAY_NAME}, coin FROM users WHERE coin < ? ORDER BY coin DESC, user_id LIMIT ?",
+            (coin, limit - len(rows)),
+        ).fetchall()
+    return rows
+
+
+def _before(conn, coin: float, user_id: int, limit: int) -> list[tuple]:
+    """Up to `limit` rows preceding (coin, user_id), nearest first."""
+    rows = conn.execute(
+        f"SELECT user_id, {DISPLAY_NAME}, coin FROM users WHERE coin = ? AND user_id < ? ORDER BY user_id DESC LIMIT ?",
+        (coin, user_id, limit),
+    ).fetchall()
+    if len(rows) < limit:
+        rows += conn.execute(
+            f"SELECT user_id, {DISPLAY_NAME}, coin FROM users WHERE coin > ? ORDER BY coin, user_id DESC LIMIT ?",
+            (coin, limit - len(rows)),
+        ).fetchall()
+    return rows
+
+
+def leaderboard_page(after: str, limit: int = 50) -> dict:
+    """The page of users after a cursor: {"items": [...], "next": cursor or None}."""
+    coin, user_id = parse_cursor(after)
+    with connection() as conn:
+        rows = _after(conn, coin, user_id, limit)
+        items = _ranked(conn, rows)
+    next_cursor = encode_cursor(rows[-1][2], rows[-1][0]) if len(rows) == limit else None
+    return {"items": items, "next": next_cursor}
+
+
+def user_rank(user_id: int, neighbors: int = 5) -> dict | None:
+    """A user's rank with up to `neighbors` users either side, or None if unranked.
+
+    {"rank": 5012, "total": 1000000, "items": [...], "next": cursor}; the user's
+    own item carries "me": true and `next` continues below the last neighbour.
+    """
+    with connection() as conn:
+        row = conn.execute(f"SELECT user_id, {DISPLAY_NAME}, coin FROM users WHERE user_id = ?", (user_id,)).fetchone()
+        if row is None or row[2] is None:
+            return None
+        coin = row[2]
+        above = _before(conn, coin, user_id, neighbors)[::-1]
+        below = _after(conn, coin, user_id, neighbors)
+        rows = above + [tuple(row)] + below
+        items = _ranked(conn, rows, me=user_id)
+        total = conn.execute("SELECT COALESCE(SUM(users), 0) FROM coin_counts").fetchone()[0]
+    me = items[len(above)]
+    last = rows[-1]
+    return {"rank": me["rank"], "total": total, "items": items, "next": encode_cursor(last[2], last[0])}
@@ -0,0 +1,139 @@
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from django.core.management.base import BaseCommand
+from django.http import JsonResponse
+from django.test import RequestFactory, override_settings
+from api.views import list_admin_txns, list_pending_deposits
+from bots import db
+from bots.db import ConnectionPool, ThreadLocalConnections
+from bots.schema import migrate
+
+TOKEN = "bench"
+METHODS = ("telebirr", "cbe", "awash", "boa")
+
+
+def _setup(db_file: str, txns: int, deposits: int) -> None:
+    migrate(db_file)
+    rng = random.Random(5)
+    conn = sqlite3.connect(db_file)
+    try:
+        conn.executemany(
+            "INSERT INTO admin_txns (method, reference, amount, used_by, used_at) VALUES (?, ?, ?, ?, ?)",
+            (
+                (METHODS[i % 4], f"REF{i:09d}", 100.0, *((rng.randint(1, 50_000), f"2026-{i * 9 // txns + 1:02d}-15 12:00:00") if i % 3 else (None, None)))
+                for i in range(txns)
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO deposits (user_id, amount, method, reference, status, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                (rng.randint(1, 50_000), 50.0, METHODS[i % 4], f"DEP{i:09d}", "pending" if i % 2 else "approved",
+                 f"2026-{i * 9 // deposits + 1:02d}-{i % 28 + 1:02d} 10:00:00")
+                for i in range(deposits)
+            ),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _legacy_admin_txns(request):
+    """The view before keyset pages: the whole table, sorted without an index, in one JsonResponse."""
+    with db.request_connection() as conn:
+        rows = conn.execute(
+            "SELECT id, method, reference, amount, used_by, used_at, notes FROM admin_txns ORDER BY used_by IS NOT NULL, id DESC"
+        ).fetchall()
+    items = [
+        {"id": r[0], "method": r[1], "reference": r[2], "amount": r[3], "used_by": r[4], "used_at": r[5], "notes": r[6]}
+        for r in rows
+    ]
+    return JsonResponse({"items": items})
+
+
+def _ms(view, request) -> tuple[float, object]:
+    t0 = time.perf_counter()
+    resp = view(request)
+    if resp.streaming:
+        size = sum(len(part) for part in resp.streaming_content)
+    else:
+        size = len(resp.content)
+    return (time.perf_counter() - t0) * 1e3, (resp, size)
+
+
+class Command(BaseCommand):
+    help = "Admin deposit/txn lists: whole-table responses vs keyset pages, filters and streamed exports"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--txns", type=int, default=500_000)
+        parser.add_argument("--deposits", type=int, default=200_000)
+
+    def handle(self, *args, **options):
+        factory = RequestFactory()
+
+        def get(path, **params):
+            return factory.get(path, params, HTTP_X_ADMIN_TOKEN=TOKEN)
+
+        with tempfile.TemporaryDirectory() as tmp, override_settings(ADMIN_API_TOKEN=TOKEN):
+            db_file = os.path.join(tmp, "bench.db")
+            t0 = time.perf_counter()
+            _setup(db_file, options["txns"], options["deposits"])
+            self.stdout.write(f"{options['txns']} txns, {options['deposits']} deposits loaded in {time.perf_counter() - t0:.1f}s\n")
+            original_pool, original_threads = db.bot_pool, db.thread_connections
+            db.bot_pool = ConnectionPool(2, db_file=db_file)
+            db.thread_connections = ThreadLocalConnections(db_file)
+            try:
+                ms, (_, size) = _ms(_legacy_admin_txns, get("/api/admin/txns"))
+                self.stdout.write(f"txns, whole table (before):  {ms:8.1f} ms  {size / 1e6:6.1f} MB")
+
+                ms, (resp, _) = _ms(list_admin_txns, get("/api/admin/txns", limit=100))
+                page = json.loads(resp.content)
+                self.stdout.write(f"txns, first page:            {ms:8.2f} ms")
+                # Walk to the middle of the used segment, then time the next page
+                with db.request_connection() as conn:
+                    middle = conn.execute(
+                        "SELECT id FROM admin_txns WHERE used_by IS NOT NULL ORDER BY id DESC LIMIT 1 OFFSET ?",
+                        (options["txns"] // 3,),
+                    ).fetchone()[0]
+                ms, (resp, _) = _ms(list_admin_txns, get("/api/admin/txns", limit=100, after_id=middle))
+                deep = json.loads(resp.content)
+                assert len(deep["items"]) == 100 and all(item["id"] < middle for item in deep["items"])
+                self.stdout.write(f"txns, deep page:             {ms:8.2f} ms")
+                ms, _ = _ms(list_admin_txns, get("/api/admin/txns", limit=100, method="cbe", after_id=middle))
+                self.stdout.write(f"txns, method filter:         {ms:8.2f} ms")
+                ms, _ = _ms(list_admin_txns, get("/api/admin/txns", limit=100, user_id=deep["items"][0]["used_by"]))
+                self.stdout.write(f"txns, user filter:           {ms:8.2f} ms")
+
+                # Paging through everything returns each row exactly once, in the old order
+                seen, after_id = [], None
+                while True:
+                    params = {"limit": 1000, **({"after_id": after_id} if after_id else {})}
+                    body = json.loads(list_admin_txns(get("/api/admin/txns", **params)).content)
+                    seen += [item["id"] for item in body["items"]]
+                    after_id = body["next_after_id"]
+                    if not after_id:
+                        break
+                legacy = [item["id"] for item in json.loads(_legacy_admin_txns(get("/api/admin/txns")).content)["items"]]
+                assert seen == legacy, "keyset pages differ from the whole-table order"
+                assert page["items"] == json.loads(_legacy_admin_txns(get("/api/admin/txns")).content)["items"][:100]
+
+                for fmt in ("csv", "json"):
+                    ms, (_, size) = _ms(list_admin_txns, get("/api/admin/txns", export=fmt))
+                    self.stdout.write(
+                        f"txns, {fmt} export:            {ms:8.1f} ms  {size / 1e6:6.1f} MB "
+                        f"({options['txns'] / ms * 1e3:,.0f} rows/s)"
+                    )
+
+                self.stdout.write("")
+                ms, _ = _ms(list_pending_deposits, get("/api/admin/deposits", limit=100))
+                self.stdout.write(f"deposits, first page:        {ms:8.2f} ms")
+                ms, _ = _ms(list_pending_deposits, get("/api/admin/deposits", limit=100, method="awash", since="2026-05-01", until="2026-06-01"))
+                self.stdout.write(f"deposits, method + month:    {ms:8.2f} ms")
+                ms, (_, size) = _ms(list_pending_deposits, get("/api/admin/deposits", export="csv"))
+                self.stdout.write(f"deposits, csv export:        {ms:8.1f} ms  {size / 1e6:6.1f} MB")
+            finally:
+                db.bot_pool.close_all()
+                db.bot_pool, db.thread_connections = original_pool, original_threads
@@ -0,0 +1,136 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from django.core.management.base import BaseCommand
+from bots import db
+from bots.db import ConnectionPool, run_read, run_write, shutdown_executors
+
+
+def _setup(db_file: str, users: int) -> None:
+    conn = sqlite3.connect(db_file)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE usage (user_id INTEGER, username TEXT, month TEXT, PRIMARY KEY(user_id, month))")
+        conn.execute(
+            "CREATE TABLE users (user_id INTEGER PRIMARY KEY, phone TEXT, created_at TEXT, username TEXT,"
+            " balance_etb REAL DEFAULT 0.0, coin REAL DEFAULT 0.10)"
+        )
+        conn.executemany(
+            "INSERT INTO users (user_id, phone, created_at) VALUES (?, ?, datetime('now'))",
+            ((uid, f"+2519{uid:08d}") for uid in range(1, users + 1)),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _record_usage(user_id: int) -> None:
+    # Sub-second "month" so every call really writes instead of hitting OR IGNORE
+    with db.connection() as conn:
+        conn.execute(
+            "INSERT OR IGNORE INTO usage (user_id, username, month) VALUES (?, '', strftime('%Y-%m-%f', 'now'))",
+            (user_id,),
+        )
+        conn.commit()
+
+
+def _read_user(user_id: int) -> None:
+    # Uncached profile read, as on a profile-cache miss
+    with db.connection() as conn:
+        conn.execute("SELECT phone, username, balance_etb, coin FROM users WHERE user_id = ?", (user_id,)).fetchone()
+
+
+def _hold_write_lock(db_file: str, start: float, hold: float) -> None:
+    """Simulate a long admin write: take the write lock and sit on it."""
+    time.sleep(max(0.0, start - time.perf_counter()))
+    conn = sqlite3.connect(db_file, isolation_level=None)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("UPDATE users SET coin = coin + 1 WHERE user_id = 1")
+        time.sleep(hold)
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+
+
+def _pct(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[int(p * (len(ordered) - 1))]
+
+
+async def _drive(mode: str, users: int, rate: int, duration: float) -> list[float]:
+    """Fire handlers at a fixed rate; return read-handler latencies measured from their due time."""
+    latencies: list[float] = []
+
+    async def handler(i: int, due: float):
+        uid = i % users + 1
+        if i % 10 == 0:
+            # Every tenth update also writes (usage log), which waits on the lock
+            if mode == "blocking":
+                _record_usage(uid)
+            else:
+                await run_write(_record_usage, uid)
+            return
+        if mode == "blocking":
+            _read_user(uid)
+            _read_user(uid)
+        else:
+            await run_read(_read_user, uid)
+            await run_read(_read_user, uid)
+        latencies.append(time.perf_counter() - due)
+
+    tasks = []
+    t0 = time.perf_counter()
+    for i in range(int(duration * rate)):
+        due = t0 + i / rate
+        delay = due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(handler(i, due)))
+    await asyncio.gather(*tasks)
+    return latencies
+
+
+class Command(BaseCommand):
+    help = "Load-test handler latency while a long admin write holds the SQLite lock"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--rate", type=int, default=500, help="updates per second")
+        parser.add_argument("--duration", type=float, default=2.0, help="seconds per scenario")
+        parser.add_argument("--hold", type=float, default=1.0, help="seconds the admin write holds the lock")
+
+    def handle(self, *args, **options):
+        users, rate = options["users"], options["rate"]
+        duration, hold = options["duration"], options["hold"]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            db_file = os.path.join(tmp, "bench.db")
+            _setup(db_file, users)
+            original_pool = db.bot_pool
+            db.bot_pool = ConnectionPool(db.BOT_POOL_SIZE, db_file=db_file)
+            try:
+                self.stdout.write(f"{'mode':<10} {'admin lock':<11} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+                for mode in ("blocking", "async"):
+                    for locked in (False, True):
+                        locker = None
+                        if locked:
+                            start = time.perf_counter() + duration / 4
+                            locker = threading.Thread(target=_hold_write_lock, args=(db_file, start, hold))
+                            locker.start()
+                        lat = asyncio.run(_drive(mode, users, rate, duration))
+                        if locker:
+                            locker.join()
+                        self.stdout.write(
+                            f"{mode:<10} {'held' if locked else 'none':<11} "
+                            f"{_pct(lat, 0.50) * 1e3:8.2f} {_pct(lat, 0.99) * 1e3:8.2f} {max(lat, default=0) * 1e3:8.2f}"
+                        )
+            finally:
+                shutdown_executors(wait=True)
+                db.bot_pool.close_all()
+                db.bot_pool = original_pool
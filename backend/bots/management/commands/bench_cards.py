@@ -0,0 +1,71 @@
+import random
+import time
+from django.core.management.base import BaseCommand
+from bots.game.cards import FREE, Board, CardSet, build_card_from_seed
+
+# Nested-array baseline: what checking bingoCards.js-style grids costs per call
+_LINES = (
+    [[(r, c) for c in range(5)] for r in range(5)]
+    + [[(r, c) for r in range(5)] for c in range(5)]
+    + [[(i, i) for i in range(5)], [(i, 4 - i) for i in range(5)]]
+    + [[(0, 0), (0, 4), (4, 0), (4, 4)]]
+)
+
+
+def _naive_round(grids: list[list[list]], deck: list[int]) -> int:
+    marked = [[[v == FREE for v in row] for row in grid] for grid in grids]
+    wins = 0
+    done = set()
+    for number in deck:
+        for i, grid in enumerate(grids):
+            for r, row in enumerate(grid):
+                for c, v in enumerate(row):
+                    if v == number:
+                        marked[i][r][c] = True
+            if i not in done and any(all(marked[i][r][c] for r, c in line) for line in _LINES):
+                done.add(i)
+                wins += 1
+    return wins
+
+
+def _mask_round(board: Board, deck: list[int]) -> int:
+    for call_no, number in enumerate(deck, start=1):
+        board.mark(number, call_no)
+    return len(board.completed)
+
+
+class Command(BaseCommand):
+    help = "Per-call cost of marking and win-checking every card in a room: bitmask index vs nested arrays"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rounds", type=int, default=20)
+        parser.add_argument("--sizes", default="200,10000", help="comma-separated card counts")
+        parser.add_argument("--naive-rounds", type=int, default=2)
+
+    def handle(self, *args, **options):
+        rng = random.Random(12345)
+        self.stdout.write(f"{'cards':>7} {'board ms':>9} {'mask us/call':>13} {'naive us/call':>14} {'speedup':>8}")
+        for size in (int(s) for s in options["sizes"].split(",")):
+            card_set = CardSet(size)
+            grids = [build_card_from_seed(seed) for seed in range(1, size + 1)]
+            decks = [rng.sample(range(1, 76), 75) for _ in range(options["rounds"])]
+            cards = range(1, size + 1)
+
+            t0 = time.perf_counter()
+            boards = [Board(cards, card_set) for _ in decks]
+            board_ms = (time.perf_counter() - t0) / len(decks) * 1e3
+
+            t0 = time.perf_counter()
+            for board, deck in zip(boards, decks):
+                _mask_round(board, deck)
+            mask_us = (time.perf_counter() - t0) / (len(decks) * 75) * 1e6
+
+            naive = decks[: options["naive_rounds"]]
+            t0 = time.perf_counter()
+            naive_wins = [_naive_round(grids, deck) for deck in naive]
+            naive_us = (time.perf_counter() - t0) / (len(naive) * 75) * 1e6
+            assert naive_wins == [len(b.completed) for b in boards[: len(naive)]]
+
+            self.stdout.write(
+                f"{size:>7} {board_ms:>9.2f} {mask_us:>13.1f} {naive_us:>14.1f} {naive_us / mask_us:>7.0f}x"
+            )
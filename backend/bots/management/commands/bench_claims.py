@@ -0,0 +1,124 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import time
+from urllib.parse import urlencode
+from django.core.management.base import BaseCommand
+from django.test import AsyncRequestFactory
+from bots.game.cards import CARD_COUNT
+from bots.game.engine import LATE, NOT_PLAYING, REJECTED, WON, GameEngine
+from bots.metrics import LatencyStats
+
+BENCH_TOKEN = "123456:bench"
+
+
+def signed_init_data(user_id: int, token: str = BENCH_TOKEN) -> str:
+    """initData as Telegram would send it for `user_id`."""
+    fields = {"auth_date": str(int(time.time())), "user": json.dumps({"id": user_id, "first_name": f"u{user_id}"})}
+    check_string = "\n".join(f"{k}={v}" for k, v in sorted(fields.items()))
+    secret = hmac.new(b"WebAppData", token.encode(), hashlib.sha256).digest()
+    fields["hash"] = hmac.new(secret, check_string.encode(), hashlib.sha256).hexdigest()
+    return urlencode(fields)
+
+
+async def _run(rooms: int, players: int, interval: float, http: bool) -> tuple[list[dict], LatencyStats, float]:
+    engine = GameEngine(countdown=0.05, call_interval=interval, stakes=())
+    latency = LatencyStats(window=rooms * players)
+    outcomes: list[dict] = []
+    fired: set[int] = set()
+    pending: list[asyncio.Task] = []
+
+    if http:
+        # The view claims through api.views.game_engine; point it at this engine
+        import api.views
+        from api.views import game_claim
+
+        api.views.game_engine = engine
+        factory = AsyncRequestFactory()
+        init_data = {uid: signed_init_data(uid) for r in range(rooms) for uid in range(r * players + 1, (r + 1) * players + 1)}
+
+    async def one_claim(user_id: int, stake: int) -> str:
+        t0 = time.perf_counter()
+        if http:
+            request = factory.post(
+                "/api/game/claim",
+                data=json.dumps({"stake": stake, "init_data": init_data[user_id]}),
+                content_type="application/json",
+            )
+            response = await game_claim(request)
+            status = json.loads(response.content)["status"]
+        else:
+            status = (await engine.claim(user_id, stake)).status
+        latency.record("claim", time.perf_counter() - t0)
+        return status
+
+    async def storm(room) -> None:
+        round_ = room.round
+        valid = sum(1 for card in round_.players.values() if round_.board.is_winner(card))
+        # Every player in the room presses BINGO at the same moment
+        statuses = await asyncio.gather(*(one_claim(uid, room.stake) for uid in list(round_.players)))
+        outcomes.append({
+            "room": room.room_id,
+            "valid": valid,
+            WON: statuses.count(WON),
+            LATE: statuses.count(LATE),
+            REJECTED: statuses.count(REJECTED),
+            NOT_PLAYING: statuses.count(NOT_PLAYING),
+        })
+
+    def on_call(event, room) -> None:
+        if event == "call" and room.room_id not in fired and room.round.board.completed:
+            fired.add(room.room_id)
+            pending.append(asyncio.ensure_future(storm(room)))
+
+    engine.listeners.append(on_call)
+    await engine.start()
+    for r in range(rooms):
+        room = engine.open_room(10)
+        for p in range(players):
+            room.round.players[r * players + p + 1] = p % CARD_COUNT + 1
+
+    t0 = time.perf_counter()
+    while len(outcomes) < rooms:
+        await asyncio.sleep(0.01)
+        if time.perf_counter() - t0 > 120:
+            break
+    await asyncio.gather(*pending)
+    elapsed = time.perf_counter() - t0
+    await engine.stop()
+    return outcomes, latency, elapsed
+
+
+class Command(BaseCommand):
+    help = "Stress test: every player in each room claims BINGO at once; exactly one claim per room may win"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rooms", type=int, default=20)
+        parser.add_argument("--players", type=int, default=1000, help="claims per room")
+        parser.add_argument("--interval", type=float, default=0.2, help="seconds between calls")
+        parser.add_argument("--http", action="store_true", help="claim through the /api/game/claim view")
+
+    def handle(self, *args, **options):
+        if options["http"]:
+            os.environ["TELEGRAM_BOT_TOKEN"] = BENCH_TOKEN
+        outcomes, latency, elapsed = asyncio.run(
+            _run(options["rooms"], options["players"], options["interval"], options["http"])
+        )
+        bad = [o for o in outcomes if o[WON] != 1 or o[WON] + o[LATE] + o[NOT_PLAYING] != o["valid"]]
+        claims = sum(o[WON] + o[LATE] + o[REJECTED] + o[NOT_PLAYING] for o in outcomes)
+        stats = latency.snapshot().get("claim", {})
+        self.stdout.write(f"rooms: {len(outcomes)}  claims: {claims}")
+        self.stdout.write(
+            f"won {sum(o[WON] for o in outcomes)}  late {sum(o[LATE] for o in outcomes)}  "
+            f"rejected {sum(o[REJECTED] for o in outcomes)}  after decision {sum(o[NOT_PLAYING] for o in outcomes)}"
+        )
+        self.stdout.write(
+            f"claim latency (ms): p50 {stats.get('p50_ms', 0):.2f}  p99 {stats.get('p99_ms', 0):.2f}  "
+            f"max {stats.get('max_ms', 0):.2f}"
+        )
+        if bad or len(outcomes) < options["rooms"]:
+            self.stderr.write(f"❌ {len(bad)} rooms without exactly one winner: {bad[:3]}")
+        else:
+            self.stdout.write("✅ exactly one winner per room; every false claim rejected")
@@ -0,0 +1,82 @@
+import os
+import sqlite3
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from django.core.management.base import BaseCommand
+from bots.db import ConnectionPool
+
+
+def _setup(db_file: str, users: int) -> None:
+    conn = sqlite3.connect(db_file)
+    try:
+        conn.execute("CREATE TABLE usage (user_id INTEGER, username TEXT, month TEXT, PRIMARY KEY(user_id, month))")
+        conn.execute("CREATE TABLE users (user_id INTEGER PRIMARY KEY, phone TEXT, created_at TEXT, referred_by INTEGER)")
+        conn.executemany(
+            "INSERT INTO users (user_id, phone, created_at) VALUES (?, ?, datetime('now'))",
+            ((uid, f"+2519{uid:08d}") for uid in range(1, users + 1)),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _start_update(connection, user_id: int, month: str) -> None:
+    """Run the helpers a single /start hits, each borrowing a connection from `connection()`."""
+    # log_user_usage
+    with connection() as conn:
+        conn.execute("INSERT OR IGNORE INTO usage (user_id, username, month) VALUES (?, ?, ?)", (user_id, "", month))
+        conn.commit()
+    # record_referral_if_missing
+    with connection() as conn:
+        conn.execute("SELECT referred_by FROM users WHERE user_id = ?", (user_id,)).fetchone()
+    # is_registered, twice
+    for _ in range(2):
+        with connection() as conn:
+            conn.execute(
+                "SELECT 1 FROM users WHERE user_id = ? AND phone IS NOT NULL AND TRIM(phone) <> '' LIMIT 1",
+                (user_id,),
+            ).fetchone()
+
+
+class Command(BaseCommand):
+    help = "Benchmark per-update DB overhead: a fresh sqlite3.connect per helper vs the shared pool"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--updates", type=int, default=2000)
+        parser.add_argument("--users", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        updates = options["updates"]
+        users = options["users"]
+        month = datetime.now().strftime("%Y-%m")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            db_file = os.path.join(tmp, "bench.db")
+            _setup(db_file, users)
+
+            @contextmanager
+            def fresh_connection():
+                conn = sqlite3.connect(db_file)
+                try:
+                    yield conn
+                finally:
+                    conn.close()
+
+            t0 = time.perf_counter()
+            for i in range(updates):
+                _start_update(fresh_connection, i % users + 1, month)
+            before = time.perf_counter() - t0
+
+            pool = ConnectionPool(4, db_file=db_file)
+            t0 = time.perf_counter()
+            for i in range(updates):
+                _start_update(pool.connection, i % users + 1, month)
+            after = time.perf_counter() - t0
+            pool.close_all()
+
+        self.stdout.write(f"updates:            {updates}")
+        self.stdout.write(f"per-call connect:   {before / updates * 1e6:9.1f} us/update")
+        self.stdout.write(f"pooled connections: {after / updates * 1e6:9.1f} us/update")
+        self.stdout.write(f"speedup:            {before / after:9.1f}x")
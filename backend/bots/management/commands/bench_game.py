@@ -0,0 +1,57 @@
+import asyncio
+import time
+from django.core.management.base import BaseCommand
+from bots.game.engine import STAKES, GameEngine
+from bots.metrics import LatencyStats
+
+
+async def _run(rooms: int, players: int, countdown: float, interval: float, duration: float) -> tuple[GameEngine, float]:
+    engine = GameEngine(countdown=countdown, call_interval=interval, stakes=())
+    # Percentiles over the whole run, not just the last window
+    engine.jitter = LatencyStats(window=int(rooms * duration / interval) + rooms)
+    await engine.start()
+
+    def fill(stake: int) -> None:
+        room = engine.open_room(stake)
+        for p in range(players):
+            room.round.players[room.room_id * 1000 + p] = p + 1
+
+    def refill(event, room) -> None:
+        # Keep `rooms` rounds in flight: every finished round is replaced
+        if event == "round_end":
+            fill(room.stake)
+
+    engine.listeners.append(refill)
+    for i in range(rooms):
+        fill(STAKES[i % len(STAKES)])
+
+    t0 = time.perf_counter()
+    await asyncio.sleep(duration)
+    elapsed = time.perf_counter() - t0
+    await engine.stop()
+    return engine, elapsed
+
+
+class Command(BaseCommand):
+    help = "Run many concurrent bingo rooms on one event loop and report rooms/sec and call-tick jitter"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rooms", type=int, default=5000, help="rounds kept in flight")
+        parser.add_argument("--players", type=int, default=2)
+        parser.add_argument("--countdown", type=float, default=0.5, help="seconds")
+        parser.add_argument("--interval", type=float, default=0.05, help="seconds between calls")
+        parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+
+    def handle(self, *args, **options):
+        engine, elapsed = asyncio.run(_run(
+            options["rooms"], options["players"], options["countdown"], options["interval"], options["duration"],
+        ))
+        stats = engine.stats()
+        jitter = engine.jitter.snapshot().get("tick", {})
+        self.stdout.write(f"rooms in flight:   {options['rooms']}")
+        self.stdout.write(f"rounds finished:   {stats['rounds_finished']} ({stats['rounds_finished'] / elapsed:.1f} rooms/s)")
+        self.stdout.write(f"numbers called:    {stats['calls']} ({stats['calls'] / elapsed:.0f} calls/s)")
+        self.stdout.write(
+            f"tick jitter (ms):  p50 {jitter.get('p50_ms', 0):.2f}  p95 {jitter.get('p95_ms', 0):.2f}  "
+            f"p99 {jitter.get('p99_ms', 0):.2f}  max {jitter.get('max_ms', 0):.2f}"
+        )
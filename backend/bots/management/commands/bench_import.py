@@ -0,0 +1,98 @@
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+from api.views import bulk_add_admin_txns
+from bots import db
+from bots.db import ConnectionPool, ThreadLocalConnections
+from bots.schema import migrate
+
+TOKEN = "bench"
+METHODS = ("telebirr", "cbe", "awash", "boa")
+
+
+def _rows(count: int, start: int = 0) -> list[dict]:
+    return [
+        {"method": METHODS[i % 4], "reference": f"REF{i:010d}", "amount": float(50 + i % 500), "notes": "batch"}
+        for i in range(start, start + count)
+    ]
+
+
+def _body(rows: list[dict], fmt: str) -> tuple[bytes, str]:
+    if fmt == "json":
+        return json.dumps(rows).encode(), "application/json"
+    if fmt == "ndjson":
+        return "".join(json.dumps(row) + "\n" for row in rows).encode(), "application/x-ndjson"
+    lines = ["method,reference,amount,notes"] + [f"{r['method']},{r['reference']},{r['amount']},{r['notes']}" for r in rows]
+    return ("\n".join(lines) + "\n").encode(), "text/csv"
+
+
+def _legacy_import(db_file: str, raw: str) -> int:
+    """The importer before streaming: the CSV fallback path, one execute per row."""
+    conn = sqlite3.connect(db_file)
+    added = 0
+    try:
+        cur = conn.cursor()
+        for line in raw.splitlines()[1:]:
+            parts = [p.strip() for p in line.split(",")]
+            cur.execute(
+                "INSERT OR IGNORE INTO admin_txns (method, reference, amount, notes) VALUES (?, ?, ?, ?)",
+                (parts[0].lower(), parts[1], float(parts[2]), parts[3]),
+            )
+            added += cur.rowcount and 1 or 0
+        conn.commit()
+    finally:
+        conn.close()
+    return added
+
+
+class Command(BaseCommand):
+    help = "Import admin txn references through /api/admin/txns/bulk: per-row inserts vs the streaming importer"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--refs", type=int, default=1_000_000)
+        parser.add_argument("--legacy-refs", type=int, default=None, help="rows for the per-row baseline (default: --refs)")
+
+    def handle(self, *args, **options):
+        refs = options["refs"]
+        legacy_refs = options["legacy_refs"] or refs
+        factory = RequestFactory()
+        with tempfile.TemporaryDirectory() as tmp, override_settings(ADMIN_API_TOKEN=TOKEN):
+            original_pool, original_threads = db.bot_pool, db.thread_connections
+            try:
+                legacy_file = os.path.join(tmp, "legacy.db")
+                migrate(legacy_file)
+                raw, _ = _body(_rows(legacy_refs), "csv")
+                t0 = time.perf_counter()
+                _legacy_import(legacy_file, raw.decode())
+                elapsed = time.perf_counter() - t0
+                self.stdout.write(f"per-row inserts: {legacy_refs:>9,} refs in {elapsed:6.2f}s ({legacy_refs / elapsed:>9,.0f} refs/s)")
+
+                rows = _rows(refs)
+                for fmt in ("csv", "ndjson", "json"):
+                    db_file = os.path.join(tmp, f"{fmt}.db")
+                    migrate(db_file)
+                    db.bot_pool = ConnectionPool(2, db_file=db_file)
+                    db.thread_connections = ThreadLocalConnections(db_file)
+                    body, content_type = _body(rows, fmt)
+                    request = factory.post("/api/admin/txns/bulk", data=body, content_type=content_type, HTTP_X_ADMIN_TOKEN=TOKEN)
+                    t0 = time.perf_counter()
+                    result = json.loads(bulk_add_admin_txns(request).content)
+                    elapsed = time.perf_counter() - t0
+                    assert result["added"] == refs and result["ok"], result
+                    self.stdout.write(f"streaming {fmt:>6}: {refs:>9,} refs in {elapsed:6.2f}s ({refs / elapsed:>9,.0f} refs/s)")
+
+                # Re-importing with some bad rows: every rejected row comes back with its number
+                body, content_type = _body(_rows(1000, start=refs - 500) + [{"method": "cbe"}, {"method": "boa", "reference": "X1", "amount": "ten"}], "ndjson")
+                request = factory.post("/api/admin/txns/bulk", data=body, content_type=content_type, HTTP_X_ADMIN_TOKEN=TOKEN)
+                result = json.loads(bulk_add_admin_txns(request).content)
+                self.stdout.write(
+                    f"re-import: added {result['added']}, duplicates {result['duplicates']}, invalid {result['invalid']}, "
+                    f"e.g. {result['errors'][0]} {result['errors'][-1]}"
+                )
+            finally:
+                db.bot_pool.close_all()
+                db.bot_pool, db.thread_connections = original_pool, original_threads
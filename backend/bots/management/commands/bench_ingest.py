@@ -0,0 +1,127 @@
+import asyncio
+import json
+import os
+import time
+from django.core.management.base import BaseCommand
+from django.test import AsyncRequestFactory
+from telegram import Update, User
+from telegram.ext import Application, ExtBot, TypeHandler
+from bots import webhook
+
+BENCH_TOKEN = "123456:bench"
+
+
+def replayed_updates(count: int, users: int = 500) -> list[dict]:
+    """Synthetic /start messages and button clicks from `users` distinct users."""
+    updates = []
+    for i in range(count):
+        uid = 1000 + i % users
+        sender = {"id": uid, "is_bot": False, "first_name": f"user{uid}"}
+        chat = {"id": uid, "type": "private"}
+        if i % 2:
+            body = {"callback_query": {
+                "id": str(i), "from": sender, "chat_instance": str(uid), "data": "check_balance",
+                "message": {"message_id": i, "date": 0, "chat": chat, "text": "menu"},
+            }}
+        else:
+            body = {"message": {"message_id": i, "date": 0, "chat": chat, "from": sender, "text": "/start"}}
+        updates.append({"update_id": i + 1, **body})
+    return updates
+
+
+class ReplayBot(ExtBot):
+    """A bot that never touches the network: getUpdates serves the replay log in batches of 100."""
+
+    def __init__(self, replay: list[dict], rtt: float):
+        super().__init__(BENCH_TOKEN)
+        self._replay = replay
+        self._rtt = rtt
+
+    async def get_me(self, *args, **kwargs):
+        self._bot_user = User(id=123456, first_name="bench", is_bot=True, username="bench_bot")
+        return self._bot_user
+
+    async def delete_webhook(self, *args, **kwargs):
+        return True
+
+    async def get_updates(self, offset=None, limit=100, *args, **kwargs):
+        await asyncio.sleep(self._rtt)
+        start = (offset or 1) - 1
+        return [Update.de_json(u, self) for u in self._replay[start:start + limit]]
+
+
+def _counting_app(replay: list[dict], rtt: float) -> tuple[Application, asyncio.Event]:
+    done = asyncio.Event()
+    seen = 0
+
+    async def count(update, context):
+        nonlocal seen
+        seen += 1
+        if seen == len(replay):
+            done.set()
+
+    app = Application.builder().bot(ReplayBot(replay, rtt)).build()
+    app.add_handler(TypeHandler(Update, count))
+    return app, done
+
+
+async def _polling(replay: list[dict], rtt: float, poll_interval: float) -> float:
+    app, done = _counting_app(replay, rtt)
+    async with app:
+        await app.start()
+        t0 = time.perf_counter()
+        await app.updater.start_polling(poll_interval=poll_interval, timeout=30)
+        await done.wait()
+        elapsed = time.perf_counter() - t0
+        await app.updater.stop()
+        await app.stop()
+    return elapsed
+
+
+async def _webhook(replay: list[dict], rtt: float, connections: int) -> float:
+    app, done = _counting_app(replay, rtt)
+    await webhook.start_application(app)
+    factory = AsyncRequestFactory()
+    headers = {webhook.SECRET_HEADER: os.environ["TELEGRAM_WEBHOOK_SECRET"]}
+    bodies = [json.dumps(u) for u in replay]
+    # Telegram delivers over at most `connections` parallel HTTPS connections
+    pending = asyncio.Queue()
+    for body in bodies:
+        pending.put_nowait(body)
+
+    async def deliver():
+        while not pending.empty():
+            body = pending.get_nowait()
+            await asyncio.sleep(rtt / 2)
+            request = factory.post("/telegram/webhook", data=body, content_type="application/json", headers=headers)
+            response = await webhook.telegram_webhook(request)
+            assert response.status_code == 200, response.status_code
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(deliver() for _ in range(connections)))
+    await done.wait()
+    elapsed = time.perf_counter() - t0
+    await webhook.stop_application()
+    return elapsed
+
+
+class Command(BaseCommand):
+    help = "Replay synthetic updates through polling and webhook ingestion and compare updates/sec"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--updates", type=int, default=500)
+        parser.add_argument("--rtt", type=float, default=0.05, help="simulated Telegram round trip, seconds")
+        parser.add_argument("--poll-interval", type=float, default=1.0, help="as passed to run_polling")
+        parser.add_argument("--connections", type=int, default=40, help="webhook max_connections")
+
+    def handle(self, *args, **options):
+        os.environ.setdefault("TELEGRAM_WEBHOOK_SECRET", "bench-secret")
+        replay = replayed_updates(options["updates"])
+        n = len(replay)
+
+        polling = asyncio.run(_polling(replay, options["rtt"], options["poll_interval"]))
+        hooked = asyncio.run(_webhook(replay, options["rtt"], options["connections"]))
+
+        self.stdout.write(f"updates replayed: {n}")
+        self.stdout.write(f"polling:  {n / polling:10.1f} updates/s  ({polling:.2f}s)")
+        self.stdout.write(f"webhook:  {n / hooked:10.1f} updates/s  ({hooked:.2f}s)")
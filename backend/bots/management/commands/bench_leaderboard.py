@@ -0,0 +1,160 @@
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from django.core.management.base import BaseCommand
+from django.http import JsonResponse
+from django.test import RequestFactory
+from api.views import leaderboard_view
+from bots import db
+from bots.db import ConnectionPool
+from bots.leaderboard import Leaderboard, leaderboard_page, prize_for_rank, user_rank
+from bots.schema import migrate
+import api.views
+
+
+def _setup(db_file: str, users: int) -> None:
+    migrate(db_file)
+    rng = random.Random(7)
+    conn = sqlite3.connect(db_file)
+    try:
+        conn.executemany(
+            "INSERT INTO users (user_id, phone, created_at, username, balance_etb, coin) VALUES (?, ?, datetime('now'), ?, 0.0, ?)",
+            ((uid, f"+2519{uid:08d}", f"user{uid}" if uid % 3 else "", round(rng.expovariate(0.05), 1))
+             for uid in range(1, users + 1)),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _legacy_leaderboard(request):
+    """The view before the in-memory leaderboard: one query and a fresh JSON encode per request."""
+    limit = max(1, min(int(request.GET.get("limit", 50)), 200))
+    with db.connection() as conn:
+        rows = conn.execute(
+            """
+            SELECT user_id, COALESCE(NULLIF(username, ''), CAST(user_id AS TEXT)) AS display_name, COALESCE(coin, 0) AS coin
+            FROM users
+            ORDER BY coin DESC, user_id ASC
+            LIMIT ?
+            """,
+            (limit,),
+        ).fetchall()
+    items = [
+        {"rank": idx, "player": name, "points": float(coin), "prize": prize_for_rank(idx)}
+        for idx, (user_id, name, coin) in enumerate(rows, start=1)
+    ]
+    resp = JsonResponse({"items": items})
+    resp["Cache-Control"] = "no-store"
+    return resp
+
+
+def _rank_by_count(user_id: int) -> int:
+    """1 + users ahead in (coin DESC, user_id) order, counted row by row."""
+    with db.connection() as conn:
+        (coin,) = conn.execute("SELECT coin FROM users WHERE user_id = ?", (user_id,)).fetchone()
+        return 1 + conn.execute(
+            "SELECT COUNT(*) FROM users WHERE coin > ? OR (coin = ? AND user_id < ?)", (coin, coin, user_id)
+        ).fetchone()[0]
+
+
+def _offset_page(offset: int, limit: int) -> list:
+    with db.connection() as conn:
+        return conn.execute(
+            "SELECT user_id, coin FROM users ORDER BY coin DESC, user_id LIMIT ? OFFSET ?", (limit, offset)
+        ).fetchall()
+
+
+def _timed(fn, *args) -> float:
+    t0 = time.perf_counter()
+    fn(*args)
+    return (time.perf_counter() - t0) * 1e3
+
+
+def _rate(view, request, seconds: float) -> float:
+    count = 0
+    t0 = time.perf_counter()
+    while time.perf_counter() - t0 < seconds:
+        view(request)
+        count += 1
+    return count / (time.perf_counter() - t0)
+
+
+class Command(BaseCommand):
+    help = "Requests/sec of /api/leaderboard: per-request query vs the in-memory leaderboard"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1_000_000)
+        parser.add_argument("--seconds", type=float, default=2.0, help="per measurement")
+
+    def handle(self, *args, **options):
+        users, seconds = options["users"], options["seconds"]
+        factory = RequestFactory()
+        with tempfile.TemporaryDirectory() as tmp:
+            db_file = os.path.join(tmp, "bench.db")
+            t0 = time.perf_counter()
+            _setup(db_file, users)
+            self.stdout.write(f"{users} users loaded in {time.perf_counter() - t0:.1f}s")
+            original_pool, original_board = db.bot_pool, api.views.leaderboard
+            db.bot_pool = ConnectionPool(2, db_file=db_file)
+            board = api.views.leaderboard = Leaderboard()
+            try:
+                for limit in (50, 200):
+                    request = factory.get("/api/leaderboard", {"limit": limit})
+                    legacy = json.loads(_legacy_leaderboard(request).content)
+                    response = leaderboard_view(request)
+                    assert json.loads(response.content)["items"] == legacy["items"], "in-memory leaderboard differs from the query"
+                    revalidate = factory.get("/api/leaderboard", {"limit": limit}, HTTP_IF_NONE_MATCH=response["ETag"])
+                    assert leaderboard_view(revalidate).status_code == 304
+                    self.stdout.write(f"\nlimit={limit}")
+                    before = _rate(_legacy_leaderboard, request, seconds)
+                    after = _rate(leaderboard_view, request, seconds)
+                    not_modified = _rate(leaderboard_view, revalidate, seconds)
+                    self.stdout.write(f"  query per request:  {before:>9,.0f} req/s")
+                    self.stdout.write(f"  in-memory (200):    {after:>9,.0f} req/s ({after / before:.0f}x)")
+                    self.stdout.write(f"  in-memory (304):    {not_modified:>9,.0f} req/s")
+
+                t0 = time.perf_counter()
+                board.invalidate()
+                board.response(200)
+                self.stdout.write(f"\nrebuild from users: {(time.perf_counter() - t0) * 1e3:.2f} ms")
+
+                # Coin changes as settlement reports them: mostly unranked users, some climbing
+                rng = random.Random(3)
+                rows = [(rng.randint(1, users), rng.expovariate(0.01), None) for _ in range(100_000)]
+                t0 = time.perf_counter()
+                for row in rows:
+                    board.update(*row)
+                elapsed = time.perf_counter() - t0
+                self.stdout.write(f"updates:            {len(rows) / elapsed:>9,.0f} /s")
+
+                with db.connection() as conn:
+                    order = [uid for (uid,) in conn.execute("SELECT user_id FROM users ORDER BY coin DESC, user_id")]
+                self.stdout.write("\nmy rank (5 neighbours each side) vs counting the users above")
+                for position in (10, 1_000, len(order) // 2, len(order) - 1):
+                    uid = order[position]
+                    result = user_rank(uid, 5)
+                    assert result["rank"] == position + 1 == _rank_by_count(uid), "rank differs from the count"
+                    self.stdout.write(
+                        f"  position {position + 1:>9,}: rank {result['rank']:>9,}  "
+                        f"{_timed(user_rank, uid, 5):6.2f} ms  (count: {_timed(_rank_by_count, uid):6.2f} ms)"
+                    )
+
+                self.stdout.write("\npage of 50: keyset cursor vs OFFSET")
+                for position in (1_000, len(order) // 2, len(order) - 100):
+                    with db.connection() as conn:
+                        coin = conn.execute("SELECT coin FROM users WHERE user_id = ?", (order[position - 1],)).fetchone()[0]
+                    cursor = f"{coin!r}:{order[position - 1]}"
+                    page = leaderboard_page(cursor, 50)
+                    assert [row[0] for row in _offset_page(position, 50)] == order[position:position + 50]
+                    assert [item["rank"] for item in page["items"]] == list(range(position + 1, position + 51))
+                    self.stdout.write(
+                        f"  after {position:>9,}: keyset {_timed(leaderboard_page, cursor, 50):6.2f} ms  "
+                        f"(OFFSET: {_timed(_offset_page, position, 50):6.2f} ms)"
+                    )
+            finally:
+                db.bot_pool.close_all()
+                db.bot_pool, api.views.leaderboard = original_pool, original_board
@@ -0,0 +1,66 @@
+import os
+import tempfile
+import time
+from django.core.management.base import BaseCommand
+from bots import db
+from bots.db import ConnectionPool
+from bots.finance import add_coins, add_etb
+from bots.game.settlement import RoundOutcome, entries_for, settle_round
+from bots.schema import migrate
+
+
+def _outcome(round_id: int, players: int, stake: float, winners: int) -> RoundOutcome:
+    first = round_id * players
+    seats = {first + i: i % 100 + 1 for i in range(players)}
+    pool = round(stake * players * 0.8, 2)
+    return RoundOutcome(round_id, stake, seats, list(seats)[:winners], pool)
+
+
+def _settle_per_user(outcome: RoundOutcome) -> None:
+    # What the bot would do with the existing helpers: one transaction per change
+    for user_id, _, delta, coins in entries_for(outcome):
+        add_etb(user_id, delta)
+        add_coins(user_id, coins)
+
+
+class Command(BaseCommand):
+    help = "Compare batched round settlement against per-user balance updates"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--players", type=int, default=500)
+        parser.add_argument("--rounds", type=int, default=5)
+        parser.add_argument("--winners", type=int, default=2)
+
+    def handle(self, *args, **options):
+        players, rounds, winners = options["players"], options["rounds"], options["winners"]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            db_file = os.path.join(tmp, "bench.db")
+            migrate(db_file)
+            original_pool = db.bot_pool
+            db.bot_pool = ConnectionPool(2, db_file=db_file)
+            try:
+                self.stdout.write(f"{'mode':<10} {'players':>7} {'ms/round':>9} {'rows/s':>9}")
+                for mode in ("per-user", "batched"):
+                    elapsed = 0.0
+                    for r in range(rounds):
+                        outcome = _outcome(r + 1 if mode == "per-user" else rounds + r + 1, players, 10.0, winners)
+                        t0 = time.perf_counter()
+                        if mode == "per-user":
+                            _settle_per_user(outcome)
+                        else:
+                            settle_round(outcome)
+                        elapsed += time.perf_counter() - t0
+                    per_round = elapsed / rounds
+                    self.stdout.write(f"{mode:<10} {players:>7} {per_round * 1e3:9.1f} {players / per_round:9.0f}")
+
+                replay = _outcome(rounds + 1, players, 10.0, winners)
+                with db.connection() as conn:
+                    before = conn.execute("SELECT SUM(balance_etb), SUM(coin) FROM users").fetchone()
+                applied = settle_round(replay)
+                with db.connection() as conn:
+                    after = conn.execute("SELECT SUM(balance_etb), SUM(coin) FROM users").fetchone()
+                self.stdout.write(f"re-settling round {replay.round_id}: applied={applied}, totals unchanged={before == after}")
+            finally:
+                db.bot_pool.close_all()
+                db.bot_pool = original_pool
@@ -0,0 +1,65 @@
+import hashlib
+import os
+import time
+from django.core.management.base import BaseCommand
+from telegram import Update
+from telegram.ext import Application, TypeHandler
+from bots.management.commands.bench_ingest import BENCH_TOKEN, ReplayBot, replayed_updates
+from bots.sharding import WorkerPool
+
+FACTORY = "bots.management.commands.bench_shards.build_bench_application"
+
+
+def build_bench_application(token: str, primary: bool = True) -> Application:
+    """Worker app whose only handler burns CPU and waits on simulated I/O (settings via env)."""
+    import asyncio
+
+    cpu_rounds = int(os.environ.get("BENCH_SHARD_CPU_ROUNDS", 200))
+    io_wait = float(os.environ.get("BENCH_SHARD_IO_MS", 2.0)) / 1000
+
+    async def work(update, context):
+        digest = str(update.update_id).encode()
+        for _ in range(cpu_rounds):
+            digest = hashlib.sha256(digest).digest()
+        # One DB/Telegram round trip per update
+        await asyncio.sleep(io_wait)
+        context.user_data["last"] = digest
+
+    app = Application.builder().bot(ReplayBot([], 0.0)).build()
+    app.add_handler(TypeHandler(Update, work))
+    return app
+
+
+class Command(BaseCommand):
+    help = "Fan synthetic updates out to 1..N sharded worker processes and report throughput"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--updates", type=int, default=2000)
+        parser.add_argument("--max-workers", type=int, default=8)
+        parser.add_argument("--batch", type=int, default=100, help="updates per getUpdates batch")
+        parser.add_argument("--cpu-rounds", type=int, default=200, help="sha256 rounds per update")
+        parser.add_argument("--io-ms", type=float, default=2.0, help="simulated I/O wait per update")
+
+    def handle(self, *args, **options):
+        os.environ["BENCH_SHARD_CPU_ROUNDS"] = str(options["cpu_rounds"])
+        os.environ["BENCH_SHARD_IO_MS"] = str(options["io_ms"])
+        replay = replayed_updates(options["updates"], users=1000)
+        batch = options["batch"]
+
+        workers = 1
+        baseline = None
+        self.stdout.write(f"{'workers':>7} {'updates/s':>10} {'speedup':>8}")
+        while workers <= options["max_workers"]:
+            pool = WorkerPool(workers, BENCH_TOKEN, factory=FACTORY)
+            pool.start()
+            pool.wait_ready(timeout=60)
+            t0 = time.perf_counter()
+            for i in range(0, len(replay), batch):
+                pool.dispatch(replay[i:i + batch])
+            counts = pool.stop(timeout=120)
+            elapsed = time.perf_counter() - t0
+            assert sum(c for _, c in counts) == len(replay)
+            rate = len(replay) / elapsed
+            baseline = baseline or rate
+            self.stdout.write(f"{workers:>7} {rate:>10.1f} {rate / baseline:>7.2f}x")
+            workers *= 2
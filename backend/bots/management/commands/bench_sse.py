@@ -0,0 +1,116 @@
+import asyncio
+import resource
+import time
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+from bots.game import stream
+from bots.game.engine import GameEngine
+from bots.metrics import LatencyStats
+
+
+class _Probe:
+    """Shared by all clients: when the last number was called and how late each delivery was."""
+
+    def __init__(self):
+        self.last_call = time.perf_counter()
+        self.latency = LatencyStats(window=1)
+        self.connected = 0
+
+
+async def _subscribe(app, room_id: int, probe: _Probe, closed: asyncio.Event) -> None:
+    """One in-memory ASGI client holding an /api/game/events stream open."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/api/game/events", "raw_path": b"/api/game/events",
+        "query_string": f"room={room_id}".encode(), "root_path": "",
+        "headers": [(b"host", b"localhost"), (b"accept", b"text/event-stream")],
+        "client": ("127.0.0.1", 0), "server": ("localhost", 80),
+    }
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await closed.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            if message["status"] == 200:
+                probe.connected += 1
+        elif message["type"] == "http.response.body" and message.get("body", b"").startswith(b"event: call"):
+            probe.latency.record("delivery", time.perf_counter() - probe.last_call)
+
+    await app(scope, receive, send)
+
+
+async def _run(levels: list[int], rooms: int, cadence: float, calls: int, out) -> None:
+    engine = GameEngine(countdown=0.1, call_interval=cadence, stakes=())
+    broadcaster = stream.RoomBroadcaster(engine)
+    # The view and its generator use the module-level engine and broadcaster
+    stream.game_engine = engine
+    stream.broadcaster = broadcaster
+    probe = _Probe()
+
+    def on_call(event, room):
+        if event == "call":
+            probe.last_call = time.perf_counter()
+
+    # Before the broadcaster, so the timestamp precedes the fan-out
+    engine.listeners.insert(0, on_call)
+    await engine.start()
+    room_ids = []
+    for _ in range(rooms):
+        room = engine.open_room(10)
+        room.round.players[room.room_id * 2] = 1
+        room.round.players[room.room_id * 2 + 1] = 2
+        room_ids.append(room.room_id)
+    await asyncio.sleep(0.3)
+
+    app = get_asgi_application()
+    closed = asyncio.Event()
+    tasks: list[asyncio.Task] = []
+    out(f"{'subscribers':>11} {'connect s':>9} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'dropped':>7} {'rss MB':>7}")
+    for level in levels:
+        t0 = time.perf_counter()
+        while len(tasks) < level:
+            tasks.append(asyncio.create_task(_subscribe(app, room_ids[len(tasks) % rooms], probe, closed)))
+            if len(tasks) % 500 == 0:
+                await asyncio.sleep(0)
+        while probe.connected < level and time.perf_counter() - t0 < 120:
+            await asyncio.sleep(0.05)
+        connect = time.perf_counter() - t0
+
+        # Measure over the next `calls` call ticks of every room
+        probe.latency = LatencyStats(window=level * calls * 2)
+        await asyncio.sleep(cadence * calls + 0.5)
+        stats = probe.latency.snapshot().get("delivery", {})
+        rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        out(
+            f"{probe.connected:>11} {connect:>9.1f} {stats.get('p50_ms', 0):>8.1f} {stats.get('p99_ms', 0):>8.1f} "
+            f"{stats.get('max_ms', 0):>8.1f} {broadcaster.dropped:>7} {rss_mb:>7.0f}"
+        )
+        if stats.get("p99_ms", 0) > cadence * 1000 / 4:
+            out(f"p99 delivery exceeds a quarter of the {cadence:g}s cadence; stopping")
+            break
+
+    closed.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await engine.stop()
+
+
+class Command(BaseCommand):
+    help = "Hold N SSE subscribers on /api/game/events in-process and report call delivery latency"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--levels", default="1000,2000,5000,10000", help="cumulative subscriber counts")
+        parser.add_argument("--rooms", type=int, default=10)
+        parser.add_argument("--cadence", type=float, default=4.0, help="seconds between calls")
+        parser.add_argument("--calls", type=int, default=2, help="calls measured per level")
+
+    def handle(self, *args, **options):
+        levels = [int(n) for n in options["levels"].split(",")]
+        asyncio.run(_run(levels, options["rooms"], options["cadence"], options["calls"], self.stdout.write))
+        self.stdout.write("(clients run in the same process, so their cost is included in the figures)")
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from bots.game.cards import CARD_COUNT, CARDS_DIR, write_card_file
+
+
+class Command(BaseCommand):
+    help = "Generate the card set artifact shared by the game engine and the Mini App"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=CARD_COUNT)
+
+    def handle(self, *args, **options):
+        manifest = write_card_file(options["count"])
+        self.stdout.write(f"✅ {manifest['count']} cards -> {CARDS_DIR / manifest['file']} (hash {manifest['hash']})")
+        self.stdout.write("Restart the bot so the engine maps the new set.")
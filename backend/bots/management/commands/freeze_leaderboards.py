@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from bots.periods import freeze_periods
+
+
+class Command(BaseCommand):
+    help = "Snapshot the final standings of every ended day/week/month (the bot also does this every few minutes)"
+
+    def handle(self, *args, **options):
+        frozen = freeze_periods()
+        for period in frozen:
+            self.stdout.write(f"Frozen {period}")
+        self.stdout.write(f"{len(frozen)} period(s) frozen")
@@ -0,0 +1,39 @@
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from bots.game.history import GameLog, load_round, reindex, replay
+
+
+class Command(BaseCommand):
+    help = "Replay logged rounds from the game log for dispute resolution"
+
+    def add_arguments(self, parser):
+        parser.add_argument("round_ids", nargs="*", type=int)
+        parser.add_argument("--reindex", action="store_true", help="rebuild the SQLite index from the segment files first")
+
+    def handle(self, *args, **options):
+        log = GameLog()
+        if options["reindex"]:
+            self.stdout.write(f"Indexed {reindex(log)} rounds from {log.directory}")
+        for round_id in options["round_ids"]:
+            record = load_round(log, round_id)
+            if record is None:
+                raise CommandError(f"Round {round_id} is not in the game log index")
+            result = replay(record)
+            finished = datetime.fromtimestamp(record.finished_at).isoformat(sep=" ", timespec="seconds")
+            self.stdout.write(
+                f"Round {record.round_id}: stake {record.stake} ETB, {len(record.players)} players, "
+                f"seed {record.seed:#018x}, finished {finished}"
+            )
+            self.stdout.write(f"  calls ({record.calls_made}): {' '.join(map(str, record.calls))}")
+            if not result.seed_matches:
+                self.stdout.write(self.style.ERROR("  logged call order does not match the seed"))
+            self.stdout.write(f"  first possible bingo: call {result.first_call}")
+            by_card = {card: user_id for user_id, card in record.players.items()}
+            for card, call_no in sorted(result.completed.items(), key=lambda item: item[1]):
+                self.stdout.write(f"  card {card} (user {by_card[card]}) completed on call {call_no}")
+            for user_id in result.valid_winners:
+                self.stdout.write(self.style.SUCCESS(f"  winner {user_id} verified"))
+            for user_id in result.invalid_winners:
+                self.stdout.write(self.style.ERROR(f"  winner {user_id} has no winning pattern"))
+            if not record.winners:
+                self.stdout.write("  no winner (void round)")
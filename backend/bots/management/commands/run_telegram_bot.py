@@ -1,68 +1,69 @@
-import sqlite3
 import json
 import asyncio
 from datetime import datetime
-from pathlib import Path
 from telegram import BotCommand, Update, InlineKeyboardButton, InlineKeyboardMarkup, WebAppInfo
-from telegram.ext import Application, CommandHandler, ContextTypes, CallbackQueryHandler, MessageHandler, filters
+from telegram.ext import Application, CommandHandler, ContextTypes, MessageHandler, filters
 from telegram.request import HTTPXRequest
 from django.core.management.base import BaseCommand, CommandError
-from django.conf import settings
 import os
+from bots.db import connection, run_read, run_write, shutdown_executors
 from bots.registration import (
-    ensure_users_table,
     handle_register_command,
     handle_contact,
     build_register_keyboard,
-    is_registered,
     send_registration_prompt,
-    ensure_referral_column,
     record_referral_if_missing,
     handle_register_cancel,
 )
-from bots.finance import (
-    ensure_user_finance_columns,
-    get_user_finance,
-    format_balance_block,
-)
+from bots.finance import format_balance_block
 from bots.profile import (
-    ensure_username_column,
     prompt_change_username,
     handle_username_text,
-    get_username,
+    fetch_user_profile,
+    profile_cache,
+    start_profile_sync,
+    stop_profile_sync,
 )
 from bots.invite import send_invite
+from bots.media import reply_photo_cached
+from bots.callbacks import CallbackRegistry
+from bots.metrics import callback_latency
+from bots.schema import migrate
+from bots.persistence import SQLitePersistence
+from bots import sharding, webhook
+from bots.usage import usage_buffer, USAGE_FLUSH_INTERVAL
 from bots.playnow import build_stake_selection, parse_bet_amount
+from bots.game.client import GameUnavailable, game_client
+from bots.game.engine import WON, LATE, REJECTED, NOT_PLAYING
+from bots.game.lobby import CardTaken, InsufficientBalance
+from bots.game.history import recent_rounds
+from bots.leaderboard import leaderboard
+from bots.periods import freeze_periods, PERIOD_FREEZE_INTERVAL
 from bots.deposit import (
     start_deposit,
     handle_text as handle_deposit_text,
     handle_deposit_method,
-    ensure_deposits_table,
-    ensure_admin_txns_table,
     verify_deposit_reference,
 )
 
 # -----------------------
 # Database Setup
 # -----------------------
-# Store DB at the repository root (same location as original usage.db)
-DB_FILE = str(Path(settings.BASE_DIR).parent / "usage.db")
-
-def init_db():
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS usage (
-        user_id INTEGER,
-        username TEXT,
-        month TEXT,
-        PRIMARY KEY(user_id, month)
-    )
-    """)
+# The DB file and connection pool live in bots/db.py; tables, columns and
+# indexes are created by the migrations in bots/schema.py.
+
+
+# Sent through bots.media: uploaded once, then resent by file_id
+START_IMAGE_URL = "https://www.startpage.com/av/proxy-image?piurl=https%3A%2F%2Fchipy.com%2Fupload%2Ftms%2Feasy.png&sp=1759430612Tbdfbf2a1dec897fd82013f50470f7f659732318d8a14f4080514987a8b9b913e"
+WIN_PATTERNS_FILE = "winpattern.jpg"
+
 
-    conn.commit()
-    conn.close()
+CLAIM_REPLIES = {
+    WON: "🎉 BINGO! Card {card} wins game #{round_id}!",
+    LATE: "⌛ Valid BINGO, but another player claimed game #{round_id} first.",
+    REJECTED: "🚫 No winning pattern on card {card}. You are out of game #{round_id}.",
+    NOT_PLAYING: "You are not in a running game for this stake.",
+}
 
 
 def _clean_webapp_url() -> str | None:
@@ -81,33 +82,75 @@ def _clean_webapp_url() -> str | None:
 
 def get_monthly_user_count():
     month = datetime.now().strftime("%Y-%m")
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
+    with connection() as conn:
+        cursor = conn.cursor()
 
-    cursor.execute("SELECT COUNT(*) FROM usage WHERE month = ?", (month,))
-    count = cursor.fetchone()[0]
+        cursor.execute("SELECT COUNT(*) FROM usage WHERE month = ?", (month,))
+        count = cursor.fetchone()[0]
 
-    conn.close()
     return count
 
 
+def get_phone(user_id):
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT phone FROM users WHERE user_id = ?", (user_id,))
+        row = cur.fetchone()
+    return row[0] if row else None
+
+
 def format_user_count(count):
     """Format the user count with comma separators"""
     return f"{count:,}"
 
 
 async def log_user_usage(user_id, username):
-    month = datetime.now().strftime("%Y-%m")
+    # Buffered: rows are written in batches by flush_usage_periodically()
+    if usage_buffer.add(user_id, username):
+        await flush_usage()
 
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
 
-    cursor.execute("""
-    INSERT OR IGNORE INTO usage (user_id, username, month) VALUES (?, ?, ?)
-    """, (user_id, username, month))
+async def flush_usage():
+    try:
+        await run_write(usage_buffer.flush)
+    except Exception as e:
+        print(f"❌ Usage flush failed: {e}")
 
-    conn.commit()
-    conn.close()
+
+async def flush_usage_periodically(interval: float = USAGE_FLUSH_INTERVAL):
+    while True:
+        await asyncio.sleep(interval)
+        await flush_usage()
+
+
+_usage_flusher: asyncio.Task | None = None
+
+
+def start_usage_flusher():
+    global _usage_flusher
+    if _usage_flusher is None:
+        _usage_flusher = asyncio.create_task(flush_usage_periodically())
+
+
+def stop_usage_flusher():
+    global _usage_flusher
+    if _usage_flusher is not None:
+        _usage_flusher.cancel()
+        _usage_flusher = None
+
+
+async def freeze_periods_periodically(interval: float = PERIOD_FREEZE_INTERVAL):
+    # Snapshot the standings of every day/week/month that has ended
+    while True:
+        try:
+            for period in await run_write(freeze_periods):
+                print(f"🏆 Leaderboard {period} frozen")
+        except Exception as e:
+            print(f"❌ Leaderboard freeze failed: {e}")
+        await asyncio.sleep(interval)
+
+
+_period_freezer: asyncio.Task | None = None
 
 
 # -----------------------
@@ -123,12 +166,13 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
             referrer_str = context.args[0].strip()
             if referrer_str.isdigit():
                 ref_id = int(referrer_str)
-                record_referral_if_missing(user.id, ref_id)
+                await run_write(record_referral_if_missing, user.id, ref_id)
     except Exception as e:
         print(f"Referral parse failed: {e}")
 
     # First-time gating: prompt registration if not registered (with share-phone keyboard)
-    if not is_registered(user.id):
+    registered = (await fetch_user_profile(user.id)).registered
+    if not registered:
         await send_registration_prompt(update, context, with_keyboard=True)
 
     webapp_url = _clean_webapp_url()
@@ -158,7 +202,7 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     ]
 
     # Show Register button ONLY for users who are not yet registered, on the SAME row as Play Now
-    if not is_registered(user.id):
+    if not registered:
         keyboard[0].append(InlineKeyboardButton("📱 Register", callback_data="register"))
     reply_markup = InlineKeyboardMarkup(keyboard)
 
@@ -167,11 +211,11 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "🕹️Every Square Counts – Grab Your lucky, Join the Game, and Let the Fun Begin! 🎯\n\n"
     )
 
-    image_url = "https://www.startpage.com/av/proxy-image?piurl=https%3A%2F%2Fchipy.com%2Fupload%2Ftms%2Feasy.png&sp=1759430612Tbdfbf2a1dec897fd82013f50470f7f659732318d8a14f4080514987a8b9b913e"
-
     try:
-        await update.message.reply_photo(
-            photo=image_url,
+        await reply_photo_cached(
+            update.message,
+            "start_banner",
+            START_IMAGE_URL,
             caption=welcome_text,
             reply_markup=reply_markup,
             parse_mode='Markdown',
@@ -185,142 +229,169 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
 
 
-async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+# -----------------------
+# Inline button callbacks (routed by bots.callbacks)
+# -----------------------
+async def show_stake_selection(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    # Show stake selection like the screenshot
+    stake_text, stake_markup = build_stake_selection()
+    # Send a new message (editing may fail if previous message is media)
+    await update.callback_query.message.reply_text(stake_text, reply_markup=stake_markup)
+
+
+async def show_balance(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    # Show formatted balance using a code block
+    # Prefer custom username stored in DB; fallback to Telegram username
     query = update.callback_query
-    await query.answer()
+    profile = await fetch_user_profile(query.from_user.id)
+    username = profile.username or (query.from_user.username or "-")
+    msg = format_balance_block(username, profile.balance_etb, profile.coin)
+    await query.message.reply_text(msg, parse_mode='HTML', disable_web_page_preview=True)
 
-    user = query.from_user
-    await log_user_usage(user.id, user.username or "")
 
-    # First-time gating for button clicks: allow 'register' and 'invite' before registration
-    if query.data not in {"register", "invite"} and not is_registered(user.id):
-        await query.message.reply_text("Before you continue, please finish registration. Use /register. Thanks!")
-        return
+async def show_support(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    # Send the same contact info as the /contact command, as a new message
+    contact_message = (
+        "📞 **Contact Support**\n\n"
+        
+        "For any questions or support, please contact:\n\n"
+        "👤 **Username:** @nftesk\n"
+        "📱 **Phone:** 0934455383\n\n"
+        "We're here to help you! 💫"
+    )
+    await update.callback_query.message.reply_text(contact_message, parse_mode='Markdown', disable_web_page_preview=True)
+
+
+async def show_instructions(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    instructions_text = (
+        "እንኮን ወደ እድለኛ ቢንጎ መጡ\n\n"
+        "1 ለመጫወት ወደቦቱ ሲገቡ register የሚለውን በመንካት ስልክ ቁጥሮትን ያጋሩ\n\n"
+        "2 menu ውስጥ በመግባት deposit fund የሚለውን በመንካት በሚፈልጉት የባንክ አካውንት ገንዘብ ገቢ ያድርጉ \n\n"
+        "3 menu ውስጥ በመግባት start play የሚለውን በመንካት መወራረድ የሚፈልጉበትን የብር መጠን ይምረጡ።\n\n\n"
+        "1 ወደጨዋታው እድገቡ ከሚመጣሎት 100 የመጫወቻ ቁጥሮች መርጠው accept የሚለውን በመንካት የቀጥሉ\n\n"
+        "2 ጨዋታው ለመጀመር የተሰጠውን ጊዜ ሲያልቅ ቁጥሮች መውጣት ይጀምራል\n\n"
+        "3 የሚወጡት ቁጥሮች የመረጡት እድለኛ ላይ መኖሩን እያረጋገጡ ያቅልሙ\n\n"
+        "4 ያቀለሙት አንድ መስመር ወይንም አራት ጠርዝ ላይ ሲመጣ ቢንጎ በማለት ማሸነፍ የችላሉ\n"
+        " —አንድ መስመር ማለት\n"
+        "    አንድ ወደጎን ወይንም ወደታች ወይንም ዲያጎናል ሲዘጉ\n"
+        " — አራት ጠርዝ ልይ ሲመጣሎት \n\n"
+        "5 እነዚህ ማሸነፊያ ቁጥሮች ሳይመጣሎት bingo እሚለውን ከነኩ ከጨዋታው ይባረራሉ\n\n"
+        "ማሳሰቢያ\n\n"
+        "1 የጨዋታ ማስጀመሪያ ሰከንድ (countdown) ሲያልቅ ያሉት ተጫዋች ብዛት ከ2 በታች ከሆነ ያ ጨዋታ አይጀምርም \n"
+        "2 ጨዋታ ከጀመረ በህዋላ እድለኛ መምረጫ ቦርዱ ይፀዳል\n"
+        "3 እርሶ በዘጉበት ቁጥር ሌላ ተጫዋች ዘግቶ ቀድሞ bingo ካለ አሸናፊነትዋን ያጣሉ\n\n"
+        "📝ስለሆነም እንዚህን ማሳሰቢያዎች ተመልክተው እንዲጠቀሙበት እድለኛ ቢንጎ ያሳስባል"
+    )
+    # If the original message is a photo (with caption), editing text fails.
+    # Send a new message instead of editing the original message.
+    await update.callback_query.message.reply_text(instructions_text, disable_web_page_preview=True)
 
-    if query.data == "play_now":
-        # Show stake selection like the screenshot
-        stake_text, stake_markup = build_stake_selection()
-        # Send a new message (editing may fail if previous message is media)
-        await query.message.reply_text(stake_text, reply_markup=stake_markup)
-    elif query.data == "check_balance":
-        # Show formatted balance using a code block
-        # Prefer custom username stored in DB; fallback to Telegram username
-        stored = get_username(query.from_user.id)
-        username = stored or (query.from_user.username or "-")
-        bal, coin = get_user_finance(query.from_user.id)
-        msg = format_balance_block(username, bal, coin)
-        await query.message.reply_text(msg, parse_mode='HTML', disable_web_page_preview=True)
-    elif query.data == "make_deposit":
-        # Start guided deposit flow (min amount block -> ask amount -> method selection)
-        await start_deposit(update, context)
-    elif query.data == "support":
-        # Send the same contact info as the /contact command, as a new message
-        contact_message = (
-            "📞 **Contact Support**\n\n"
-            
-            "For any questions or support, please contact:\n\n"
-            "👤 **Username:** @nftesk\n"
-            "📱 **Phone:** 0934455383\n\n"
-            "We're here to help you! 💫"
-        )
-        await query.message.reply_text(contact_message, parse_mode='Markdown', disable_web_page_preview=True)
-    elif query.data == "instructions":
-        instructions_text = (
-            "እንኮን ወደ እድለኛ ቢንጎ መጡ\n\n"
-            "1 ለመጫወት ወደቦቱ ሲገቡ register የሚለውን በመንካት ስልክ ቁጥሮትን ያጋሩ\n\n"
-            "2 menu ውስጥ በመግባት deposit fund የሚለውን በመንካት በሚፈልጉት የባንክ አካውንት ገንዘብ ገቢ ያድርጉ \n\n"
-            "3 menu ውስጥ በመግባት start play የሚለውን በመንካት መወራረድ የሚፈልጉበትን የብር መጠን ይምረጡ።\n\n\n"
-            "1 ወደጨዋታው እድገቡ ከሚመጣሎት 100 የመጫወቻ ቁጥሮች መርጠው accept የሚለውን በመንካት የቀጥሉ\n\n"
-            "2 ጨዋታው ለመጀመር የተሰጠውን ጊዜ ሲያልቅ ቁጥሮች መውጣት ይጀምራል\n\n"
-            "3 የሚወጡት ቁጥሮች የመረጡት እድለኛ ላይ መኖሩን እያረጋገጡ ያቅልሙ\n\n"
-            "4 ያቀለሙት አንድ መስመር ወይንም አራት ጠርዝ ላይ ሲመጣ ቢንጎ በማለት ማሸነፍ የችላሉ\n"
-            " —አንድ መስመር ማለት\n"
-            "    አንድ ወደጎን ወይንም ወደታች ወይንም ዲያጎናል ሲዘጉ\n"
-            " — አራት ጠርዝ ልይ ሲመጣሎት \n\n"
-            "5 እነዚህ ማሸነፊያ ቁጥሮች ሳይመጣሎት bingo እሚለውን ከነኩ ከጨዋታው ይባረራሉ\n\n"
-            "ማሳሰቢያ\n\n"
-            "1 የጨዋታ ማስጀመሪያ ሰከንድ (countdown) ሲያልቅ ያሉት ተጫዋች ብዛት ከ2 በታች ከሆነ ያ ጨዋታ አይጀምርም \n"
-            "2 ጨዋታ ከጀመረ በህዋላ እድለኛ መምረጫ ቦርዱ ይፀዳል\n"
-            "3 እርሶ በዘጉበት ቁጥር ሌላ ተጫዋች ዘግቶ ቀድሞ bingo ካለ አሸናፊነትዋን ያጣሉ\n\n"
-            "📝ስለሆነም እንዚህን ማሳሰቢያዎች ተመልክተው እንዲጠቀሙበት እድለኛ ቢንጎ ያሳስባል"
-        )
-        # If the original message is a photo (with caption), editing text fails.
-        # Send a new message instead of editing the original message.
-        await query.message.reply_text(instructions_text, disable_web_page_preview=True)
-    elif query.data == "register":
-        await query.message.reply_text(
-            "Please share your phone number to complete registration.",
-            reply_markup=build_register_keyboard(),
-        )
-    elif query.data == "invite":
-        # Send a new message with deep-link instead of editing (editing may fail on media messages)
-        await send_invite(update, context)
-    elif query.data == "win_patterns":
-        win_patterns_text = (
-            "🎯 *From straight lines to funky shapes – every pattern is a chance to WIN BIG!*\n\n"
-            "Know the pattern, play smart, and shout BINGO when the stars align! ✨"
-        )
 
+async def show_register_keyboard(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    await update.callback_query.message.reply_text(
+        "Please share your phone number to complete registration.",
+        reply_markup=build_register_keyboard(),
+    )
+
+
+async def show_win_patterns(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = update.callback_query
+    win_patterns_text = (
+        "🎯 *From straight lines to funky shapes – every pattern is a chance to WIN BIG!*\n\n"
+        "Know the pattern, play smart, and shout BINGO when the stars align! ✨"
+    )
+
+    try:
+        await reply_photo_cached(
+            query.message,
+            "win_patterns",
+            WIN_PATTERNS_FILE,
+            caption=win_patterns_text,
+            parse_mode='Markdown',
+        )
+    except FileNotFoundError:
         try:
-            with open("winpattern.jpg", "rb") as photo:
-                await query.message.reply_photo(
-                    photo=photo,
-                    caption=win_patterns_text,
-                    parse_mode='Markdown',
-                )
-        except FileNotFoundError:
-            try:
-                patterns_image_url = "https://www.startpage.com/av/proxy-image?piurl=https%3A%2F%2Fchipy.com%2Fupload%2Ftms%2Feasy.png&sp=1759430612Tbdfbf2a1dec897fd82013f50470f7f659732318d8a14f4080514987a8b9b913e"
-                await query.message.reply_photo(
-                    photo=patterns_image_url,
-                    caption=win_patterns_text,
-                    parse_mode='Markdown',
-                )
-            except Exception as e:
-                print(f"Win patterns image failed: {e}")
-                await query.message.reply_text(
-                    f"🏆 *Win Patterns*\n\n{win_patterns_text}",
-                    parse_mode='Markdown',
-                )
+            await reply_photo_cached(
+                query.message,
+                "start_banner",
+                START_IMAGE_URL,
+                caption=win_patterns_text,
+                parse_mode='Markdown',
+            )
         except Exception as e:
-            print(f"Win patterns error: {e}")
+            print(f"Win patterns image failed: {e}")
             await query.message.reply_text(
                 f"🏆 *Win Patterns*\n\n{win_patterns_text}",
                 parse_mode='Markdown',
             )
-    elif query.data == "deposit_manual":
-        # User chose manual payment method in the deposit flow
-        await handle_deposit_method(update, context)
-    elif query.data == "change_username":
-        # Start username change flow (handled in profile.py)
-        await prompt_change_username(update, context)
-    elif query.data == "leaderboard":
-        # Open Telegram Mini App (WebApp) for the leaderboard
-        webapp_url = _clean_webapp_url()
-        if not webapp_url:
-            await query.message.reply_text(
-                "Leaderboard is not configured. Set LEADERBOARD_WEBAPP_URL in your environment.")
-        else:
-            await query.message.reply_text(
-                "🏅 Leaderboard",
-                reply_markup=InlineKeyboardMarkup([
-                    [InlineKeyboardButton("Open Leaderboard", web_app=WebAppInfo(url=webapp_url))]
-                ]),
-            )
-    elif query.data.startswith("bet_"):
-        amount = parse_bet_amount(query.data)
-        if amount is None:
-            await query.message.reply_text("Invalid bet selection.")
-        else:
+    except Exception as e:
+        print(f"Win patterns error: {e}")
+        await query.message.reply_text(
+            f"🏆 *Win Patterns*\n\n{win_patterns_text}",
+            parse_mode='Markdown',
+        )
+
+
+async def show_leaderboard(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    # Open Telegram Mini App (WebApp) for the leaderboard
+    query = update.callback_query
+    webapp_url = _clean_webapp_url()
+    if not webapp_url:
+        await query.message.reply_text(
+            "Leaderboard is not configured. Set LEADERBOARD_WEBAPP_URL in your environment.")
+    else:
+        await query.message.reply_text(
+            "🏅 Leaderboard",
+            reply_markup=InlineKeyboardMarkup([
+                [InlineKeyboardButton("Open Leaderboard", web_app=WebAppInfo(url=webapp_url))]
+            ]),
+        )
+
+
+async def choose_stake(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = update.callback_query
+    amount = parse_bet_amount(query.data)
+    if amount is None:
+        await query.message.reply_text("Invalid bet selection.")
+    else:
+        try:
+            lobby = await game_client.lobby(amount)
+        except GameUnavailable as e:
+            print(f"❌ Game lobby unavailable: {e}")
+            lobby = None
+        if lobby is None:
             await query.message.reply_text(
                 f"🎮 You selected {amount} ETB stake. Preparing your game…"
             )
+            return
+        await query.message.reply_text(
+            f"🎮 You selected {amount} ETB stake. Game #{lobby['round']} starts in {round(lobby['starts_in'] or 0)}s "
+            f"({lobby['queue_depth']} players so far). Pick your card to join."
+        )
+
+
+callbacks = CallbackRegistry(log_usage=log_user_usage)
+callbacks.exact("play_now", show_stake_selection)
+callbacks.exact("check_balance", show_balance)
+# Guided deposit flow (min amount block -> ask amount -> method selection)
+callbacks.exact("make_deposit", start_deposit)
+callbacks.exact("support", show_support)
+callbacks.exact("instructions", show_instructions)
+# Allowed before registration
+callbacks.exact("register", show_register_keyboard, requires_registration=False)
+callbacks.exact("invite", send_invite, requires_registration=False)
+callbacks.exact("win_patterns", show_win_patterns)
+# Continuations of a flow whose first click was already logged
+callbacks.exact("deposit_manual", handle_deposit_method, log_usage=False)
+callbacks.exact("change_username", prompt_change_username)
+callbacks.exact("leaderboard", show_leaderboard)
+callbacks.prefix("bet_", choose_stake, log_usage=False)
 
 
 async def play(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user = update.effective_user
     await log_user_usage(user.id, user.username or "")
-    if not is_registered(user.id):
+    if not (await fetch_user_profile(user.id)).registered:
         await send_registration_prompt(update, context, with_keyboard=True)
         return
     await update.message.reply_text("🎮 Starting a new Bingo game...")
@@ -330,13 +401,12 @@ async def balance(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Reply with the user's balance in the requested copied-code style."""
     user = update.effective_user
     await log_user_usage(user.id, user.username or "")
-    if not is_registered(user.id):
+    profile = await fetch_user_profile(user.id)
+    if not profile.registered:
         await send_registration_prompt(update, context, with_keyboard=True)
         return
-    bal, coin = get_user_finance(user.id)
-    stored = get_username(user.id)
-    username = stored or (user.username or "-")
-    msg = format_balance_block(username, bal, coin)
+    username = profile.username or (user.username or "-")
+    msg = format_balance_block(username, profile.balance_etb, profile.coin)
     await update.message.reply_text(msg, parse_mode='HTML', disable_web_page_preview=True)
 
 
@@ -344,16 +414,35 @@ async def deposit(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Start the same guided deposit flow as the Make a Deposit button."""
     user = update.effective_user
     await log_user_usage(user.id, user.username or "")
-    if not is_registered(user.id):
+    if not (await fetch_user_profile(user.id)).registered:
         await send_registration_prompt(update, context, with_keyboard=True)
         return
     await start_deposit(update, context)
 
 
+async def game_history(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Reply with the user's last rounds from the game log index."""
+    user = update.effective_user
+    await log_user_usage(user.id, user.username or "")
+    if not (await fetch_user_profile(user.id)).registered:
+        await send_registration_prompt(update, context, with_keyboard=True)
+        return
+    rows = await run_read(recent_rounds, user.id, 10)
+    if not rows:
+        await update.message.reply_text("You have not played any games yet. Tap /play to join one!")
+        return
+    lines = ["🎮 Your last games:"]
+    for round_id, stake, card, won, calls, players, finished_at in rows:
+        when = datetime.fromtimestamp(finished_at).strftime("%b %d %H:%M")
+        result = "🏆 Won" if won else "Lost"
+        lines.append(f"#{round_id} · {stake} ETB · card {card} · {result} · {calls} calls · {players} players · {when}")
+    await update.message.reply_text("\n".join(lines))
+
+
 async def contact(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user = update.effective_user
     await log_user_usage(user.id, user.username or "")
-    if not is_registered(user.id):
+    if not (await fetch_user_profile(user.id)).registered:
         await send_registration_prompt(update, context, with_keyboard=True)
         return
 
@@ -393,7 +482,7 @@ async def set_commands(application: Application):
 
 
 async def update_bio_once(application: Application):
-    user_count = get_monthly_user_count()
+    user_count = await run_read(get_monthly_user_count)
     formatted_count = format_user_count(user_count)
     bio_text = f"{formatted_count} monthly users"
 
@@ -404,201 +493,311 @@ async def update_bio_once(application: Application):
         print(f"❌ Failed to update bot bio: {e}")
 
 
-class Command(BaseCommand):
-    help = "Run the Telegram bot"
+# Handle WebApp data events from the Mini App (Verify button)
+async def handle_webapp_data(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    msg = update.effective_message or update.message
+    if not msg:
+        print("[WEBAPP] No message found on update")
+        return
+    wad = getattr(msg, "web_app_data", None)
+    if not wad:
+        # Not a WebApp data message; ignore silently
+        return
+    print(f"[WEBAPP] Received web_app_data: {wad.data!r}")
+    try:
+        data = json.loads(wad.data or "{}")
+    except Exception as e:
+        print(f"[WEBAPP] JSON parse error: {e}")
+        try:
+            await msg.reply_text("Invalid data from Mini App.")
+        except Exception as e2:
+            print(f"[WEBAPP] Reply failed: {e2}")
+        return
 
-    def handle(self, *args, **options):
-        init_db()
-        ensure_users_table()
-        ensure_user_finance_columns()
-        ensure_username_column()
-        ensure_referral_column()
-        ensure_deposits_table()
-        ensure_admin_txns_table()
-
-        # Read token from environment (.env is loaded by Django settings)
-        token = os.environ.get("TELEGRAM_BOT_TOKEN")
-        if not token:
-            raise CommandError("TELEGRAM_BOT_TOKEN is not set. Add it to your .env at the repository root.")
-
-        # Optional network configuration from .env (use higher defaults for slow networks)
-        connect_timeout = float(os.environ.get("TELEGRAM_HTTP_CONNECT_TIMEOUT", 30))
-        read_timeout = float(os.environ.get("TELEGRAM_HTTP_READ_TIMEOUT", 90))
-
-        # Note: python-telegram-bot==20.3 HTTPXRequest does not accept a 'proxy' kwarg.
-        # If you need a proxy, set environment variables HTTPS_PROXY/HTTP_PROXY instead.
-        request = HTTPXRequest(
-            connect_timeout=connect_timeout,
-            read_timeout=read_timeout,
+    if data.get("type") == "verify_deposit":
+        method = data.get("method")
+        amount = None
+        if str(data.get("amount") or "").strip():
+            try:
+                amount = float(str(data.get("amount")).replace(",", "").strip())
+            except Exception:
+                amount = None
+        reference = data.get("ref") or data.get("reference") or ""
+        ok, message = await run_write(
+            verify_deposit_reference, update.effective_user.id, method, amount, reference
         )
+        try:
+            await msg.reply_text(message)
+        except Exception as e2:
+            print(f"[WEBAPP] Reply send failed: {e2}")
+    elif data.get("type") == "choose_card":
+        try:
+            stake = int(data.get("stake"))
+            card = int(data.get("card"))
+        except (TypeError, ValueError):
+            await msg.reply_text("Invalid card selection.")
+            return
+        try:
+            seat = await game_client.join(stake, update.effective_user.id, card)
+        except GameUnavailable as e:
+            print(f"❌ Game join not forwarded: {e}")
+            await msg.reply_text("No game is open for this stake right now.")
+            return
+        except CardTaken:
+            await msg.reply_text(f"Card {card} was just taken by another player. Please pick another card.")
+            return
+        except InsufficientBalance:
+            # The stake is debited when joining, so a balance can only cover the rounds it pays for
+            await msg.reply_text(f"Your balance is below the {stake} ETB stake. Please make a deposit first.")
+            return
+        except ValueError:
+            await msg.reply_text("Invalid card selection.")
+            return
+        try:
+            await msg.reply_text(f"✅ Card {card} joined game #{seat['round']}. Starting in {round(seat['starts_in'])}s.")
+        except Exception as e2:
+            print(f"[WEBAPP] Reply send failed: {e2}")
+    elif data.get("type") == "claim_bingo":
+        try:
+            stake = int(data.get("stake"))
+        except (TypeError, ValueError):
+            await msg.reply_text("Invalid claim.")
+            return
+        try:
+            result = await game_client.claim(stake, update.effective_user.id)
+        except (GameUnavailable, ValueError) as e:
+            print(f"❌ Game claim not forwarded: {e}")
+            await msg.reply_text("The game server is unavailable right now. Please try again.")
+            return
+        try:
+            await msg.reply_text(CLAIM_REPLIES[result.status].format(round_id=result.round_id, card=result.card))
+        except Exception as e2:
+            print(f"[WEBAPP] Reply send failed: {e2}")
+    elif data.get("type") == "notify_support":
+        # Forward a deposit notification to support and request a screenshot upload next
+        method = str(data.get("method") or "-")
+        amount_raw = str(data.get("amount") or "-")
+        amount_str = amount_raw
+        user = update.effective_user
+
+        # Lookup user's stored phone from registration DB
+        phone = None
+        try:
+            phone = await run_read(get_phone, user.id)
+        except Exception as e:
+            print(f"[WEBAPP] phone lookup failed: {e}")
 
-        app = (
-            Application.builder()
-            .token(token)
-            .request(request)
-            .build()
+        support_target = os.environ.get("SUPPORT_TARGET", "@Afamedawa")
+
+        info_block = (
+            "Deposit notification\n"
+            f"Method: {method}\n"
+            f"Amount: {amount_str} ETB\n"
+            f"From: {user.full_name} (@{user.username or '-'}, id:{user.id})\n"
+            f"Phone: {phone or '-'}\n"
+            "Receipt: user will send a screenshot next."
         )
 
-        app.add_handler(CommandHandler("start", start))
-        app.add_handler(CommandHandler("play", play))
-        app.add_handler(CommandHandler("balance", balance))
-        app.add_handler(CommandHandler("deposit", deposit))
-        app.add_handler(CommandHandler("register", handle_register_command))
-        app.add_handler(CommandHandler("invite", send_invite))
-        app.add_handler(CommandHandler("contact", contact))
-        app.add_handler(CallbackQueryHandler(button_handler))
-        app.add_handler(MessageHandler(filters.CONTACT, handle_contact))
-        # Register Cancel handler BEFORE the generic text handler (case-insensitive)
-        app.add_handler(MessageHandler(filters.TEXT & filters.Regex("(?i)^cancel$"), handle_register_cancel))
-        # Handle WebApp data events from the Mini App (Verify button)
-        async def handle_webapp_data(update: Update, context: ContextTypes.DEFAULT_TYPE):
-            msg = update.effective_message or update.message
-            if not msg:
-                print("[WEBAPP] No message found on update")
-                return
-            wad = getattr(msg, "web_app_data", None)
-            if not wad:
-                # Not a WebApp data message; ignore silently
-                return
-            print(f"[WEBAPP] Received web_app_data: {wad.data!r}")
-            try:
-                data = json.loads(wad.data or "{}")
-            except Exception as e:
-                print(f"[WEBAPP] JSON parse error: {e}")
-                try:
-                    await msg.reply_text("Invalid data from Mini App.")
-                except Exception as e2:
-                    print(f"[WEBAPP] Reply failed: {e2}")
-                return
-
-            if data.get("type") == "verify_deposit":
-                method = data.get("method")
-                amount = None
-                if str(data.get("amount") or "").strip():
-                    try:
-                        amount = float(str(data.get("amount")).replace(",", "").strip())
-                    except Exception:
-                        amount = None
-                reference = data.get("ref") or data.get("reference") or ""
-                ok, message = verify_deposit_reference(update.effective_user.id, method, amount, reference)
-                try:
-                    await msg.reply_text(message)
-                except Exception as e2:
-                    print(f"[WEBAPP] Reply send failed: {e2}")
-            elif data.get("type") == "notify_support":
-                # Forward a deposit notification to support and request a screenshot upload next
-                method = str(data.get("method") or "-")
-                amount_raw = str(data.get("amount") or "-")
-                amount_str = amount_raw
-                user = update.effective_user
-
-                # Lookup user's stored phone from registration DB
-                phone = None
-                try:
-                    conn = sqlite3.connect(DB_FILE)
-                    cur = conn.cursor()
-                    cur.execute("SELECT phone FROM users WHERE user_id = ?", (user.id,))
-                    row = cur.fetchone()
-                    phone = row[0] if row else None
-                except Exception as e:
-                    print(f"[WEBAPP] phone lookup failed: {e}")
-                finally:
-                    try:
-                        conn.close()
-                    except Exception:
-                        pass
-
-                support_target = os.environ.get("SUPPORT_TARGET", "@Afamedawa")
-
-                info_block = (
-                    "Deposit notification\n"
-                    f"Method: {method}\n"
-                    f"Amount: {amount_str} ETB\n"
-                    f"From: {user.full_name} (@{user.username or '-'}, id:{user.id})\n"
-                    f"Phone: {phone or '-'}\n"
-                    "Receipt: user will send a screenshot next."
-                )
-
-                # Try notifying support chat/channel immediately
-                try:
-                    await context.bot.send_message(chat_id=support_target, text=info_block)
-                except Exception as e:
-                    print(f"[WEBAPP] notify support failed: {e}")
-
-                # Mark that we are awaiting a receipt photo from this user
-                context.user_data["awaiting_receipt"] = {
-                    "method": method,
-                    "amount": amount_str,
-                    "phone": phone,
-                    "support_target": support_target,
-                }
-
-                try:
-                    await msg.reply_text("Your message was sent successfully. Please send your receipt screenshot now.")
-                except Exception as e2:
-                    print(f"[WEBAPP] Reply send failed: {e2}")
-            else:
-                print(f"[WEBAPP] Unhandled type: {data.get('type')} ")
-                return
-
-        # Register handler for WebApp data (PTB v20):
+        # Try notifying support chat/channel immediately
         try:
-            app.add_handler(MessageHandler(filters.StatusUpdate.WEB_APP_DATA, handle_webapp_data))
+            await context.bot.send_message(chat_id=support_target, text=info_block)
+        except Exception as e:
+            print(f"[WEBAPP] notify support failed: {e}")
+
+        # Mark that we are awaiting a receipt photo from this user
+        context.user_data["awaiting_receipt"] = {
+            "method": method,
+            "amount": amount_str,
+            "phone": phone,
+            "support_target": support_target,
+        }
+
+        try:
+            await msg.reply_text("Your message was sent successfully. Please send your receipt screenshot now.")
+        except Exception as e2:
+            print(f"[WEBAPP] Reply send failed: {e2}")
+    else:
+        print(f"[WEBAPP] Unhandled type: {data.get('type')} ")
+        return
+
+
+# When the user sends a photo after notify_support, forward it to support with context
+async def handle_user_photo(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    user = update.effective_user
+    data = context.user_data.get("awaiting_receipt")
+    if not data:
+        # Not expecting a receipt; ignore graceful
+        return
+    support_target = data.get("support_target") or os.environ.get("SUPPORT_TARGET", "@Afamedawa")
+    method = data.get("method") or "-"
+    amount_str = data.get("amount") or "-"
+    phone = data.get("phone") or "-"
+
+    caption = (
+        "Deposit receipt\n"
+        f"Method: {method}\n"
+        f"Amount: {amount_str} ETB\n"
+        f"From: {user.full_name} (@{user.username or '-'}, id:{user.id})\n"
+        f"Phone: {phone}"
+    )
+
+    try:
+        await context.bot.copy_message(
+            chat_id=support_target,
+            from_chat_id=update.effective_chat.id,
+            message_id=update.message.message_id,
+            caption=caption,
+        )
+        await update.message.reply_text("Thanks! Your screenshot has been forwarded to support. We will review and credit you shortly.")
+        # Clear awaiting flag
+        context.user_data.pop("awaiting_receipt", None)
+    except Exception as e:
+        print(f"[PHOTO] forward failed: {e}")
+        try:
+            await update.message.reply_text("Failed to forward screenshot to support. Please try again later.")
         except Exception:
-            # Fallback: register with a generic message filter and self-guard in the handler
-            app.add_handler(MessageHandler(filters.ALL, handle_webapp_data))
-        
-        # When the user sends a photo after notify_support, forward it to support with context
-        async def handle_user_photo(update: Update, context: ContextTypes.DEFAULT_TYPE):
-            user = update.effective_user
-            data = context.user_data.get("awaiting_receipt")
-            if not data:
-                # Not expecting a receipt; ignore graceful
-                return
-            support_target = data.get("support_target") or os.environ.get("SUPPORT_TARGET", "@Afamedawa")
-            method = data.get("method") or "-"
-            amount_str = data.get("amount") or "-"
-            phone = data.get("phone") or "-"
-
-            caption = (
-                "Deposit receipt\n"
-                f"Method: {method}\n"
-                f"Amount: {amount_str} ETB\n"
-                f"From: {user.full_name} (@{user.username or '-'}, id:{user.id})\n"
-                f"Phone: {phone}"
-            )
+            pass
 
-            try:
-                await context.bot.copy_message(
-                    chat_id=support_target,
-                    from_chat_id=update.effective_chat.id,
-                    message_id=update.message.message_id,
-                    caption=caption,
-                )
-                await update.message.reply_text("Thanks! Your screenshot has been forwarded to support. We will review and credit you shortly.")
-                # Clear awaiting flag
-                context.user_data.pop("awaiting_receipt", None)
-            except Exception as e:
-                print(f"[PHOTO] forward failed: {e}")
-                try:
-                    await update.message.reply_text("Failed to forward screenshot to support. Please try again later.")
-                except Exception:
-                    pass
-
-        app.add_handler(MessageHandler(filters.PHOTO, handle_user_photo))
-        # Deposit handlers first (amount then reference), before generic username handler
-        app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_deposit_text))
-        app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_username_text))
-
-        async def on_startup(app_instance):
-            try:
-                await set_commands(app_instance)
-                await update_bio_once(app_instance)
-            except Exception as e:
-                print(f"❌ Startup setup failed: {e}")
-            print("✅ Bot setup completed")
 
-        app.post_init = on_startup
+async def on_startup(app_instance):
+    try:
+        await set_commands(app_instance)
+        await update_bio_once(app_instance)
+    except Exception as e:
+        print(f"❌ Startup setup failed: {e}")
+    start_usage_flusher()
+    start_profile_sync()
+    global _period_freezer
+    if _period_freezer is None:
+        _period_freezer = asyncio.create_task(freeze_periods_periodically())
+    print("✅ Bot setup completed")
+
+
+async def on_worker_startup(app_instance):
+    # Secondary shard workers: bot commands and bio are set by worker 0
+    start_usage_flusher()
+    start_profile_sync()
+
+
+async def on_stop(app_instance):
+    global _period_freezer
+    stop_usage_flusher()
+    stop_profile_sync()
+    if _period_freezer is not None:
+        _period_freezer.cancel()
+        _period_freezer = None
+    await game_client.close()
+
+
+async def on_shutdown(app_instance):
+    # Write any buffered usage rows, then let queued DB writes finish
+    await flush_usage()
+    print(f"✅ Usage buffer flushed: {usage_buffer.stats()}")
+    print(f"📊 Profile cache: {profile_cache.stats()}")
+    print(f"🏅 Leaderboard: {leaderboard.stats()}")
+    print(f"🎲 Game engine calls forwarded: {game_client.stats()}")
+    for name, stats in callback_latency.snapshot().items():
+        print(f"⏱️ Callback {name}: {stats}")
+    if isinstance(app_instance.persistence, SQLitePersistence):
+        print(f"💾 User state: {app_instance.persistence.loaded} loaded, {app_instance.persistence.written} written")
+    shutdown_executors(wait=True)
+
+
+def build_application(token: str, primary: bool = True) -> Application:
+    """Build the bot Application with all handlers; shared by polling, webhook and shard workers.
+
+    Only the primary instance sets bot commands and the bio on startup.
+    """
+    # Optional network configuration from .env (use higher defaults for slow networks)
+    connect_timeout = float(os.environ.get("TELEGRAM_HTTP_CONNECT_TIMEOUT", 30))
+    read_timeout = float(os.environ.get("TELEGRAM_HTTP_READ_TIMEOUT", 90))
+
+    # Note: python-telegram-bot==20.3 HTTPXRequest does not accept a 'proxy' kwarg.
+    # If you need a proxy, set environment variables HTTPS_PROXY/HTTP_PROXY instead.
+    request = HTTPXRequest(
+        connect_timeout=connect_timeout,
+        read_timeout=read_timeout,
+    )
+
+    app = (
+        Application.builder()
+        .token(token)
+        .request(request)
+        .persistence(SQLitePersistence())
+        .build()
+    )
+
+    app.add_handler(CommandHandler("start", start))
+    app.add_handler(CommandHandler("play", play))
+    app.add_handler(CommandHandler("balance", balance))
+    app.add_handler(CommandHandler("deposit", deposit))
+    app.add_handler(CommandHandler("register", handle_register_command))
+    app.add_handler(CommandHandler("invite", send_invite))
+    app.add_handler(CommandHandler("contact", contact))
+    app.add_handler(CommandHandler("game", game_history))
+    for handler in callbacks.handlers():
+        app.add_handler(handler)
+    app.add_handler(MessageHandler(filters.CONTACT, handle_contact))
+    # Register Cancel handler BEFORE the generic text handler (case-insensitive)
+    app.add_handler(MessageHandler(filters.TEXT & filters.Regex("(?i)^cancel$"), handle_register_cancel))
+    # Register handler for WebApp data (PTB v20):
+    try:
+        app.add_handler(MessageHandler(filters.StatusUpdate.WEB_APP_DATA, handle_webapp_data))
+    except Exception:
+        # Fallback: register with a generic message filter and self-guard in the handler
+        app.add_handler(MessageHandler(filters.ALL, handle_webapp_data))
+
+    app.add_handler(MessageHandler(filters.PHOTO, handle_user_photo))
+    # Deposit handlers first (amount then reference), before generic username handler
+    app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_deposit_text))
+    app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_username_text))
+
+    app.post_init = on_startup if primary else on_worker_startup
+    app.post_stop = on_stop
+    app.post_shutdown = on_shutdown
+    return app
+
+
+def get_bot_token() -> str:
+    # Read token from environment (.env is loaded by Django settings)
+    token = os.environ.get("TELEGRAM_BOT_TOKEN")
+    if not token:
+        raise CommandError("TELEGRAM_BOT_TOKEN is not set. Add it to your .env at the repository root.")
+    return token
+
+
+class Command(BaseCommand):
+    help = "Run the Telegram bot (polling), or register the webhook served by core.asgi"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Polling mode: shard updates by user_id across N worker processes (default: TELEGRAM_WORKERS or 1)",
+        )
+
+    def handle(self, *args, **options):
+        migrate()
+        token = get_bot_token()
+
+        if webhook.update_mode() == "webhook":
+            # Updates are received by the ASGI app (core.asgi -> /telegram/webhook);
+            # this command only points Telegram at it.
+            try:
+                url = asyncio.run(webhook.register_webhook(token))
+            except ValueError as e:
+                raise CommandError(str(e))
+            print(f"✅ Webhook registered: {url}")
+            print("🌐 Serve core.asgi (e.g. `uvicorn core.asgi:application`) to process updates.")
+            return
+
+        workers = options.get("workers") or sharding.configured_workers()
+        if workers > 1:
+            sharding.run_sharded(token, workers)
+            return
+
+        app = build_application(token)
 
         print("🤖 Bot is starting (via Django management command)...")
 
@@ -0,0 +1,123 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from bots.game.cards import card_set, win_lines
+from bots.game.engine import DECK_SIZE, GAME_CALL_INTERVAL, GAME_COUNTDOWN_SECONDS, GAME_HOUSE_CUT, STAKES
+from bots.game.settlement import GAME_PLAY_COINS, GAME_WIN_COINS
+
+try:
+    import numpy as np
+except ImportError:  # only this command needs it
+    np = None
+
+# WIN_MASKS order: 5 rows, 5 columns, 2 diagonals, then the four corners
+PATTERNS = ("row",) * 5 + ("column",) * 5 + ("diagonal",) * 2 + ("corners",)
+CHUNK = 8192
+
+
+def _line_table(cards: int | None):
+    """(cards, patterns, 5) numbers on each card's winning lines, padded with 0 (always marked)."""
+    lines = win_lines(cards)
+    table = np.zeros((len(lines), len(PATTERNS), 5), dtype=np.intp)
+    for c, card_lines in enumerate(lines):
+        for p, line in enumerate(card_lines):
+            table[c, p, :len(line)] = line
+    return table
+
+
+def _simulate_chunk(rng, table, rounds: int, players: list[int]) -> dict:
+    cards = table.shape[0]
+    # position[n, r] = call on which number n comes out in round r; row 0 stands for the free cell.
+    # Rounds run along the last axis so the gathers below copy whole rows.
+    position = np.zeros((DECK_SIZE + 1, rounds), dtype=np.int8)
+    position[1:] = np.argsort(rng.random((DECK_SIZE, rounds)), axis=0) + 1
+    # A line completes on its latest number; a card on its earliest line
+    line_calls = position[table].max(axis=2)
+    card_calls = np.ascontiguousarray(line_calls.min(axis=1).T)
+    # Seat order: the first k cards of a random order are the cards of a k-player round
+    order = np.argsort(rng.random((rounds, cards)), axis=1)[:, :max(players)]
+    seated = np.take_along_axis(card_calls, order, axis=1)
+    first_win = np.minimum.accumulate(seated, axis=1)
+    every_round = np.arange(rounds)
+    result = {}
+    for k in players:
+        win_call = first_win[:, k - 1]
+        completing = seated[:, :k] == win_call[:, None]
+        tied = completing.sum(axis=1)
+        # The earliest-seated completing card stands in for the earliest claim
+        winner = order[every_round, completing.argmax(axis=1)]
+        pattern = line_calls[winner, :, every_round].argmin(axis=1)
+        result[k] = (win_call, tied, pattern)
+    return result
+
+
+class Command(BaseCommand):
+    help = "Monte Carlo rounds over the card set: calls to first win, tied winners and house margin per stake"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rounds", type=int, default=1_000_000)
+        parser.add_argument("--players", default="2,5,10,20,50,100,200", help="player counts to report")
+        parser.add_argument("--cards", type=int, default=None, help="simulate a generated set of this size instead of the current one")
+        parser.add_argument("--coin-value", type=float, default=1.0, help="ETB cost of one coin paid out")
+        parser.add_argument("--seed", type=int, default=None)
+
+    def handle(self, *args, **options):
+        if np is None:
+            raise CommandError("NumPy is required for this command: pip install numpy")
+        players = sorted({int(n) for n in options["players"].split(",")})
+        total = options["rounds"]
+        cards = options["cards"] or len(card_set())
+        if players[0] < 1 or players[-1] > cards:
+            raise CommandError(f"Player counts must be between 1 and the {cards} cards")
+        rng = np.random.default_rng(options["seed"])
+        table = _line_table(options["cards"])
+
+        t0 = time.perf_counter()
+        calls = {k: np.zeros(DECK_SIZE + 1, dtype=np.int64) for k in players}
+        ties = {k: np.zeros(cards + 1, dtype=np.int64) for k in players}
+        patterns = {k: np.zeros(len(PATTERNS), dtype=np.int64) for k in players}
+        done = 0
+        while done < total:
+            n = min(CHUNK, total - done)
+            for k, (win_call, tied, pattern) in _simulate_chunk(rng, table, n, players).items():
+                calls[k] += np.bincount(win_call, minlength=DECK_SIZE + 1)
+                ties[k] += np.bincount(tied, minlength=cards + 1)
+                patterns[k] += np.bincount(pattern, minlength=len(PATTERNS))
+            done += n
+        elapsed = time.perf_counter() - t0
+        self.stdout.write(f"{total} rounds over {cards} cards in {elapsed:.1f}s ({total / elapsed:,.0f} rounds/s)\n")
+
+        self.stdout.write("Calls to first win")
+        self.stdout.write(f"{'players':>7} {'mean':>6} {'p5':>4} {'p50':>4} {'p95':>4} {'ties':>6} {'P(tie)':>7}  winning pattern")
+        mean_calls = {}
+        for k in players:
+            cdf = np.cumsum(calls[k]) / total
+            p5, p50, p95 = (int(np.searchsorted(cdf, q)) for q in (0.05, 0.5, 0.95))
+            mean_calls[k] = float((np.arange(DECK_SIZE + 1) * calls[k]).sum() / total)
+            mean_tied = float((np.arange(cards + 1) * ties[k]).sum() / total)
+            p_tie = 1 - ties[k][1] / total
+            shares = {}
+            for name, count in zip(PATTERNS, patterns[k]):
+                shares[name] = shares.get(name, 0) + count / total
+            mix = " ".join(f"{name} {share:.0%}" for name, share in shares.items())
+            self.stdout.write(
+                f"{k:>7} {mean_calls[k]:>6.1f} {p5:>4} {p50:>4} {p95:>4} {mean_tied:>6.2f} {p_tie:>7.1%}  {mix}"
+            )
+
+        coin_value = options["coin_value"]
+        self.stdout.write(
+            f"\nHouse margin (cut {GAME_HOUSE_CUT:.0%}, {GAME_PLAY_COINS:g} coins per player, "
+            f"{GAME_WIN_COINS:g} per winner, coin = {coin_value:g} ETB, one winner per round)"
+        )
+        self.stdout.write(
+            f"{'stake':>5} {'players':>7} {'derash':>8} {'house':>8} {'margin':>7} {'round s':>8} {'house/h':>9}"
+        )
+        for stake in STAKES:
+            for k in players:
+                stakes_in = stake * k
+                derash = round(stakes_in * (1 - GAME_HOUSE_CUT), 2)
+                house = stakes_in - derash - coin_value * (k * GAME_PLAY_COINS + GAME_WIN_COINS)
+                seconds = GAME_COUNTDOWN_SECONDS + mean_calls[k] * GAME_CALL_INTERVAL
+                self.stdout.write(
+                    f"{stake:>5} {k:>7} {derash:>8.2f} {house:>8.2f} {house / stakes_in:>7.1%} "
+                    f"{seconds:>8.0f} {house * 3600 / seconds:>9.0f}"
+                )
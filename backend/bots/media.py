@@ -0,0 +1,93 @@
+"""Send each media asset to Telegram once, then reuse its file_id.
+
+The first send of an asset uploads it (a local file) or lets Telegram fetch it
+(a URL) and records the returned file_id in `media_files`. Later sends pass the
+file_id, which Telegram serves from its own storage. If Telegram rejects a
+stored file_id, it is dropped and the asset is sent from its source again.
+A changed source (new URL or path) invalidates the stored id automatically.
+"""
+import asyncio
+from telegram import Message
+from telegram.error import BadRequest
+from bots.db import connection, run_read, run_write
+
+# asset -> (source, file_id); filled lazily from the DB
+_file_ids: dict[str, tuple[str, str]] = {}
+_upload_locks: dict[str, asyncio.Lock] = {}
+
+
+def _load_file_id(asset: str) -> tuple[str, str] | None:
+    with connection() as conn:
+        row = conn.execute("SELECT source, file_id FROM media_files WHERE asset = ?", (asset,)).fetchone()
+    return (row[0], row[1]) if row else None
+
+
+def _save_file_id(asset: str, source: str, file_id: str) -> None:
+    with connection() as conn:
+        conn.execute(
+            """
+            INSERT INTO media_files (asset, source, file_id, updated_at) VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(asset) DO UPDATE SET
+                source = excluded.source, file_id = excluded.file_id, updated_at = excluded.updated_at
+            """,
+            (asset, source, file_id),
+        )
+        conn.commit()
+
+
+def _delete_file_id(asset: str) -> None:
+    with connection() as conn:
+        conn.execute("DELETE FROM media_files WHERE asset = ?", (asset,))
+        conn.commit()
+
+
+async def _cached_file_id(asset: str, source: str) -> str | None:
+    entry = _file_ids.get(asset)
+    if entry is None:
+        entry = await run_read(_load_file_id, asset)
+        if entry is not None:
+            _file_ids[asset] = entry
+    if entry is None or entry[0] != source:
+        return None
+    return entry[1]
+
+
+async def forget_file_id(asset: str) -> None:
+    _file_ids.pop(asset, None)
+    await run_write(_delete_file_id, asset)
+
+
+async def reply_photo_cached(message: Message, asset: str, source: str, **kwargs) -> Message:
+    """reply_photo for a named asset whose source is an https URL or a local file path.
+
+    Raises FileNotFoundError when the file is missing and no file_id is stored,
+    like a plain open() would.
+    """
+    file_id = await _cached_file_id(asset, source)
+    if file_id:
+        try:
+            return await message.reply_photo(photo=file_id, **kwargs)
+        except BadRequest as e:
+            print(f"⚠️ Stored file_id for {asset} rejected ({e}); sending from source")
+            await forget_file_id(asset)
+
+    lock = _upload_locks.setdefault(asset, asyncio.Lock())
+    async with lock:
+        # Another send may have uploaded it while we waited
+        file_id = await _cached_file_id(asset, source)
+        if file_id:
+            return await message.reply_photo(photo=file_id, **kwargs)
+        if source.lower().startswith(("http://", "https://")):
+            sent = await message.reply_photo(photo=source, **kwargs)
+        else:
+            with open(source, "rb") as photo:
+                sent = await message.reply_photo(photo=photo, **kwargs)
+        if sent.photo:
+            # Largest size; Telegram reuses it for every size on resend
+            new_id = sent.photo[-1].file_id
+            _file_ids[asset] = (source, new_id)
+            try:
+                await run_write(_save_file_id, asset, source, new_id)
+            except Exception as e:
+                print(f"❌ Failed to store file_id for {asset}: {e}")
+        return sent
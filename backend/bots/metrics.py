@@ -0,0 +1,52 @@
+import threading
+from collections import deque
+
+LATENCY_WINDOW = 1024
+
+
+class LatencyStats:
+    """Per-name latency counters with percentiles over the last `window` samples."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples: dict[str, deque] = {}
+        self._counts: dict[str, int] = {}
+        self._totals: dict[str, float] = {}
+
+    def record(self, name: str, seconds: float) -> None:
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self.window)
+                self._counts[name] = 0
+                self._totals[name] = 0.0
+            samples.append(seconds)
+            self._counts[name] += 1
+            self._totals[name] += seconds
+
+    def snapshot(self) -> dict[str, dict]:
+        """{name: {count, mean_ms, p50_ms, p95_ms, p99_ms, max_ms}}; percentiles cover the window."""
+        with self._lock:
+            items = [(name, sorted(s), self._counts[name], self._totals[name]) for name, s in self._samples.items()]
+        result = {}
+        for name, ordered, count, total in items:
+            last = len(ordered) - 1
+            result[name] = {
+                "count": count,
+                "mean_ms": round(total / count * 1000, 3),
+                "p50_ms": round(ordered[round(last * 0.5)] * 1000, 3),
+                "p95_ms": round(ordered[round(last * 0.95)] * 1000, 3),
+                "p99_ms": round(ordered[round(last * 0.99)] * 1000, 3),
+                "max_ms": round(ordered[-1] * 1000, 3),
+            }
+        return result
+
+    def reset(self) -> None:
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
+            self._totals.clear()
+
+
+callback_latency = LatencyStats()
@@ -0,0 +1,178 @@
+"""Daily, weekly and monthly leaderboards.
+
+Coin writers add each change to coin_periods under the current day, week and
+month keys ("day-2026-10-18", "week-2026-10-12" for the week starting that
+Monday, "month-2026-10"), in the same transaction as the users update, so a
+period's board is an index range over its own rows. Periods follow
+LEADERBOARD_TZ.
+
+Once a period has ended, freeze_periods() writes its final top
+LEADERBOARD_SIZE into leaderboard_snapshots as the JSON body the API serves.
+A snapshot never changes, so clients may cache it for good.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+from bots.db import connection
+from bots.leaderboard import DISPLAY_NAME, LEADERBOARD_REFRESH, LEADERBOARD_SIZE, prize_for_rank
+
+LEADERBOARD_TZ = ZoneInfo(os.environ.get("LEADERBOARD_TZ", "Africa/Addis_Ababa"))
+PERIOD_FREEZE_INTERVAL = float(os.environ.get("PERIOD_FREEZE_INTERVAL", 300))
+PERIODS = ("day", "week", "month")
+
+
+def period_keys(now: datetime | None = None) -> list[str]:
+    """The day, week and month keys that coins earned at `now` count towards."""
+    today = (now or datetime.now(LEADERBOARD_TZ)).astimezone(LEADERBOARD_TZ).date()
+    monday = today - timedelta(days=today.weekday())
+    return [f"day-{today.isoformat()}", f"week-{monday.isoformat()}", f"month-{today:%Y-%m}"]
+
+
+def period_bounds(period: str) -> tuple[datetime, datetime]:
+    """(start, end) of a period key; ValueError if it is not one."""
+    kind, _, value = period.partition("-")
+    if kind == "month":
+        start = datetime.strptime(value, "%Y-%m").date()
+        end = date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    elif kind in ("day", "week"):
+        start = date.fromisoformat(value)
+        if kind == "week" and start.weekday() != 0:
+            raise ValueError(f"Weeks start on a Monday: {period}")
+        end = start + timedelta(days=1 if kind == "day" else 7)
+    else:
+        raise ValueError(f"Unknown period: {period}")
+    return (
+        datetime.combine(start, datetime.min.time(), LEADERBOARD_TZ),
+        datetime.combine(end, datetime.min.time(), LEADERBOARD_TZ),
+    )
+
+
+def previous_period(period: str) -> str:
+    start, _ = period_bounds(period)
+    kind = period.partition("-")[0]
+    return period_keys(start - timedelta(days=1))[PERIODS.index(kind)]
+
+
+def record_period_coins(cur, rows, now: datetime | None = None) -> None:
+    """Add (user_id, coins) to the current periods; runs in the caller's transaction."""
+    keys = period_keys(now)
+    cur.executemany(
+        """
+        INSERT INTO coin_periods (period, user_id, coins) VALUES (?, ?, ?)
+        ON CONFLICT (period, user_id) DO UPDATE SET coins = coins + excluded.coins
+        """,
+        [(key, user_id, float(coins)) for user_id, coins in rows if coins for key in keys],
+    )
+
+
+def _board(conn, period: str, limit: int) -> dict:
+    rows = conn.execute(
+        f"""
+        SELECT p.user_id, {DISPLAY_NAME}, p.coins
+        FROM coin_periods p JOIN users u USING (user_id)
+        WHERE p.period = ?
+        ORDER BY p.coins DESC, p.user_id
+        LIMIT ?
+        """,
+        (period, limit),
+    ).fetchall()
+    # Ranked by position, like the all-time board
+    items = [
+        {"rank": rank, "player": name, "points": float(coins), "prize": prize_for_rank(rank)}
+        for rank, (_, name, coins) in enumerate(rows, start=1)
+    ]
+    start, end = period_bounds(period)
+    return {
+        "period": period,
+        "starts_at": start.isoformat(),
+        "ends_at": end.isoformat(),
+        "previous": previous_period(period),
+        "items": items,
+    }
+
+
+def _encode(board: dict) -> tuple[str, bytes]:
+    body = json.dumps(board).encode()
+    return f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"', body
+
+
+def _next_period(conn, after: str) -> str | None:
+    # One index seek per distinct period instead of a DISTINCT scan
+    row = conn.execute("SELECT MIN(period) FROM coin_periods WHERE period > ?", (after,)).fetchone()
+    return row[0]
+
+
+def freeze_periods(now: datetime | None = None) -> list[str]:
+    """Snapshot every ended period that has no snapshot yet; returns the periods frozen."""
+    now = now or datetime.now(LEADERBOARD_TZ)
+    frozen = []
+    with connection() as conn:
+        done = {period for (period,) in conn.execute("SELECT period FROM leaderboard_snapshots")}
+        period = _next_period(conn, "")
+        while period is not None:
+            try:
+                ended = period_bounds(period)[1] <= now
+            except ValueError:
+                ended = False
+            if ended and period not in done:
+                users = conn.execute("SELECT COUNT(*) FROM coin_periods WHERE period = ?", (period,)).fetchone()[0]
+                board = _board(conn, period, LEADERBOARD_SIZE)
+                board["users"] = users
+                etag, body = _encode(board)
+                conn.execute(
+                    "INSERT OR IGNORE INTO leaderboard_snapshots (period, users, etag, body) VALUES (?, ?, ?, ?)",
+                    (period, users, etag, body.decode()),
+                )
+                conn.commit()
+                frozen.append(period)
+            period = _next_period(conn, period)
+    return frozen
+
+
+class PeriodBoards:
+    """Live boards of the current periods, re-read at most every `refresh` seconds."""
+
+    def __init__(self, refresh: float = LEADERBOARD_REFRESH):
+        self.refresh = refresh
+        self._lock = threading.Lock()
+        # (period, limit) -> (loaded_at, etag, body)
+        self._live: dict[tuple[str, int], tuple[float, str, bytes]] = {}
+        # Snapshots are immutable, so they are kept once read
+        self._snapshots: dict[str, tuple[str, bytes]] = {}
+
+    def current(self, kind: str, limit: int) -> tuple[str, bytes]:
+        """(etag, JSON body) of the running day, week or month."""
+        running = period_keys()
+        period = running[PERIODS.index(kind)]
+        limit = max(1, min(limit, LEADERBOARD_SIZE))
+        key = (period, limit)
+        with self._lock:
+            cached = self._live.get(key)
+            if cached is None or time.monotonic() - cached[0] > self.refresh:
+                with connection() as conn:
+                    etag, body = _encode(_board(conn, period, limit))
+                # Drop entries of periods that have ended
+                self._live = {k: v for k, v in self._live.items() if k[0] in running}
+                cached = self._live[key] = (time.monotonic(), etag, body)
+            return cached[1], cached[2]
+
+    def snapshot(self, period: str) -> tuple[str, bytes] | None:
+        """(etag, JSON body) of a frozen period, or None if it is not frozen (yet)."""
+        with self._lock:
+            cached = self._snapshots.get(period)
+        if cached is None:
+            with connection() as conn:
+                row = conn.execute("SELECT etag, body FROM leaderboard_snapshots WHERE period = ?", (period,)).fetchone()
+            if row is None:
+                return None
+            cached = (row[0], row[1].encode())
+            with self._lock:
+                self._snapshots[period] = cached
+        return cached
+
+
+period_boards = PeriodBoards()
@@ -0,0 +1,159 @@
+"""PTB persistence for per-user conversation state on the shared SQLite file.
+
+Multi-step flows (deposit amount -> method -> reference, the receipt upload
+after notify_support, username change) keep their state in context.user_data.
+This persistence stores each user's dict as compact JSON in `user_state` so
+those flows survive restarts, while keeping both ends cheap:
+
+* startup loads nothing; a user's row is read on the first update that
+  touches them (refresh_user_data),
+* PTB hands over touched users every `update_interval` seconds; unchanged
+  dicts are skipped and the rest are written in one executemany transaction.
+  "Unchanged" is judged by a 16-byte digest of the stored JSON, so the
+  persistence keeps a few dozen bytes per user seen, not their state.
+"""
+import asyncio
+import hashlib
+import json
+import os
+from telegram.ext import BasePersistence, PersistenceInput
+from bots.db import connection, run_read, run_write
+
+BOT_STATE_FLUSH_INTERVAL = float(os.environ.get("BOT_STATE_FLUSH_INTERVAL", 10))
+
+
+def _encode(data: dict) -> str:
+    return json.dumps(data, separators=(",", ":"), sort_keys=True, default=str)
+
+
+def _digest(encoded: str) -> bytes:
+    # b"" stands for "no row"
+    return hashlib.blake2b(encoded.encode(), digest_size=16).digest() if encoded else b""
+
+
+def _load_user_state(user_id: int) -> str | None:
+    with connection() as conn:
+        row = conn.execute("SELECT data FROM user_state WHERE user_id = ?", (user_id,)).fetchone()
+    return row[0] if row else None
+
+
+def _write_user_states(upserts: list[tuple[int, str]], deletes: list[tuple[int]]) -> None:
+    with connection() as conn:
+        if upserts:
+            conn.executemany(
+                """
+                INSERT INTO user_state (user_id, data, updated_at) VALUES (?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(user_id) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at
+                """,
+                upserts,
+            )
+        if deletes:
+            conn.executemany("DELETE FROM user_state WHERE user_id = ?", deletes)
+        conn.commit()
+
+
+class SQLitePersistence(BasePersistence):
+    """Persists user_data only; chat_data, bot_data and conversations are not used by this bot."""
+
+    def __init__(self, update_interval: float = BOT_STATE_FLUSH_INTERVAL):
+        super().__init__(
+            store_data=PersistenceInput(bot_data=False, chat_data=False, user_data=True, callback_data=False),
+            update_interval=update_interval,
+        )
+        # Digest of the JSON known to be in the DB per loaded user
+        self._stored: dict[int, bytes] = {}
+        self._dirty: dict[int, str] = {}
+        self._flush_task: asyncio.Task | None = None
+        self.loaded = 0
+        self.written = 0
+
+    # ---- user_data ----
+
+    async def get_user_data(self) -> dict:
+        # Lazy: rows are loaded per user in refresh_user_data
+        return {}
+
+    async def refresh_user_data(self, user_id: int, user_data: dict) -> None:
+        if user_id in self._stored:
+            return
+        raw = await run_read(_load_user_state, user_id)
+        self._stored[user_id] = _digest(raw or "")
+        if raw:
+            for key, value in json.loads(raw).items():
+                # Anything set since the update arrived wins over the stored copy
+                user_data.setdefault(key, value)
+            self.loaded += 1
+
+    async def update_user_data(self, user_id: int, data: dict) -> None:
+        encoded = _encode(data) if data else ""
+        if self._stored.get(user_id) == _digest(encoded):
+            self._dirty.pop(user_id, None)
+            return
+        self._dirty[user_id] = encoded
+        # PTB calls this for every touched user in one gather(); flush them together
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_soon())
+
+    async def drop_user_data(self, user_id: int) -> None:
+        self._dirty[user_id] = ""
+        await self.flush()
+
+    async def _flush_soon(self) -> None:
+        await asyncio.sleep(0)
+        await self._write_dirty()
+
+    async def _write_dirty(self) -> None:
+        if not self._dirty:
+            return
+        batch, self._dirty = self._dirty, {}
+        upserts = [(uid, data) for uid, data in batch.items() if data]
+        deletes = [(uid,) for uid, data in batch.items() if not data]
+        try:
+            await run_write(_write_user_states, upserts, deletes)
+        except Exception as e:
+            print(f"❌ User state flush failed: {e}")
+            for uid, data in batch.items():
+                self._dirty.setdefault(uid, data)
+            return
+        self._stored.update((uid, _digest(data)) for uid, data in batch.items())
+        self.written += len(batch)
+
+    async def flush(self) -> None:
+        if self._flush_task is not None and not self._flush_task.done():
+            await self._flush_task
+        await self._write_dirty()
+
+    # ---- unused stores ----
+
+    async def get_chat_data(self) -> dict:
+        return {}
+
+    async def get_bot_data(self) -> dict:
+        return {}
+
+    async def get_callback_data(self):
+        return None
+
+    async def get_conversations(self, name: str) -> dict:
+        return {}
+
+    async def update_conversation(self, name: str, key, new_state) -> None:
+        pass
+
+    async def update_chat_data(self, chat_id: int, data: dict) -> None:
+        pass
+
+    async def update_bot_data(self, data: dict) -> None:
+        pass
+
+    async def update_callback_data(self, data) -> None:
+        pass
+
+    async def drop_chat_data(self, chat_id: int) -> None:
+        pass
+
+    async def refresh_chat_data(self, chat_id: int, chat_data: dict) -> None:
+        pass
+
+    async def refresh_bot_data(self, bot_data: dict) -> None:
+        pass
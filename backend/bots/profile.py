@@ -1,43 +1,139 @@
-import sqlite3
-from pathlib import Path
-from django.conf import settings
+import asyncio
+import os
+import time
+from typing import NamedTuple
 from telegram import Update
 from telegram.ext import ContextTypes
+from bots.cache import TTLCache
+from bots.db import connection, run_read, run_write
 
-DB_FILE = str(Path(settings.BASE_DIR).parent / "usage.db")
+PROFILE_CACHE_SIZE = int(os.environ.get("PROFILE_CACHE_SIZE", 10000))
+PROFILE_CACHE_TTL = float(os.environ.get("PROFILE_CACHE_TTL", 60))
+# How often the bot replays profile changes written by other processes, and how long they are kept
+PROFILE_SYNC_INTERVAL = float(os.environ.get("PROFILE_SYNC_INTERVAL", 1.0))
+PROFILE_CHANGES_KEEP = 600
 
 
-def ensure_username_column():
-    """Add a username column to users table if it doesn't exist."""
-    conn = sqlite3.connect(DB_FILE)
-    try:
+class UserProfile(NamedTuple):
+    registered: bool
+    username: str | None
+    balance_etb: float
+    coin: float
+
+
+# Hot per-user fields shared by registration gating, /balance and Check Balance.
+# Every helper that writes one of these columns calls invalidate_profile() for
+# its own process and publish_profile_changes() in its transaction for the
+# others (sharded workers, the API and the game engine in core.asgi).
+profile_cache = TTLCache(PROFILE_CACHE_SIZE, PROFILE_CACHE_TTL)
+
+
+def _load_profile(user_id: int) -> UserProfile:
+    with connection() as conn:
         cur = conn.cursor()
-        cur.execute("PRAGMA table_info(users)")
-        cols = {row[1] for row in cur.fetchall()}
-        if "username" not in cols:
-            cur.execute("ALTER TABLE users ADD COLUMN username TEXT")
+        cur.execute("SELECT phone, username, balance_etb, coin FROM users WHERE user_id = ?", (user_id,))
+        row = cur.fetchone()
+    if row is None:
+        return UserProfile(False, None, 0.0, 0.10)
+    phone, username, bal, coin = row
+    if bal is None or coin is None:
+        bal, coin = 0.0, 0.10
+    return UserProfile(
+        registered=bool(phone and str(phone).strip()),
+        username=str(username) if username else None,
+        balance_etb=float(bal),
+        coin=float(coin),
+    )
+
+
+def _load_and_cache(user_id: int) -> UserProfile:
+    token = profile_cache.token()
+    profile = _load_profile(user_id)
+    profile_cache.set(user_id, profile, token)
+    return profile
+
+
+def get_user_profile(user_id: int) -> UserProfile:
+    """Return the user's cached profile, loading it with one SELECT on a miss."""
+    profile = profile_cache.get(user_id)
+    if profile is None:
+        profile = _load_and_cache(user_id)
+    return profile
+
+
+async def fetch_user_profile(user_id: int) -> UserProfile:
+    """Async get_user_profile: a hit never leaves the event loop, a miss loads on a DB thread."""
+    profile = profile_cache.get(user_id)
+    if profile is None:
+        profile = await run_read(_load_and_cache, user_id)
+    return profile
+
+
+def invalidate_profile(user_id: int) -> None:
+    profile_cache.invalidate(int(user_id))
+
+
+def publish_profile_changes(cur, user_ids) -> None:
+    """Tell the profile caches of other processes that these users changed; runs in the caller's transaction."""
+    cur.executemany("INSERT INTO profile_changes (user_id) VALUES (?)", [(int(user_id),) for user_id in user_ids])
+
+
+def sync_profile_changes(after: int | None) -> int:
+    """Invalidate users changed since change `after` (None: start from now); returns the last change seen."""
+    with connection() as conn:
+        if after is None:
+            return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM profile_changes").fetchone()[0]
+        rows = conn.execute("SELECT seq, user_id FROM profile_changes WHERE seq > ? ORDER BY seq", (after,)).fetchall()
+    for seq, user_id in rows:
+        invalidate_profile(user_id)
+        after = seq
+    return after
+
+
+def prune_profile_changes() -> None:
+    with connection() as conn:
+        conn.execute("DELETE FROM profile_changes WHERE changed_at < ?", (int(time.time() - PROFILE_CHANGES_KEEP),))
         conn.commit()
-    finally:
-        conn.close()
+
+
+async def sync_profiles_periodically(interval: float = PROFILE_SYNC_INTERVAL):
+    # A cached profile changed by another process is stale for at most `interval` seconds, not the TTL
+    after = None
+    synced = 0
+    while True:
+        try:
+            after = await run_read(sync_profile_changes, after)
+            synced += 1
+            if synced % max(1, int(60 / interval)) == 0:
+                await run_write(prune_profile_changes)
+        except Exception as e:
+            print(f"❌ Profile sync failed: {e}")
+        await asyncio.sleep(interval)
+
+
+_profile_sync: asyncio.Task | None = None
+
+
+def start_profile_sync():
+    global _profile_sync
+    if _profile_sync is None:
+        _profile_sync = asyncio.create_task(sync_profiles_periodically())
+
+
+def stop_profile_sync():
+    global _profile_sync
+    if _profile_sync is not None:
+        _profile_sync.cancel()
+        _profile_sync = None
 
 
 def get_username(user_id: int) -> str | None:
     """Return stored username from DB if present, else None."""
-    conn = sqlite3.connect(DB_FILE)
-    try:
-        cur = conn.cursor()
-        cur.execute("SELECT username FROM users WHERE user_id = ?", (user_id,))
-        row = cur.fetchone()
-        if row and row[0]:
-            return str(row[0])
-        return None
-    finally:
-        conn.close()
+    return get_user_profile(user_id).username
 
 
 def set_username(user_id: int, username: str) -> None:
-    conn = sqlite3.connect(DB_FILE)
-    try:
+    with connection() as conn:
         cur = conn.cursor()
         cur.execute(
             """
@@ -48,8 +144,7 @@ def set_username(user_id: int, username: str) -> None:
             (username, user_id),
         )
         conn.commit()
-    finally:
-        conn.close()
+    invalidate_profile(user_id)
 
 
 async def prompt_change_username(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -70,6 +165,6 @@ async def handle_username_text(update: Update, context: ContextTypes.DEFAULT_TYP
         await update.message.reply_text("Username cannot be empty. Please enter a new username")
         return
 
-    set_username(update.effective_user.id, new_username)
+    await run_write(set_username, update.effective_user.id, new_username)
     context.user_data["awaiting_username_change"] = False
     await update.message.reply_text("Username updated successfully!")
@@ -1,7 +1,4 @@
-import sqlite3
 from datetime import datetime
-from pathlib import Path
-from django.conf import settings
 from telegram import (
     ReplyKeyboardMarkup,
     KeyboardButton,
@@ -11,50 +8,16 @@ from telegram import (
     InlineKeyboardMarkup,
 )
 from telegram.ext import ContextTypes
+from bots.db import connection, run_read, run_write
 from bots.finance import add_etb
-
-# Use the same DB location as the bot command
-DB_FILE = str(Path(settings.BASE_DIR).parent / "usage.db")
-
-
-def ensure_users_table():
-    conn = sqlite3.connect(DB_FILE)
-    try:
-        cur = conn.cursor()
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS users (
-                user_id INTEGER PRIMARY KEY,
-                phone TEXT,
-                created_at TEXT
-            )
-            """
-        )
-        conn.commit()
-    finally:
-        conn.close()
-
-
-def ensure_referral_column():
-    """Ensure the users table has a referred_by column."""
-    conn = sqlite3.connect(DB_FILE)
-    try:
-        cur = conn.cursor()
-        cur.execute("PRAGMA table_info(users)")
-        cols = {row[1] for row in cur.fetchall()}
-        if "referred_by" not in cols:
-            cur.execute("ALTER TABLE users ADD COLUMN referred_by INTEGER")
-        conn.commit()
-    finally:
-        conn.close()
+from bots.profile import get_user_profile, invalidate_profile, publish_profile_changes
 
 
 def record_referral_if_missing(user_id: int, referrer_id: int):
     """Insert user row if missing and set referred_by only if not already set and not self-referral."""
     if referrer_id == user_id:
         return
-    conn = sqlite3.connect(DB_FILE)
-    try:
+    with connection() as conn:
         cur = conn.cursor()
         # Ensure row exists
         cur.execute("SELECT referred_by FROM users WHERE user_id = ?", (user_id,))
@@ -72,8 +35,37 @@ def record_referral_if_missing(user_id: int, referrer_id: int):
                     (referrer_id, user_id),
                 )
         conn.commit()
-    finally:
-        conn.close()
+    invalidate_profile(user_id)
+
+
+def save_phone(user_id: int, phone: str) -> bool:
+    """Store the user's phone; return True if they had no phone before (first registration)."""
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT phone FROM users WHERE user_id = ?", (user_id,))
+        row = cur.fetchone()
+        had_phone = bool(row and row[0] and str(row[0]).strip())
+
+        cur.execute(
+            """
+            INSERT INTO users (user_id, phone, created_at)
+            VALUES (?, ?, ?)
+            ON CONFLICT(user_id) DO UPDATE SET phone=excluded.phone
+            """,
+            (user_id, phone, datetime.utcnow().isoformat()),
+        )
+        publish_profile_changes(cur, [user_id])
+        conn.commit()
+    invalidate_profile(user_id)
+    return not had_phone
+
+
+def get_referrer(user_id: int) -> int | None:
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT referred_by FROM users WHERE user_id = ?", (user_id,))
+        row = cur.fetchone()
+    return row[0] if row else None
 
 
 def build_register_keyboard() -> ReplyKeyboardMarkup:
@@ -101,26 +93,7 @@ async def handle_contact(update: Update, context: ContextTypes.DEFAULT_TYPE):
     phone = update.message.contact.phone_number
 
     # Determine if this is the first time this user is registering (no phone stored before)
-    first_time = False
-    conn = sqlite3.connect(DB_FILE)
-    try:
-        cur = conn.cursor()
-        cur.execute("SELECT phone FROM users WHERE user_id = ?", (user.id,))
-        row = cur.fetchone()
-        had_phone = bool(row and row[0] and str(row[0]).strip())
-
-        cur.execute(
-            """
-            INSERT INTO users (user_id, phone, created_at)
-            VALUES (?, ?, ?)
-            ON CONFLICT(user_id) DO UPDATE SET phone=excluded.phone
-            """,
-            (user.id, phone, datetime.utcnow().isoformat()),
-        )
-        conn.commit()
-        first_time = not had_phone
-    finally:
-        conn.close()
+    first_time = await run_write(save_phone, user.id, phone)
 
     await update.message.reply_text(
         "✅ Registration completed. Thank you!",
@@ -134,20 +107,15 @@ async def handle_contact(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if first_time:
         try:
             # Give the registering user 10 ETB
-            add_etb(user.id, 10.0)
+            await run_write(add_etb, user.id, 10.0)
         except Exception as e:
             print(f"Registration bonus failed: {e}")
 
         # Referral bonus: if this user was referred, give the inviter 10 ETB
         try:
-            conn = sqlite3.connect(DB_FILE)
-            cur = conn.cursor()
-            cur.execute("SELECT referred_by FROM users WHERE user_id = ?", (user.id,))
-            row = cur.fetchone()
-            inviter_id = row[0] if row else None
-            conn.close()
+            inviter_id = await run_read(get_referrer, user.id)
             if inviter_id:
-                add_etb(int(inviter_id), 10.0)
+                await run_write(add_etb, int(inviter_id), 10.0)
         except Exception as e:
             # Soft-fail: do not block registration completion
             print(f"Referral bonus failed: {e}")
@@ -180,22 +148,13 @@ async def handle_contact(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 
 """
-Financial helpers moved to bots/finance.py (ensure_user_finance_columns, get_user_finance, format_balance_block)
+Financial helpers moved to bots/finance.py (get_user_finance, format_balance_block)
 """
 
 
 def is_registered(user_id: int) -> bool:
     """A user is considered registered only if we have a non-empty phone stored."""
-    conn = sqlite3.connect(DB_FILE)
-    try:
-        cur = conn.cursor()
-        cur.execute(
-            "SELECT 1 FROM users WHERE user_id = ? AND phone IS NOT NULL AND TRIM(phone) <> '' LIMIT 1",
-            (user_id,),
-        )
-        return cur.fetchone() is not None
-    finally:
-        conn.close()
+    return get_user_profile(user_id).registered
 
 
 async def send_registration_prompt(update: Update, context: ContextTypes.DEFAULT_TYPE, with_keyboard: bool = False):
@@ -0,0 +1,369 @@
+"""Versioned schema for the shared SQLite file.
+
+Migrations run once, in order, at startup (run_telegram_bot and the Django
+WSGI/ASGI entry points). Request handlers can therefore assume every table,
+column and index below exists and never run DDL or PRAGMA table_info.
+"""
+import sqlite3
+from bots.db import open_connection
+
+
+def _columns(cur: sqlite3.Cursor, table: str) -> set[str]:
+    cur.execute(f"PRAGMA table_info({table})")
+    return {row[1] for row in cur.fetchall()}
+
+
+def _add_missing_columns(cur: sqlite3.Cursor, table: str, columns: list[tuple[str, str]]) -> None:
+    existing = _columns(cur, table)
+    for name, decl in columns:
+        if name not in existing:
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN {name} {decl}")
+
+
+def _0001_baseline(cur: sqlite3.Cursor) -> None:
+    """Tables previously created on demand by the ensure_* helpers.
+
+    Databases created by older builds may already have some of these, possibly
+    without the later columns, so everything here is additive.
+    """
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS usage (
+            user_id INTEGER,
+            username TEXT,
+            month TEXT,
+            PRIMARY KEY(user_id, month)
+        )
+        """
+    )
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            user_id INTEGER PRIMARY KEY,
+            phone TEXT,
+            created_at TEXT
+        )
+        """
+    )
+    _add_missing_columns(cur, "users", [
+        ("balance_etb", "REAL DEFAULT 0.0"),
+        ("coin", "REAL DEFAULT 0.10"),
+        ("username", "TEXT"),
+        ("referred_by", "INTEGER"),
+        # Legacy: approvals credit balance_etb now; nothing writes this column any more
+        ("balance", "REAL DEFAULT 0"),
+    ])
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS deposits (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            amount REAL NOT NULL,
+            method TEXT NOT NULL,
+            reference TEXT,
+            status TEXT NOT NULL DEFAULT 'pending',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            approved_at TIMESTAMP
+        )
+        """
+    )
+    # Transaction references provided by admins, auto-validated when users
+    # submit their reference from the WebApp. `used_by`/`used_at` record the
+    # user who consumed it.
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS admin_txns (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            method TEXT NOT NULL,
+            reference TEXT NOT NULL UNIQUE,
+            amount REAL,
+            used_by INTEGER,
+            used_at TIMESTAMP,
+            notes TEXT
+        )
+        """
+    )
+
+
+def _0002_hot_path_indexes(cur: sqlite3.Cursor) -> None:
+    # Pending deposits list: WHERE status = 'pending' ORDER BY created_at
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_deposits_status_created ON deposits(status, created_at)")
+    # Reference verification (WHERE reference = ? AND method = ?) already seeks the UNIQUE(reference) index
+    # Leaderboard: ORDER BY coin DESC
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_users_coin ON users(coin)")
+    # Monthly user count: WHERE month = ?
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_usage_month ON usage(month)")
+
+
+def _0003_user_state(cur: sqlite3.Cursor) -> None:
+    # context.user_data per user as compact JSON (bots.persistence)
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS user_state (
+            user_id INTEGER PRIMARY KEY,
+            data TEXT NOT NULL,
+            updated_at TIMESTAMP
+        )
+        """
+    )
+
+
+def _0004_media_files(cur: sqlite3.Cursor) -> None:
+    # Telegram file_id per named media asset (bots.media)
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS media_files (
+            asset TEXT PRIMARY KEY,
+            source TEXT NOT NULL,
+            file_id TEXT NOT NULL,
+            updated_at TIMESTAMP
+        )
+        """
+    )
+
+
+def _0005_round_settlement(cur: sqlite3.Cursor) -> None:
+    # Round ids are handed out in blocks so they stay unique across restarts and shard workers
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS round_id_blocks (
+            block INTEGER PRIMARY KEY AUTOINCREMENT,
+            reserved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    # One row per settled round; its primary key makes settlement idempotent
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS settlements (
+            round_id INTEGER PRIMARY KEY,
+            stake REAL NOT NULL,
+            players INTEGER NOT NULL,
+            prize_pool REAL NOT NULL,
+            winners TEXT NOT NULL,
+            settled_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS round_entries (
+            round_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            card INTEGER NOT NULL,
+            etb_delta REAL NOT NULL,
+            coins REAL NOT NULL,
+            PRIMARY KEY (round_id, user_id)
+        )
+        """
+    )
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_round_entries_user ON round_entries(user_id, round_id)")
+
+
+def _0006_game_history(cur: sqlite3.Cursor) -> None:
+    # Index over the binary round log (bots.game.history); the records themselves live in the segment files
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS game_rounds (
+            round_id INTEGER PRIMARY KEY,
+            stake INTEGER NOT NULL,
+            players INTEGER NOT NULL,
+            calls INTEGER NOT NULL,
+            winners INTEGER NOT NULL,
+            segment INTEGER NOT NULL,
+            offset INTEGER NOT NULL,
+            finished_at REAL NOT NULL
+        )
+        """
+    )
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS game_players (
+            user_id INTEGER NOT NULL,
+            round_id INTEGER NOT NULL,
+            card INTEGER NOT NULL,
+            won INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, round_id)
+        ) WITHOUT ROWID
+        """
+    )
+
+
+def _0007_leaderboard_ranks(cur: sqlite3.Cursor) -> None:
+    # Rank neighbours and keyset pages: ORDER BY coin DESC, user_id
+    cur.execute("DROP INDEX IF EXISTS idx_users_coin")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_users_coin_rank ON users(coin DESC, user_id)")
+    # Users per coin value, kept by triggers, so a rank sums distinct values instead of counting users
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS coin_counts (
+            coin REAL PRIMARY KEY,
+            users INTEGER NOT NULL
+        ) WITHOUT ROWID
+        """
+    )
+    cur.execute("DELETE FROM coin_counts")
+    cur.execute(
+        "INSERT INTO coin_counts (coin, users) SELECT coin, COUNT(*) FROM users WHERE coin IS NOT NULL GROUP BY coin"
+    )
+    add = """
+        INSERT INTO coin_counts (coin, users) SELECT NEW.coin, 1 WHERE NEW.coin IS NOT NULL
+        ON CONFLICT (coin) DO UPDATE SET users = users + 1;
+    """
+    remove = """
+        UPDATE coin_counts SET users = users - 1 WHERE coin = OLD.coin;
+        DELETE FROM coin_counts WHERE coin = OLD.coin AND users <= 0;
+    """
+    cur.execute(f"CREATE TRIGGER IF NOT EXISTS users_coin_insert AFTER INSERT ON users BEGIN {add} END")
+    cur.execute(f"CREATE TRIGGER IF NOT EXISTS users_coin_delete AFTER DELETE ON users BEGIN {remove} END")
+    cur.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS users_coin_update AFTER UPDATE OF coin ON users
+        WHEN OLD.coin IS NOT NEW.coin BEGIN {remove} {add} END
+        """
+    )
+
+
+def _0008_leaderboard_periods(cur: sqlite3.Cursor) -> None:
+    # Coins earned per user in each day/week/month (bots.periods)
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS coin_periods (
+            period TEXT NOT NULL,
+            user_id INTEGER NOT NULL,
+            coins REAL NOT NULL,
+            PRIMARY KEY (period, user_id)
+        ) WITHOUT ROWID
+        """
+    )
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_coin_periods_rank ON coin_periods(period, coins DESC, user_id)")
+    # Final standings of each ended period, as the JSON the API serves
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS leaderboard_snapshots (
+            period TEXT PRIMARY KEY,
+            users INTEGER NOT NULL,
+            etag TEXT NOT NULL,
+            body TEXT NOT NULL,
+            frozen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+
+
+def _0009_admin_list_indexes(cur: sqlite3.Cursor) -> None:
+    # Pending deposits by method or user, keyset on (created_at, id)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_deposits_status_method_created ON deposits(status, method, created_at)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_deposits_status_user_created ON deposits(status, user_id, created_at)")
+    # Admin txns list: unused first, then used, each by id DESC
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_admin_txns_used_id ON admin_txns((used_by IS NOT NULL), id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_admin_txns_used_method_id ON admin_txns((used_by IS NOT NULL), method, id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_admin_txns_used_by ON admin_txns(used_by, id)")
+
+
+def _0010_stake_holds(cur: sqlite3.Cursor) -> None:
+    # Stakes debited at join and not yet settled (bots.game.settlement.hold_stake)
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS stake_holds (
+            round_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            stake REAL NOT NULL,
+            held_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (round_id, user_id)
+        )
+        """
+    )
+
+
+def _0011_profile_changes(cur: sqlite3.Cursor) -> None:
+    # Profile writes made outside the bot's process, replayed into its profile cache (bots.profile)
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS profile_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            changed_at INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))
+        )
+        """
+    )
+
+
+def _0012_unsettled_rounds(cur: sqlite3.Cursor) -> None:
+    # Outcomes whose settlement kept failing, settled again before the engine next starts
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS unsettled_rounds (
+            round_id INTEGER PRIMARY KEY,
+            stake REAL NOT NULL,
+            players TEXT NOT NULL,
+            winners TEXT NOT NULL,
+            prize_pool REAL NOT NULL,
+            failed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+
+
+# Append only; never renumber or edit a migration that has shipped.
+MIGRATIONS = [
+    (1, "baseline tables", _0001_baseline),
+    (2, "hot path indexes", _0002_hot_path_indexes),
+    (3, "user state", _0003_user_state),
+    (4, "media file ids", _0004_media_files),
+    (5, "round settlement", _0005_round_settlement),
+    (6, "game history", _0006_game_history),
+    (7, "leaderboard ranks", _0007_leaderboard_ranks),
+    (8, "leaderboard periods", _0008_leaderboard_periods),
+    (9, "admin list indexes", _0009_admin_list_indexes),
+    (10, "stake holds", _0010_stake_holds),
+    (11, "profile changes", _0011_profile_changes),
+    (12, "unsettled rounds", _0012_unsettled_rounds),
+]
+
+
+def current_version(cur: sqlite3.Cursor) -> int:
+    cur.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+    return int(cur.fetchone()[0])
+
+
+def migrate(db_file: str | None = None) -> int:
+    """Apply pending migrations and return the resulting schema version.
+
+    Each migration runs in its own IMMEDIATE transaction together with its
+    schema_version row, so a bot and a web process starting at the same time
+    cannot apply the same step twice.
+    """
+    conn = open_connection(db_file)
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+        conn.commit()
+        version = current_version(cur)
+        for number, name, step in MIGRATIONS:
+            if number <= version:
+                continue
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                # Another process may have applied it while we waited for the lock
+                if current_version(cur) >= number:
+                    conn.rollback()
+                    continue
+                step(cur)
+                cur.execute("INSERT INTO schema_version (version, name) VALUES (?, ?)", (number, name))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            print(f"✅ Applied schema migration {number:04d}: {name}")
+        return current_version(cur)
+    finally:
+        conn.close()
@@ -0,0 +1,182 @@
+"""Run the bot as N worker processes partitioned by user_id.
+
+One front dispatcher long-polls Telegram and routes every update to worker
+`user_id % N` over a multiprocessing queue. Each worker runs its own PTB
+Application (handlers, context.user_data, profile cache, usage buffer), and
+because a user's updates always land on the same worker and PTB processes a
+worker's updates in order, per-user ordering is preserved. The game engine
+is not sharded: every worker forwards joins and claims to the single engine
+in core.asgi (bots.game.client), so players on different workers share rooms.
+
+Enable with TELEGRAM_WORKERS=N in .env or `run_telegram_bot --workers N`
+(polling mode only).
+"""
+import asyncio
+import multiprocessing
+import os
+from django.utils.module_loading import import_string
+from telegram import Bot, Update
+from telegram.error import NetworkError, RetryAfter, TimedOut
+
+APP_FACTORY = "bots.management.commands.run_telegram_bot.build_application"
+
+# Update fields whose payload carries the acting user as `from` (or `user`)
+_USER_FIELDS = (
+    "message", "edited_message", "callback_query", "inline_query", "chosen_inline_result",
+    "shipping_query", "pre_checkout_query", "poll_answer", "my_chat_member", "chat_member",
+    "chat_join_request", "channel_post", "edited_channel_post",
+)
+
+
+def update_user_id(update: dict) -> int | None:
+    for field in _USER_FIELDS:
+        payload = update.get(field)
+        if not payload:
+            continue
+        sender = payload.get("from") or payload.get("user")
+        if sender:
+            return int(sender["id"])
+        chat = payload.get("chat")
+        if chat:
+            return int(chat["id"])
+    return None
+
+
+def shard_for(update: dict, workers: int) -> int:
+    user_id = update_user_id(update)
+    return user_id % workers if user_id is not None else 0
+
+
+def route(updates: list[dict], workers: int) -> list[list[dict]]:
+    """Split one batch into per-worker batches, keeping each user's updates in order."""
+    batches: list[list[dict]] = [[] for _ in range(workers)]
+    for update in updates:
+        batches[shard_for(update, workers)].append(update)
+    return batches
+
+
+# -----------------------
+# Worker process
+# -----------------------
+
+def worker_main(index: int, inbox, ready, results, factory: str, token: str) -> None:
+    """Process entry point (spawned): serve batches from `inbox` until a None sentinel."""
+    import django
+
+    django.setup()
+    asyncio.run(_serve(index, inbox, ready, results, factory, token))
+
+
+async def _serve(index: int, inbox, ready, results, factory: str, token: str) -> None:
+    # Imported late: the webhook module pulls in Django views
+    from bots.webhook import start_application, stop_application
+
+    application = import_string(factory)(token, primary=(index == 0))
+    await start_application(application)
+    ready.put(index)
+    loop = asyncio.get_running_loop()
+    received = 0
+    try:
+        while True:
+            batch = await loop.run_in_executor(None, inbox.get)
+            if batch is None:
+                break
+            for data in batch:
+                update = Update.de_json(data, application.bot)
+                if update is not None:
+                    application.update_queue.put_nowait(update)
+            received += len(batch)
+    finally:
+        # stop() waits until every queued update has been processed
+        await stop_application()
+        if results is not None:
+            results.put((index, received))
+
+
+class WorkerPool:
+    """Spawned worker processes plus the queues that feed them."""
+
+    def __init__(self, workers: int, token: str, factory: str = APP_FACTORY, results=None):
+        ctx = multiprocessing.get_context("spawn")
+        self.workers = workers
+        self.inboxes = [ctx.Queue() for _ in range(workers)]
+        self.ready = ctx.Queue()
+        self.results = results if results is not None else ctx.Queue()
+        self.processes = [
+            ctx.Process(
+                target=worker_main,
+                args=(i, self.inboxes[i], self.ready, self.results, factory, token),
+                name=f"bot-worker-{i}",
+            )
+            for i in range(workers)
+        ]
+
+    def start(self) -> None:
+        for proc in self.processes:
+            proc.start()
+
+    def wait_ready(self, timeout: float | None = None) -> None:
+        for _ in self.processes:
+            self.ready.get(timeout=timeout)
+
+    def dispatch(self, updates: list[dict]) -> None:
+        for inbox, batch in zip(self.inboxes, route(updates, self.workers)):
+            if batch:
+                inbox.put(batch)
+
+    def stop(self, timeout: float | None = None) -> list[tuple[int, int]]:
+        """Send the stop sentinel, wait for the workers, return (worker, updates received) pairs."""
+        for inbox in self.inboxes:
+            inbox.put(None)
+        counts = [self.results.get(timeout=timeout) for _ in self.processes]
+        for proc in self.processes:
+            proc.join(timeout)
+        return sorted(counts)
+
+
+# -----------------------
+# Front dispatcher
+# -----------------------
+
+async def _poll_and_dispatch(token: str, pool: WorkerPool) -> None:
+    async with Bot(token) as bot:
+        await bot.delete_webhook(drop_pending_updates=True)
+        offset = None
+        while True:
+            try:
+                updates = await bot.get_updates(
+                    offset=offset,
+                    timeout=30,
+                    read_timeout=40,
+                    allowed_updates=Update.ALL_TYPES,
+                )
+            except RetryAfter as e:
+                await asyncio.sleep(e.retry_after)
+                continue
+            except (TimedOut, NetworkError) as e:
+                print(f"[DISPATCH] getUpdates failed: {e}")
+                await asyncio.sleep(1.0)
+                continue
+            if updates:
+                pool.dispatch([u.to_dict() for u in updates])
+                offset = updates[-1].update_id + 1
+
+
+def run_sharded(token: str, workers: int) -> None:
+    pool = WorkerPool(workers, token)
+    pool.start()
+    print(f"🤖 Dispatching updates to {workers} bot workers...")
+    try:
+        asyncio.run(_poll_and_dispatch(token, pool))
+    except KeyboardInterrupt:
+        print("\n🛑 Bot stopped by user")
+    finally:
+        for index, received in pool.stop():
+            print(f"✅ Worker {index} stopped after {received} updates")
+
+
+def configured_workers() -> int:
+    try:
+        return max(1, int(os.environ.get("TELEGRAM_WORKERS", 1)))
+    except ValueError:
+        return 1
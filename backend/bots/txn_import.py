@@ -0,0 +1,278 @@
+"""Streaming bulk import of admin transaction references.
+
+The upload is read incrementally and parsed according to its content type:
+a JSON array of objects, NDJSON (one object per line) or CSV rows of
+method,reference,amount,notes (an optional header row names the columns;
+lines starting with # are skipped). Anything else is sniffed from the
+first byte. Rows are validated and inserted IMPORT_CHUNK at a time with one
+executemany per transaction, so memory stays flat however large the upload
+is, and every rejected row is reported with its row number.
+"""
+import csv
+import io
+import json
+import os
+
+IMPORT_CHUNK = int(os.environ.get("IMPORT_CHUNK", 5000))
+IMPORT_MAX_ERRORS = 1000
+READ_SIZE = 64 * 1024
+# A single JSON object larger than this is treated as malformed rather than buffered
+MAX_OBJECT_BYTES = 1024 * 1024
+
+JSON_TYPES = {"application/json", "text/json"}
+NDJSON_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl", "application/x-jsonlines"}
+CSV_TYPES = {"text/csv", "application/csv", "text/plain"}
+COLUMNS = ("method", "reference", "amount", "notes")
+
+
+class UploadError(ValueError):
+    """The upload as a whole cannot be parsed."""
+
+
+class _Upload(io.RawIOBase):
+    """A file-like upload (e.g. the Django request) as a raw stream, with any sniffed bytes put back in front."""
+
+    def __init__(self, stream, head: bytes = b""):
+        self._stream = stream
+        self._head = head
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if self._head:
+            data, self._head = self._head[:len(buffer)], self._head[len(buffer):]
+        else:
+            data = self._stream.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def _text(stream, head: bytes = b"") -> io.TextIOWrapper:
+    # Buffered, decoded and split into lines in C rather than a readline call per row
+    raw = io.BufferedReader(_Upload(stream, head), READ_SIZE)
+    return io.TextIOWrapper(raw, encoding="utf-8", errors="replace", newline="")
+
+
+def _json_items(text):
+    """(index, object) for each element of a top-level JSON array, read READ_SIZE at a time."""
+    decoder = json.JSONDecoder()
+    buf, pos = "", 0
+    started = False
+    index = 0
+
+    def fill() -> bool:
+        nonlocal buf, pos
+        chunk = text.read(READ_SIZE)
+        if not chunk:
+            return False
+        buf = buf[pos:] + chunk
+        pos = 0
+        return True
+
+    while True:
+        while pos < len(buf) and buf[pos] in " \t\r\n,":
+            if buf[pos] == "," and not started:
+                raise UploadError("Expected a JSON array")
+            pos += 1
+        if pos >= len(buf):
+            if fill():
+                continue
+            raise UploadError("Unterminated JSON array")
+        if not started:
+            if buf[pos] != "[":
+                raise UploadError("Expected a JSON array")
+            started = True
+            pos += 1
+            continue
+        if buf[pos] == "]":
+            return
+        try:
+            item, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            # Usually an object split across reads; malformed only once nothing more can arrive
+            if len(buf) - pos > MAX_OBJECT_BYTES or not fill():
+                raise UploadError(f"Invalid JSON at item {index + 1}") from None
+            continue
+        index += 1
+        pos = end
+        yield index, item
+
+
+def _validate(method, reference, amount, notes) -> tuple[tuple | None, str | None]:
+    method = str(method).strip().lower() if method is not None else ""
+    reference = str(reference).strip() if reference is not None else ""
+    if not method:
+        return None, "missing method"
+    if not reference:
+        return None, "missing reference"
+    if amount is not None and amount != "":
+        try:
+            amount = float(amount)
+        except (TypeError, ValueError):
+            return None, f"invalid amount {amount!r}"
+    else:
+        amount = None
+    if notes is not None:
+        notes = str(notes).strip() or None
+    return (method, reference, amount, notes), None
+
+
+def validate_row(item) -> tuple[tuple[str, str, float | None, str | None] | None, str | None]:
+    """(method, reference, amount, notes) ready to insert from a JSON object, or (None, reason)."""
+    if not isinstance(item, dict):
+        return None, "not an object"
+    return _validate(item.get("method"), item.get("reference") or item.get("ref"), item.get("amount"), item.get("notes"))
+
+
+def _json_rows(text):
+    for index, item in _json_items(text):
+        yield index, *validate_row(item)
+
+
+def _ndjson_rows(text):
+    for number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except json.JSONDecodeError:
+            yield number, None, "invalid JSON"
+            continue
+        yield number, *validate_row(item)
+
+
+def _csv_rows(text):
+    # Validated straight from the cells; positions come from the header row when there is one
+    positions = None
+    first = True
+    padding = [None] * len(COLUMNS)
+    for number, cells in enumerate(csv.reader(text), start=1):
+        if not cells or cells[0].lstrip().startswith("#") or not any(cells):
+            continue
+        if first:
+            first = False
+            if cells[0].strip().lower() == "method":
+                names = [cell.strip().lower() for cell in cells]
+                if names[:len(COLUMNS)] != list(COLUMNS):
+                    positions = [names.index(name) if name in names else None for name in COLUMNS]
+                continue
+        if positions is not None:
+            cells = [cells[i] if i is not None and i < len(cells) else None for i in positions]
+        elif len(cells) < len(COLUMNS):
+            cells = cells + padding
+        yield number, *_validate(cells[0], cells[1], cells[2], cells[3])
+
+
+def _rows(stream, content_type: str):
+    """(row number, values or None, error or None) for each row of the upload."""
+    kind = (content_type or "").split(";")[0].strip().lower()
+    head = b""
+    if kind not in JSON_TYPES | NDJSON_TYPES | CSV_TYPES:
+        head = stream.read(READ_SIZE)
+        first = head.lstrip()[:1]
+        kind = "application/json" if first == b"[" else "application/x-ndjson" if first == b"{" else "text/csv"
+    text = _text(stream, head)
+    if kind in JSON_TYPES:
+        return _json_rows(text)
+    if kind in NDJSON_TYPES:
+        return _ndjson_rows(text)
+    return _csv_rows(text)
+
+
+class _Summary:
+    def __init__(self):
+        self.error: str | None = None
+        self.rows = 0
+        self.added = 0
+        self.duplicates = 0
+        self.invalid = 0
+        self.errors: list[dict] = []
+
+    def reject(self, row: int, error: str) -> None:
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append({"row": row, "error": error})
+
+    def as_dict(self) -> dict:
+        rejected = self.invalid + self.duplicates
+        result = {
+            "ok": self.error is None,
+            "rows": self.rows,
+            "added": self.added,
+            "skipped": rejected,
+            "duplicates": self.duplicates,
+            "invalid": self.invalid,
+            "errors": self.errors,
+            "errors_truncated": rejected > len(self.errors),
+        }
+        if self.error:
+            result["error"] = self.error
+        return result
+
+
+def _insert_chunk(conn, chunk: list[tuple[int, tuple]], summary: _Summary) -> None:
+    seen = set()
+    rows = []
+    for number, values in chunk:
+        if values[1] in seen:
+            summary.duplicates += 1
+            summary.reject(number, f"duplicate reference {values[1]}")
+            continue
+        seen.add(values[1])
+        rows.append((number, values))
+    # Ids only grow, so references at or below this id were there before the chunk.
+    # Read inside the write transaction, so no other writer can insert in between.
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        (last_id,) = conn.execute("SELECT COALESCE(MAX(id), 0) FROM admin_txns").fetchone()
+        before = conn.total_changes
+        conn.executemany(
+            "INSERT OR IGNORE INTO admin_txns (method, reference, amount, notes) VALUES (?, ?, ?, ?)",
+            [values for _, values in rows],
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    added = conn.total_changes - before
+    summary.added += added
+    if added == len(rows):
+        return
+    # Only chunks that hit existing references pay for finding which rows they were
+    summary.duplicates += len(rows) - added
+    existing = {
+        reference
+        for (reference,) in conn.execute(
+            "SELECT reference FROM admin_txns WHERE reference IN (SELECT value FROM json_each(?)) AND id <= ?",
+            (json.dumps([values[1] for _, values in rows]), last_id),
+        )
+    }
+    for number, values in rows:
+        if values[1] in existing:
+            summary.reject(number, f"duplicate reference {values[1]}")
+
+
+def import_admin_txns(conn, stream, content_type: str) -> dict:
+    """Import references from a binary stream and summarize the result.
+
+    If the upload turns out to be malformed part way, the rows before that
+    point are still imported; "ok" is false and "error" says where it stopped.
+    """
+    summary = _Summary()
+    chunk: list[tuple[int, tuple]] = []
+    try:
+        for number, values, error in _rows(stream, content_type):
+            summary.rows += 1
+            if error:
+                summary.invalid += 1
+                summary.reject(number, error)
+                continue
+            chunk.append((number, values))
+            if len(chunk) >= IMPORT_CHUNK:
+                _insert_chunk(conn, chunk, summary)
+                chunk = []
+    except UploadError as e:
+        summary.error = str(e)
+    if chunk:
+        _insert_chunk(conn, chunk, summary)
+    return summary.as_dict()
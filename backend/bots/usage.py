@@ -0,0 +1,89 @@
+import os
+import threading
+from datetime import datetime
+from bots.db import connection
+
+USAGE_FLUSH_ROWS = int(os.environ.get("USAGE_FLUSH_ROWS", 500))
+USAGE_FLUSH_INTERVAL = float(os.environ.get("USAGE_FLUSH_INTERVAL", 5.0))
+
+
+class UsageBuffer:
+    """Write-behind buffer for the monthly-activity `usage` rows.
+
+    Every command and button press logs (user_id, month). Rows are collected in
+    memory keyed by (user_id, month) and written in one executemany transaction
+    when `max_rows` are pending or when the periodic flush runs. Keys already
+    written this month are remembered so repeat clicks cost a set lookup.
+    """
+
+    def __init__(self, max_rows: int = USAGE_FLUSH_ROWS):
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        self._pending: dict[tuple[int, str], str] = {}
+        self._written: set[tuple[int, str]] = set()
+        self._month: str | None = None
+        # Counters
+        self.buffered = 0
+        self.duplicates = 0
+        self.flushed = 0
+        self.flushes = 0
+
+    def add(self, user_id: int, username: str, month: str | None = None) -> bool:
+        """Buffer one usage row. Returns True when the buffer should be flushed now."""
+        month = month or datetime.now().strftime("%Y-%m")
+        key = (int(user_id), month)
+        with self._lock:
+            if month != self._month:
+                # New month: last month's keys can never repeat
+                self._month = month
+                self._written.clear()
+            if key in self._pending or key in self._written:
+                self.duplicates += 1
+                return False
+            self._pending[key] = username or ""
+            self.buffered += 1
+            return len(self._pending) >= self.max_rows
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self) -> int:
+        """Write all pending rows in one transaction; returns the number of rows written."""
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if not batch:
+            return 0
+        rows = [(uid, username, month) for (uid, month), username in batch.items()]
+        try:
+            with connection() as conn:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO usage (user_id, username, month) VALUES (?, ?, ?)",
+                    rows,
+                )
+                conn.commit()
+        except Exception:
+            # Put the rows back so the next flush retries them
+            with self._lock:
+                for key, username in batch.items():
+                    self._pending.setdefault(key, username)
+            raise
+        with self._lock:
+            if self._month is not None:
+                self._written.update(k for k in batch if k[1] == self._month)
+            self.flushed += len(rows)
+            self.flushes += 1
+        return len(rows)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "buffered": self.buffered,
+                "duplicates": self.duplicates,
+                "flushed": self.flushed,
+                "flushes": self.flushes,
+            }
+
+
+usage_buffer = UsageBuffer()
@@ -0,0 +1,41 @@
+import hashlib
+import hmac
+import json
+import time
+from urllib.parse import parse_qsl
+
+# Reject initData older than this (seconds)
+INIT_DATA_MAX_AGE = 24 * 3600
+
+
+def verify_init_data(init_data: str, token: str, max_age: int = INIT_DATA_MAX_AGE) -> dict | None:
+    """Validate Telegram.WebApp.initData and return its `user` dict, or None.
+
+    https://core.telegram.org/bots/webapps#validating-data-received-via-the-mini-app
+    """
+    if not init_data or not token:
+        return None
+    fields = dict(parse_qsl(init_data, keep_blank_values=True))
+    received = fields.pop("hash", "")
+    check_string = "\n".join(f"{k}={v}" for k, v in sorted(fields.items()))
+    secret = hmac.new(b"WebAppData", token.encode(), hashlib.sha256).digest()
+    expected = hmac.new(secret, check_string.encode(), hashlib.sha256).hexdigest()
+    if not hmac.compare_digest(received, expected):
+        return None
+    try:
+        if max_age and time.time() - int(fields.get("auth_date", 0)) > max_age:
+            return None
+        user = json.loads(fields.get("user") or "null")
+    except ValueError:
+        return None
+    return user if isinstance(user, dict) and "id" in user else None
+
+
+def internal_token(token: str) -> str:
+    """Shared secret bot processes send to the game engine's endpoints, derived from the bot token."""
+    return hmac.new(token.encode(), b"game-engine", hashlib.sha256).hexdigest() if token else ""
+
+
+def verify_internal_token(received: str, token: str) -> bool:
+    expected = internal_token(token)
+    return bool(expected) and hmac.compare_digest(received or "", expected)
@@ -0,0 +1,135 @@
+"""Webhook ingestion: Telegram POSTs updates to /telegram/webhook on core.asgi.
+
+Select the mode in .env:
+  TELEGRAM_UPDATE_MODE=polling   (default) `manage.py run_telegram_bot` long-polls
+  TELEGRAM_UPDATE_MODE=webhook   `manage.py run_telegram_bot` registers the webhook,
+                                 the ASGI app receives and processes updates
+  TELEGRAM_WEBHOOK_URL           public https URL of the endpoint
+  TELEGRAM_WEBHOOK_SECRET        sent back by Telegram in X-Telegram-Bot-Api-Secret-Token
+"""
+import asyncio
+import hmac
+import json
+import os
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from telegram import Bot, Update
+from telegram.ext import Application
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+_application: Application | None = None
+_start_lock: asyncio.Lock | None = None
+
+
+def update_mode() -> str:
+    mode = (os.environ.get("TELEGRAM_UPDATE_MODE") or "polling").strip().lower()
+    return mode if mode in {"polling", "webhook"} else "polling"
+
+
+def _webhook_secret() -> str:
+    return (os.environ.get("TELEGRAM_WEBHOOK_SECRET") or "").strip()
+
+
+async def register_webhook(token: str) -> str:
+    """Point Telegram at TELEGRAM_WEBHOOK_URL with our secret; returns the URL."""
+    url = (os.environ.get("TELEGRAM_WEBHOOK_URL") or "").strip()
+    if not url.lower().startswith("https://"):
+        raise ValueError("TELEGRAM_WEBHOOK_URL must be set to a public https:// URL in webhook mode.")
+    secret = _webhook_secret()
+    if not secret:
+        raise ValueError("TELEGRAM_WEBHOOK_SECRET must be set in webhook mode.")
+    async with Bot(token) as bot:
+        await bot.set_webhook(
+            url=url,
+            secret_token=secret,
+            allowed_updates=Update.ALL_TYPES,
+            drop_pending_updates=True,
+        )
+    return url
+
+
+async def start_application(application: Application | None = None) -> Application:
+    """Initialize and start the bot Application once per process.
+
+    Updates put on `application.update_queue` are then processed by PTB in the
+    background, exactly as in polling mode.
+    """
+    global _application, _start_lock
+    if _application is not None:
+        return _application
+    if _start_lock is None:
+        _start_lock = asyncio.Lock()
+    async with _start_lock:
+        if _application is None:
+            if application is None:
+                # Imported here: the command module imports this one
+                from bots.management.commands.run_telegram_bot import build_application, get_bot_token
+                application = build_application(get_bot_token())
+            await application.initialize()
+            if application.post_init:
+                await application.post_init(application)
+            await application.start()
+            _application = application
+    return _application
+
+
+async def stop_application() -> None:
+    global _application
+    application, _application = _application, None
+    if application is None:
+        return
+    await application.stop()
+    if application.post_stop:
+        await application.post_stop(application)
+    await application.shutdown()
+    if application.post_shutdown:
+        await application.post_shutdown(application)
+
+
+@csrf_exempt
+async def telegram_webhook(request):
+    """Accept one update from Telegram and enqueue it without waiting for processing."""
+    if request.method != "POST":
+        return HttpResponse(status=405)
+    secret = _webhook_secret()
+    if not secret or not hmac.compare_digest(request.headers.get(SECRET_HEADER, ""), secret):
+        return HttpResponse(status=403)
+    try:
+        data = json.loads(request.body or b"{}")
+    except ValueError:
+        return JsonResponse({"error": "invalid_json"}, status=400)
+
+    application = await start_application()
+    update = Update.de_json(data, application.bot)
+    if update is None:
+        return JsonResponse({"error": "invalid_update"}, status=400)
+    # Unbounded queue: put_nowait never blocks; PTB's fetcher drains it
+    application.update_queue.put_nowait(update)
+    return HttpResponse(status=200)
+
+
+async def lifespan(receive, send) -> None:
+    """ASGI lifespan handler: host the game engine in every mode, and the bot too in webhook mode."""
+    # Imported here: the engine's modules pull in the DB layer and settlement
+    from bots.game.host import start_game_engine, stop_game_engine
+
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await start_game_engine()
+            if update_mode() == "webhook":
+                try:
+                    await start_application()
+                except Exception as e:
+                    # Fall back to starting on the first webhook request
+                    print(f"❌ Bot startup failed: {e}")
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            try:
+                await stop_application()
+            except Exception as e:
+                print(f"❌ Bot shutdown failed: {e}")
+            await stop_game_engine()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
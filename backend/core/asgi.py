@@ -13,4 +13,18 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Bring the shared SQLite schema up to date once per process start
+from bots.schema import migrate  # noqa: E402
+from bots.webhook import lifespan  # noqa: E402
+
+migrate()
+
+
+async def application(scope, receive, send):
+    # Django does not speak the lifespan protocol; use it to run the bot in webhook mode
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+        return
+    await django_application(scope, receive, send)
@@ -75,6 +75,9 @@ TEMPLATES = [
     },
 ]
 
+# runserver and WSGI servers host no game engine, so /api/game/* answers 503
+# there; the engine runs only in a single-worker ASGI server for core.asgi
+# (bots.game.host).
 WSGI_APPLICATION = 'core.wsgi.application'
 
 
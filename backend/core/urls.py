@@ -15,24 +15,44 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path
+from django.urls import path, re_path
 from api.views import (
     leaderboard_view,
+    leaderboard_rank,
+    leaderboard_period,
+    leaderboard_snapshot,
     list_pending_deposits,
     approve_deposit,
     list_admin_txns,
     add_admin_txn,
     bulk_add_admin_txns,
     upload_receipt,
+    game_claim,
+    game_join,
+    game_lobby,
+    game_cards,
+    game_card_file,
 )
+from bots.webhook import telegram_webhook
+from bots.game.stream import game_events
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/leaderboard', leaderboard_view, name='api_leaderboard'),
+    path('api/leaderboard/rank', leaderboard_rank, name='api_leaderboard_rank'),
+    path('api/leaderboard/snapshots/<str:period>', leaderboard_snapshot, name='api_leaderboard_snapshot'),
+    path('api/leaderboard/<str:kind>', leaderboard_period, name='api_leaderboard_period'),
     path('api/admin/deposits', list_pending_deposits, name='api_admin_deposits'),
     path('api/admin/deposits/<int:deposit_id>/approve', approve_deposit, name='api_admin_approve_deposit'),
     path('api/admin/txns', list_admin_txns, name='api_admin_txns'),
     path('api/admin/txns/add', add_admin_txn, name='api_admin_txns_add'),
     path('api/admin/txns/bulk', bulk_add_admin_txns, name='api_admin_txns_bulk'),
     path('api/upload-receipt', upload_receipt, name='api_upload_receipt'),
+    path('api/game/claim', game_claim, name='api_game_claim'),
+    path('api/game/join', game_join, name='api_game_join'),
+    path('api/game/events', game_events, name='api_game_events'),
+    path('api/game/lobby', game_lobby, name='api_game_lobby'),
+    path('api/game/cards', game_cards, name='api_game_cards'),
+    re_path(r'^api/game/cards/(?P<digest>[0-9a-f]{16})\.bin$', game_card_file, name='api_game_card_file'),
+    path('telegram/webhook', telegram_webhook, name='telegram_webhook'),
 ]
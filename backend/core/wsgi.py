@@ -14,3 +14,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_wsgi_application()
+
+# Bring the shared SQLite schema up to date once per process start
+from bots.schema import migrate  # noqa: E402
+
+migrate()
+
+# The game engine is hosted by core.asgi only (bots.game.host)
+print("⚠️ Serving WSGI (also runserver): no game engine here, /api/game/* answers 503; serve core.asgi to play")
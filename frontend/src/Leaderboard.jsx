@@ -24,21 +24,64 @@ export default function Leaderboard() {
   const [rows, setRows] = React.useState([]);
   const [loading, setLoading] = React.useState(false);
   const [dark, setDark] = React.useState(false);
+  const [next, setNext] = React.useState(null);
+  const [mine, setMine] = React.useState(null);
+  // 'all' (lifetime coins) or the running 'day' / 'week' / 'month'
+  const [board, setBoard] = React.useState('all');
+  const [period, setPeriod] = React.useState(null);
 
-  const fetchData = async () => {
+  const fetchMine = async () => {
+    const userId = window.Telegram?.WebApp?.initDataUnsafe?.user?.id;
+    if (!userId) return;
+    try {
+      const r = await fetch(`/api/leaderboard/rank?user_id=${userId}&neighbors=2`, { headers: { 'Accept': 'application/json' } });
+      setMine(r.ok ? await r.json() : null);
+    } catch (e) {
+      setMine(null);
+    }
+  };
+
+  // url: a live board, or a frozen period snapshot (cached by the browser for good)
+  const fetchData = async (which = board, url = null) => {
     setLoading(true);
     try {
-      const r = await fetch('/api/leaderboard?limit=50', { headers: { 'Accept': 'application/json' } });
+      const target = url || (which === 'all' ? '/api/leaderboard?limit=50' : `/api/leaderboard/${which}?limit=50`);
+      const r = await fetch(target, { headers: { 'Accept': 'application/json' } });
       if (!r.ok) throw new Error(`HTTP ${r.status}`);
       const json = await r.json();
       const items = Array.isArray(json.items) ? json.items : [];
       setRows(items);
+      setNext(json.next || null);
+      setPeriod(json.period ? json : null);
     } catch (e) {
       console.error('Leaderboard fetch failed', e);
       setRows([]);
+      setNext(null);
+      setPeriod(null);
     } finally {
       setLoading(false);
     }
+    if (which === 'all') fetchMine();
+    else setMine(null);
+  };
+
+  const selectBoard = (which) => {
+    setBoard(which);
+    fetchData(which);
+  };
+
+  // Deeper pages continue from the last row's cursor instead of an offset
+  const loadMore = async () => {
+    if (!next) return;
+    try {
+      const r = await fetch(`/api/leaderboard?limit=50&after=${encodeURIComponent(next)}`, { headers: { 'Accept': 'application/json' } });
+      if (!r.ok) throw new Error(`HTTP ${r.status}`);
+      const json = await r.json();
+      setRows(prev => [...prev, ...(Array.isArray(json.items) ? json.items : [])]);
+      setNext(json.next || null);
+    } catch (e) {
+      console.error('Leaderboard page failed', e);
+    }
   };
 
   React.useEffect(() => { fetchData(); }, []);
@@ -57,7 +100,21 @@ export default function Leaderboard() {
         <div className="title">luckybet Bingo</div>
       </div>
 
+      <div className="center">
+        {[['all', 'All time'], ['day', 'Today'], ['week', 'Week'], ['month', 'Month']].map(([key, label]) => (
+          <button key={key} className="btn" disabled={board === key} onClick={() => selectBoard(key)}>{label}</button>
+        ))}
+      </div>
+
       <div className="card">
+        {period && (
+          <div className="tab">
+            <span>{period.period}</span>
+            {period.previous && (
+              <button className="btn" onClick={() => fetchData(board, `/api/leaderboard/snapshots/${period.previous}`)}>◀ Previous</button>
+            )}
+          </div>
+        )}
         <div className="tab">
           <span>Rank</span>
           <span>Player</span>
@@ -67,8 +124,8 @@ export default function Leaderboard() {
 
         <div className="rows">
           {loading && <div className="row"><div className="name">Loading...</div></div>}
-          {!loading && rows.map((it) => (
-            <div key={it.rank} className="row">
+          {!loading && rows.map((it, i) => (
+            <div key={i} className="row">
               <div className="rank">{it.rank}</div>
               <div className="name">{it.player}</div>
               <div className="points">{it.points}</div>
@@ -78,10 +135,29 @@ export default function Leaderboard() {
         </div>
 
         <div className="center">
-          <button className="btn" onClick={fetchData}>↻ Refresh Data</button>
+          {next && !loading && <button className="btn" onClick={loadMore}>Load more</button>}
+          <button className="btn" onClick={() => fetchData()}>↻ Refresh Data</button>
         </div>
       </div>
 
+      {mine && (
+        <div className="card">
+          <div className="tab">
+            <span>Your rank: {mine.rank} of {mine.total}</span>
+          </div>
+          <div className="rows">
+            {mine.items.map((it, i) => (
+              <div key={i} className="row" style={it.me ? { fontWeight: 700 } : undefined}>
+                <div className="rank">{it.rank}</div>
+                <div className="name">{it.player}</div>
+                <div className="points">{it.points}</div>
+                <div className="prize">{it.prize}</div>
+              </div>
+            ))}
+          </div>
+        </div>
+      )}
+
       <div className="footer">
         <div>Copyright © Luckybet Bingo 2025</div>
         <div className="moon" onClick={() => setDark(!dark)} title="Toggle theme">☽</div>
@@ -1,6 +1,6 @@
 import React, { useEffect, useMemo, useState } from 'react'
 import './play.css'
-import { getCard, CARD_COUNT } from './bingoCards'
+import { getCard, loadCards } from './bingoCards'
 
 function useQuery() {
   return useMemo(() => new URLSearchParams(window.location.search), [])
@@ -22,7 +22,8 @@ export default function Play() {
   const stake = q.get('stake') ?? '10'
   const gameRunning = q.get('started') === '1' || q.get('running') === '1' || q.get('active') === '1'
   const [selected, setSelected] = useState(null) // single selected card number or null
-  const [gameId] = useState(() => Math.floor(100000 + Math.random() * 900000))
+  // Placeholder until the server stream reports the real round id
+  const [gameId, setGameId] = useState(() => Math.floor(100000 + Math.random() * 900000))
   const [activeGame] = useState(1)
   const [preview, setPreview] = useState(null) // number or null
   const [notice, setNotice] = useState(null) // string | null
@@ -32,6 +33,14 @@ export default function Play() {
   const [calls, setCalls] = useState([])
   const [muted, setMuted] = useState(false)
   const [bonusOn, setBonusOn] = useState(false)
+  const [streamError, setStreamError] = useState(null) // string | null while the server stream is unreachable
+  const [cardCount, setCardCount] = useState(0) // set once the shared card set has loaded
+
+  useEffect(() => {
+    let active = true
+    loadCards().then(n => { if (active) setCardCount(n) })
+    return () => { active = false }
+  }, [])
 
   useEffect(() => {
     const tg = initTelegram()
@@ -66,27 +75,59 @@ export default function Play() {
     } catch {}
   }, [gameRunning])
 
-  // Countdown timer during choosing phase; when hits 0, start game and play sound
+  // Server push: authoritative countdown and calls from /api/game/events (SSE)
   useEffect(() => {
-    if (phase !== 'choosing') return
-    if (countdown <= 0) {
-      setPhase('started')
-      try { playStartSound() } catch {}
-      // seed a starting number to show in the overlay
-      const startNum = Math.floor(1 + Math.random() * 75)
-      setCurrentNumber(startNum)
-      // create a list of prior calls + the current number
-      const prior = new Set()
-      while (prior.size < 8) {
-        const n = Math.floor(1 + Math.random() * 75)
-        if (n !== startNum) prior.add(n)
-      }
-      const arr = [...prior]
-      setCalls([...arr, startNum])
-      // speak the first call
-      try { playCallBlip(startNum) } catch {}
+    if (typeof EventSource === 'undefined') {
+      setStreamError('Live game updates are not supported on this device.')
       return
     }
+    let es = null
+    let closed = false
+    let retry = null
+    const connect = () => {
+      let gotState = false
+      es = new EventSource(`/api/game/events?stake=${encodeURIComponent(stake)}`)
+      // No engine behind this server (503) or no connection: say so and retry, never make up calls
+      es.onerror = () => {
+        // A dropped stream reconnects by itself; a refused one (e.g. 503, no engine) ends up closed
+        if (gotState && es.readyState !== EventSource.CLOSED) return
+        es.close()
+        setStreamError('Cannot reach the game server. Retrying…')
+        if (!closed) retry = setTimeout(connect, 5000)
+      }
+      es.addEventListener('state', (e) => {
+        const s = JSON.parse(e.data)
+        gotState = true
+        setStreamError(null)
+        setGameId(s.round)
+        setCalls(s.calls)
+        setCurrentNumber(s.calls.length ? s.calls[s.calls.length - 1] : null)
+        if (s.phase === 'countdown') setCountdown(Math.ceil(s.starts_in))
+        else setPhase('started')
+      })
+      es.addEventListener('round_start', () => {
+        setPhase('started')
+        try { playStartSound() } catch {}
+      })
+      es.addEventListener('call', (e) => {
+        const { number } = JSON.parse(e.data)
+        setCalls(prev => [...prev, number])
+        setCurrentNumber(number)
+        try { playCallBlip(number) } catch {}
+      })
+      // The stream ends with each round; follow the stake's next one
+      es.addEventListener('round_end', () => {
+        es.close()
+        if (!closed) retry = setTimeout(connect, 1000)
+      })
+    }
+    connect()
+    return () => { closed = true; clearTimeout(retry); es?.close() }
+  }, [stake])
+
+  // Countdown timer during choosing phase; the round itself starts on the server's round_start event
+  useEffect(() => {
+    if (phase !== 'choosing' || countdown <= 0) return
     const t = setInterval(() => setCountdown((s) => (s > 0 ? s - 1 : 0)), 1000)
     return () => clearInterval(t)
   }, [phase, countdown])
@@ -123,30 +164,38 @@ export default function Play() {
     synth.speak(utter)
   }
 
-  // After started, generate periodic calls
-  useEffect(() => {
-    if (phase !== 'started') return
-    // ensure first call exists
-    if (!currentNumber) return
-    const seen = new Set(calls)
-    // interval to add next call every 4 seconds
-    const int = setInterval(() => {
-      if (seen.size >= 75) { clearInterval(int); return }
-      let n = Math.floor(1 + Math.random() * 75)
-      while (seen.has(n)) n = Math.floor(1 + Math.random() * 75)
-      seen.add(n)
-      setCalls(prev => [...prev, n])
-      setCurrentNumber(n)
-      try { playCallBlip(n) } catch {}
-    }, 4000)
-    return () => clearInterval(int)
-  }, [phase, currentNumber])
+  // Ask the server to verify a BINGO; false claims remove you from the round
+  async function claimBingo() {
+    const tg = window?.Telegram?.WebApp
+    let text = 'Claim failed. Please try again.'
+    let res = null
+    try {
+      res = await fetch('/api/game/claim', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ stake: Number(stake), init_data: tg?.initData || '' }),
+      })
+    } catch {}
+    if ((!res || res.status === 503) && tg?.sendData) {
+      // Engine not reachable over HTTP: send the claim through the bot, which forwards it and replies in chat
+      tg.sendData(JSON.stringify({ type: 'claim_bingo', stake: Number(stake) }))
+      return
+    }
+    try {
+      const data = await res.json()
+      if (data.status === 'won') text = 'BINGO! You win!'
+      else if (data.status === 'late') text = 'Valid BINGO, but another player claimed first.'
+      else if (data.status === 'rejected') text = 'No winning pattern. You are out of this game.'
+      else if (data.status === 'not_playing') text = 'You are not in a running game.'
+    } catch {}
+    try { tg?.showAlert?.(text) } catch {}
+  }
 
   const toggle = (n) => {
     setSelected(prev => (prev === n ? null : n))
   }
 
-  // Static cards are provided by bingoCards.js (getCard, CARD_COUNT)
+  // Cards come from the server's card set artifact (bingoCards.js: loadCards, getCard)
 
   return (
     <div className="play-wrapper">
@@ -180,6 +229,29 @@ export default function Play() {
         </div>
       )}
 
+      {streamError && (
+        <div
+          role="alert"
+          style={{
+            position: 'fixed',
+            bottom: 12,
+            left: '50%',
+            transform: 'translateX(-50%)',
+            zIndex: 1100,
+            background: '#fdecea',
+            border: '1px solid #f5c2c0',
+            color: '#8a1c14',
+            padding: '10px 12px',
+            borderRadius: 10,
+            boxShadow: '0 6px 18px rgba(0,0,0,.12)',
+            fontWeight: 700,
+            maxWidth: '92vw'
+          }}
+        >
+          {streamError}
+        </div>
+      )}
+
       {/* Game overlay after countdown finishes */}
       {phase === 'started' && (
         <div style={{position:'fixed', inset:0, background:'linear-gradient(180deg,#330a5c,#2a0845)', overflowY:'auto', zIndex:1000, padding:'12px'}}>
@@ -269,7 +341,7 @@ export default function Play() {
              */}
             <div style={{display:'flex', justifyContent:'space-between', alignItems:'center', marginTop:14}}>
               <div style={{width:42, height:42, borderRadius:'50%', background:'#2d7ef7', color:'#fff', display:'flex', alignItems:'center', justifyContent:'center', fontWeight:900}}>{currentNumber ?? ''}</div>
-              <button style={{background:'linear-gradient(#ffdf6e,#d4ac0d)', color:'#2b2b2b', border:'none', borderRadius:12, padding:'12px 20px', fontWeight:900, boxShadow:'0 4px 12px rgba(0,0,0,.25)'}}>BINGO</button>
+              <button onClick={claimBingo} style={{background:'linear-gradient(#ffdf6e,#d4ac0d)', color:'#2b2b2b', border:'none', borderRadius:12, padding:'12px 20px', fontWeight:900, boxShadow:'0 4px 12px rgba(0,0,0,.25)'}}>BINGO</button>
             </div>
           </div>
 
@@ -286,7 +358,7 @@ export default function Play() {
 
       <div className="grid-scroll">
         <div className="grid">
-          {Array.from({ length: CARD_COUNT }, (_, i) => i + 1).map(n => (
+          {Array.from({ length: cardCount }, (_, i) => i + 1).map(n => (
             <button
               key={n}
               onClick={() => {
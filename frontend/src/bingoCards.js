@@ -1,6 +1,9 @@
-// Static set of 200 bingo cards derived from fixed seeds.
-// Each card is a 5x5 grid using classic B I N G O column ranges with a free center.
-// Access via getCard(index) where index is 1..200.
+// Bingo cards shared with the game engine.
+// The server generates the card set once (manage.py build_cards) into a small
+// binary file whose URL carries its content hash, so the browser caches it
+// for good and the Mini App always shows exactly the engine's cards.
+// Layout: "BNGO" | u16 version | u32 count | count x 25 u8 cells, row by row,
+// 0 for the free center. Call loadCards() once, then getCard(index) (1-based).
 
 const RANGES = [
   [1, 15],   // B
@@ -9,6 +12,13 @@ const RANGES = [
   [46, 60],  // G
   [61, 75],  // O
 ]
+const FREE = '★'
+const HEADER_SIZE = 10
+const FALLBACK_COUNT = 200
+
+let cells = null // Uint8Array of count * 25
+let count = 0
+let loading = null
 
 function buildCardFromSeed(seed) {
   // Build 5 columns deterministically from the seed
@@ -22,23 +32,53 @@ function buildCardFromSeed(seed) {
   // Compose rows from columns; set center free
   const rows = Array.from({ length: 5 }, (_, r) =>
     Array.from({ length: 5 }, (_, c) => {
-      if (r === 2 && c === 2) return '★'
+      if (r === 2 && c === 2) return FREE
       return columns[c][r]
     })
   )
   return rows
 }
 
-// Fixed seeds 1..200 create a stable, reproducible set of cards.
-const SEEDS = Array.from({ length: 200 }, (_, i) => i + 1)
+function parse(buffer) {
+  const view = new DataView(buffer)
+  const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4))
+  if (magic !== 'BNGO' || view.getUint16(4, true) !== 1) throw new Error('Unknown card file')
+  count = view.getUint32(6, true)
+  cells = new Uint8Array(buffer, HEADER_SIZE, count * 25)
+}
 
-export const CARDS = SEEDS.map(buildCardFromSeed)
-export const CARD_COUNT = CARDS.length
+// Same seeds as the server's default set; only used when the API is unreachable (local dev)
+function buildFallback() {
+  const out = new Uint8Array(FALLBACK_COUNT * 25)
+  for (let seed = 1; seed <= FALLBACK_COUNT; seed++) {
+    buildCardFromSeed(seed).flat().forEach((v, i) => { out[(seed - 1) * 25 + i] = v === FREE ? 0 : v })
+  }
+  count = FALLBACK_COUNT
+  cells = out
+}
 
-export function getCard(index) {
-  // index is 1-based; clamp to valid range
-  const i = Math.max(1, Math.min(index, CARDS.length))
-  return CARDS[i - 1]
+export function loadCards() {
+  if (!loading) {
+    loading = fetch('/api/game/cards')
+      .then(res => (res.ok ? res.json() : Promise.reject(new Error(`HTTP ${res.status}`))))
+      .then(manifest => fetch(manifest.url))
+      .then(res => (res.ok ? res.arrayBuffer() : Promise.reject(new Error(`HTTP ${res.status}`))))
+      .then(parse)
+      .catch(() => buildFallback())
+      .then(() => count)
+  }
+  return loading
 }
 
-export default CARDS
+export function cardCount() {
+  return count
+}
+
+export function getCard(index) {
+  // index is 1-based; clamp to valid range. Blank grid until loadCards() resolves.
+  if (!cells) return Array.from({ length: 5 }, () => Array(5).fill(''))
+  const i = Math.max(1, Math.min(index, count)) - 1
+  return Array.from({ length: 5 }, (_, r) =>
+    Array.from({ length: 5 }, (_, c) => cells[i * 25 + r * 5 + c] || FREE)
+  )
+}